@@ -32,10 +32,26 @@ test-project/upgraded/
 This is the complete end-to-end workflow using real migration tools!
 """
 
-import subprocess
+import importlib.util
+import os
 import sys
 from pathlib import Path
 
+def _run_script(script_path: Path) -> int:
+    """Execute the bot script in this interpreter and return its exit code"""
+    # The script imports app_py_version before adjusting sys.path itself
+    sys.path.insert(0, str(script_path.parent))
+    spec = importlib.util.spec_from_file_location("python_upgrader_bot", script_path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+        return module.main() if hasattr(module, "main") else 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+
 def main():
     """Launch the main Python upgrader bot"""
     script_path = Path(__file__).parent / "src" / "python-upgrader-bot.py"
@@ -48,12 +64,12 @@ def main():
     print("📖 This will run the complete migration workflow using real tools!")
     print()
     
-    # Run the main script using the same Python interpreter
+    # Run the main script in-process instead of starting a second interpreter
     try:
-        result = subprocess.run([sys.executable, str(script_path)], 
-                              cwd=Path(__file__).parent)
+        os.chdir(Path(__file__).parent)
+        returncode = _run_script(script_path)
         
-        if result.returncode == 0:
+        if returncode == 0:
             print("\n" + "=" * 70)
             print("🎉 PYTHON UPGRADER BOT COMPLETED SUCCESSFULLY!")
             print("=" * 70)
@@ -65,7 +81,7 @@ def main():
             print()
             print("💡 Ready to use the migrated code from final_migrated_code/")
         
-        sys.exit(result.returncode)
+        sys.exit(returncode)
     except KeyboardInterrupt:
         print("\n🛑 Analysis interrupted by user")
         sys.exit(1)
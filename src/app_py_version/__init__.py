@@ -27,21 +27,34 @@ __version__ = "1.0.0"
 __author__ = "AI Python Upgrade Assistant"
 __email__ = "ai-assistant@python-upgrade.dev"
 
-from .version_analyzer import (
-    PythonVersionAnalyzer,
-    PythonVersionInfo,
-    MigrationIssue,
-    AnalysisResult
-)
-from .prompt_library import (
-    PromptLibrary,
-    PromptTemplates
-)
-from .ai_tools import (
-    PyUpgradeTool,
-    Python2To3Tool,
-    ModernizeTool
-)
+import importlib
+
+# Public names are imported on first access (PEP 562) so that importing the
+# package does not pull in langchain, pydantic and lib2to3 up front
+_LAZY = {
+    'PythonVersionAnalyzer': '.version_analyzer',
+    'PythonVersionInfo': '.version_analyzer',
+    'MigrationIssue': '.version_analyzer',
+    'AnalysisResult': '.version_analyzer',
+    'PromptLibrary': '.prompt_library',
+    'PromptTemplates': '.prompt_library',
+    'PyUpgradeTool': '.ai_tools',
+    'Python2To3Tool': '.ai_tools',
+    'ModernizeTool': '.ai_tools',
+    'ModernizeBatchTool': '.ai_tools',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     'PythonVersionAnalyzer',
@@ -52,5 +65,6 @@ __all__ = [
     'PromptTemplates',
     'PyUpgradeTool',
     'Python2To3Tool',
-    'ModernizeTool'
+    'ModernizeTool',
+    'ModernizeBatchTool'
 ]
\ No newline at end of file
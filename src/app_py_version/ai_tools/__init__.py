@@ -5,12 +5,32 @@ This package contains LangChain tools for automated Python code migration and mo
 Based on popular Python upgrade tools: pyupgrade, 2to3, and modernize.
 """
 
-from .pyupgrade_tool import PyUpgradeTool
-from .python2to3_tool import Python2To3Tool
-from .modernize_tool import ModernizeTool
+import importlib
+
+# Tools are imported on first access (PEP 562) so that using one tool does not
+# pay for the imports of the others
+_LAZY = {
+    "PyUpgradeTool": ".pyupgrade_tool",
+    "Python2To3Tool": ".python2to3_tool",
+    "ModernizeTool": ".modernize_tool",
+    "ModernizeBatchTool": ".modernize_tool",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     "PyUpgradeTool",
     "Python2To3Tool", 
-    "ModernizeTool"
+    "ModernizeTool",
+    "ModernizeBatchTool"
 ]
\ No newline at end of file
@@ -7,24 +7,115 @@ to create Python 2/3 compatible code. This provides reliable compatibility
 using the same engine as the modernize command-line tool.
 """
 
+import functools
+import importlib.util
+import shutil
 import subprocess
-import tempfile
 import os
 import re
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Any, Type, List, Dict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from langchain.tools import BaseTool
 import logging
 
+from .token_scanner import scan_compat_markers, read_source_if_marked
+
 logger = logging.getLogger(__name__)
 
+# Compatibility issue name -> token scanner marker
+_COMPAT_MARKERS = {
+    "print_statement": "print_statement",
+    "division": "division",
+    "string_types": "string_types",
+    "unicode_types": "unicode_literals",
+    "dict_methods": "dict_views",
+    "input_function": "raw_input",
+}
+
+# Precompiled compatibility patterns (used when the code cannot be tokenized)
+_COMPAT_PATTERNS = {
+    "print_statement": re.compile(r'\bprint\s+[^(]'),
+    "division": re.compile(r'(?<!\/)\/(?!\/)'),  # Single slash not preceded or followed by slash
+    "string_types": re.compile(r'\bstr\s*\('),
+    "unicode_types": re.compile(r'\bunicode\s*\('),
+    "dict_methods": re.compile(r'\.(keys|values|items)\(\)'),
+    "input_function": re.compile(r'\braw_input\s*\('),
+}
+
+# The pattern-based fallback only acts on print statements and division
+_FALLBACK_QUICK_MARKERS = ('print', '/')
+_FALLBACK_QUICK_MARKERS_BYTES = tuple(marker.encode() for marker in _FALLBACK_QUICK_MARKERS)
+
+_PRINT_STATEMENT_PATTERN = re.compile(r'\bprint\s+([^(].+?)(?=\n|$)', re.MULTILINE)
+
+
+# Fixers the python-modernize CLI leaves out unless --six-unicode/--future-unicode is given
+_UNICODE_FIX_NAMES = frozenset({
+    "libmodernize.fixes.fix_unicode",
+    "libmodernize.fixes.fix_unicode_future",
+})
+
+# Refactors stdin with the python-modernize fixers and writes the result to stdout.
+# The python-modernize CLI only emits diffs for stdin, so the fixers are driven directly,
+# selected as in _modernize_fixer_names.
+_STDIN_REFACTOR_SCRIPT = """
+import sys
+from libmodernize.fixes import lib2to3_fix_names, opt_in_fix_names
+try:
+    from fissix import refactor
+except ImportError:
+    from lib2to3 import refactor
+fixers = set(refactor.get_fixers_from_package("libmodernize.fixes")) | set(lib2to3_fix_names)
+fixers -= set(opt_in_fix_names) | %r
+rt = refactor.RefactoringTool(sorted(fixers))
+sys.stdout.write(str(rt.refactor_string(sys.stdin.read(), '<stdin>')))
+""" % set(_UNICODE_FIX_NAMES)
+
+
+# RefactoringTool.refactor_string is not thread-safe; the shared instance is guarded by this lock
+_REFACTOR_LOCK = threading.Lock()
+
+
+def _modernize_fixer_names(refactor: Any) -> List[str]:
+    """
+    Select the fixers the python-modernize CLI runs by default.
+    
+    As in libmodernize.main: libmodernize's own fixers (fix_print, fix_import,
+    fix_raise, ... which add the matching __future__ imports) plus the lib2to3
+    ones it reuses, without the opt-in and unicode fixers.
+    """
+    from libmodernize.fixes import lib2to3_fix_names, opt_in_fix_names
+    fixers = set(refactor.get_fixers_from_package("libmodernize.fixes")) | set(lib2to3_fix_names)
+    return sorted(fixers - set(opt_in_fix_names) - _UNICODE_FIX_NAMES)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_refactoring_tool():
+    """Get the shared in-process RefactoringTool with the python-modernize fixers, or None if unavailable"""
+    try:
+        try:
+            # modernize >= 0.8 runs on fissix, the maintained lib2to3 fork
+            from fissix import refactor
+        except ImportError:
+            from lib2to3 import refactor
+        return refactor.RefactoringTool(_modernize_fixer_names(refactor))
+    except Exception as e:
+        logger.debug(f"In-process python-modernize unavailable: {e}")
+        return None
+
 
 class ModernizeInput(BaseModel):
     """Input schema for Python modernize tool"""
     code: str = Field(description="Python code to make Python 2/3 compatible")
 
 
+class ModernizeBatchInput(BaseModel):
+    """Input schema for the batch Python modernize tool"""
+    codes: List[str] = Field(description="List of Python code snippets to make Python 2/3 compatible")
+
+
 class ModernizeTool(BaseTool):
     """
     Python Modernize Tool using python-modernize.
@@ -40,39 +131,20 @@ class ModernizeTool(BaseTool):
     name: str = "modernize"
     description: str = "Make Python code compatible with both Python 2 and 3 using modernize"
     args_schema: Type[BaseModel] = ModernizeInput
+    _rt: Optional[Any] = PrivateAttr(default=None)
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        # Share one refactoring engine across instances so each call avoids fixer setup
+        self._rt = _get_refactoring_tool()
     
-    def _get_compatibility_patterns(self) -> Dict[str, str]:
-        """Get compatibility patterns dictionary"""
-        return {
-            "print_statement": r'\bprint\s+[^(]',
-            "division": r'(?<!\/)\/(?!\/)',  # Single slash not preceded or followed by slash
-            "string_types": r'\bstr\s*\(',
-            "unicode_types": r'\bunicode\s*\(',
-            "dict_methods": r'\.(keys|values|items)\(\)',
-            "input_function": r'\braw_input\s*\(',
-        }
-    
-    def _check_modernize_available(self) -> bool:
-        """Check if python-modernize is available"""
-        # Try direct command first
-        try:
-            result = subprocess.run(['python-modernize', '--help'], 
-                                  capture_output=True, timeout=10)
-            if result.returncode == 0:
-                return True
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        
-        # Try with python -m modernize
-        try:
-            result = subprocess.run(['python', '-m', 'libmodernize', '--help'], 
-                                  capture_output=True, timeout=10)
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _check_modernize_available() -> bool:
+        """Check if python-modernize is available (probed once per process)"""
+        # An import-spec lookup and a PATH scan answer this without spawning a process
+        return (importlib.util.find_spec('libmodernize') is not None
+                or shutil.which('python-modernize') is not None)
     
     def _run_modernize_on_code(self, code: str) -> tuple[str, bool, str]:
         """
@@ -81,52 +153,47 @@ class ModernizeTool(BaseTool):
         Returns:
             tuple: (updated_code, was_changed, error_message)
         """
+        if self._rt is not None:
+            return self._refactor_in_process(code)
+        
+        source = code if code.endswith('\n') else code + '\n'
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-                temp_file.write(code)
-                temp_file_path = temp_file.name
+            # Pipe the code through a python-modernize interpreter instead of a temp file
+            result = subprocess.run(
+                ['python', '-c', _STDIN_REFACTOR_SCRIPT],
+                input=source,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
             
-            try:
-                # Run python-modernize (try direct command first, then python -m)
-                if shutil.which('python-modernize'):
-                    cmd = ['python-modernize', '--print', '--no-diffs', temp_file_path]
-                else:
-                    cmd = ['python', '-m', 'libmodernize', '--print', '--no-diffs', temp_file_path]
-                
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if result.returncode == 0:
-                    # python-modernize prints the result to stdout
-                    updated_code = result.stdout
-                    if updated_code.strip():
-                        was_changed = updated_code != code
-                        return updated_code, was_changed, ""
-                    else:
-                        # No output, read the file
-                        with open(temp_file_path, 'r', encoding='utf-8') as f:
-                            updated_code = f.read()
-                        was_changed = updated_code != code
-                        return updated_code, was_changed, ""
-                else:
-                    error_msg = result.stderr or "Unknown modernize error"
-                    return code, False, f"modernize error: {error_msg}"
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            if result.returncode == 0 and result.stdout.strip():
+                updated_code = result.stdout
+                return updated_code, updated_code != source, ""
+            
+            error_msg = result.stderr or "Unknown modernize error"
+            return code, False, f"modernize error: {error_msg}"
                     
         except subprocess.TimeoutExpired:
             return code, False, "modernize command timed out"
         except Exception as e:
             return code, False, f"Error running modernize: {str(e)}"
     
+    def _refactor_in_process(self, code: str) -> tuple[str, bool, str]:
+        """
+        Run the python-modernize fixers in-process via RefactoringTool.
+        
+        Returns:
+            tuple: (updated_code, was_changed, error_message)
+        """
+        source = code if code.endswith('\n') else code + '\n'
+        try:
+            with _REFACTOR_LOCK:
+                updated_code = str(self._rt.refactor_string(source, '<string>'))
+            return updated_code, updated_code != source, ""
+        except Exception as e:
+            return code, False, f"modernize error: {str(e)}"
+    
     def _pattern_based_modernization(self, code: str) -> tuple[str, List[str]]:
         """
         Fallback pattern-based modernization when python-modernize is not available.
@@ -139,8 +206,8 @@ class ModernizeTool(BaseTool):
         future_imports = set()
         
         # Check if __future__ imports are needed
-        needs_print_function = bool(re.search(r'\bprint\s+[^(]', code))
-        needs_division = bool(re.search(r'(?<!\/)\/(?!\/)', code))
+        needs_print_function = bool(_COMPAT_PATTERNS["print_statement"].search(code))
+        needs_division = bool(_COMPAT_PATTERNS["division"].search(code))
         
         # Add necessary __future__ imports
         if needs_print_function:
@@ -155,45 +222,49 @@ class ModernizeTool(BaseTool):
         if future_imports:
             future_import_line = f"from __future__ import {', '.join(sorted(future_imports))}\n"
             
-            # Insert at the top, after any existing __future__ imports or docstrings
-            lines = modernized_code.split('\n')
-            insert_pos = 0
+            # Insert at the top, after any existing __future__ imports or docstrings.
+            # Scan line offsets in place rather than splitting and re-joining the source.
+            pos = 0
+            insert_at_end = False
             
             # Skip shebang, encoding, and docstrings
-            for i, line in enumerate(lines):
-                stripped = line.strip()
-                if (stripped.startswith('#') or 
-                    stripped.startswith('"""') or 
-                    stripped.startswith("'''") or
-                    stripped.startswith('from __future__') or
-                    not stripped):
-                    insert_pos = i + 1
-                else:
+            while True:
+                end = modernized_code.find('\n', pos)
+                stripped = (modernized_code[pos:] if end == -1 else modernized_code[pos:end]).strip()
+                if not (stripped.startswith('#') or 
+                        stripped.startswith('"""') or 
+                        stripped.startswith("'''") or
+                        stripped.startswith('from __future__') or
+                        not stripped):
                     break
+                if end == -1:
+                    insert_at_end = True
+                    break
+                pos = end + 1
             
-            lines.insert(insert_pos, future_import_line)
-            modernized_code = '\n'.join(lines)
+            if insert_at_end:
+                modernized_code = modernized_code + '\n' + future_import_line
+            else:
+                modernized_code = modernized_code[:pos] + future_import_line + '\n' + modernized_code[pos:]
         
         # Convert print statements to be compatible (if print_function is imported)
         if needs_print_function:
-            print_pattern = r'\bprint\s+([^(].+?)(?=\n|$)'
             def print_replacer(match):
                 content = match.group(1).strip()
                 return f'print({content})'
             
-            modernized_code = re.sub(print_pattern, print_replacer, modernized_code, flags=re.MULTILINE)
+            modernized_code = _PRINT_STATEMENT_PATTERN.sub(print_replacer, modernized_code)
             changes_made.append("Converted print statements to print() function")
         
         return modernized_code, changes_made
     
     def _detect_compatibility_issues(self, code: str) -> List[str]:
         """Detect potential Python 2/3 compatibility issues"""
-        issues = []
-        patterns = self._get_compatibility_patterns()
-        for issue_name, pattern in patterns.items():
-            if re.search(pattern, code):
-                issues.append(issue_name)
-        return issues
+        markers = scan_compat_markers(code)
+        if markers is not None:
+            return [name for name, marker in _COMPAT_MARKERS.items() if marker in markers]
+        
+        return [name for name, pattern in _COMPAT_PATTERNS.items() if pattern.search(code)]
     
     def _run(self, code: str, **kwargs) -> str:
         """Run the Python modernize tool on the provided code"""
@@ -206,11 +277,17 @@ class ModernizeTool(BaseTool):
             if not code:
                 return "❌ Error: Empty code provided."
             
+            # Check if python-modernize is available (in-process first, then CLI)
+            modernize_available = self._rt is not None or self._check_modernize_available()
+            
+            # Without python-modernize, code with no print/division cannot change
+            if not modernize_available and not any(marker in code for marker in _FALLBACK_QUICK_MARKERS):
+                return self._format_no_fallback_changes(code)
+            
             # Detect potential compatibility issues
             compatibility_issues = self._detect_compatibility_issues(code)
             
-            # Check if python-modernize is available
-            if self._check_modernize_available():
+            if modernize_available:
                 # Use the real python-modernize tool
                 updated_code, was_changed, error_msg = self._run_modernize_on_code(code)
                 
@@ -220,19 +297,11 @@ class ModernizeTool(BaseTool):
                     was_changed = len(changes_made) > 0
                     
                     if was_changed:
-                        return f"""🔧 Python 2/3 Compatibility Applied (Pattern-based)
-
-Compatibility Issues Detected: {', '.join(compatibility_issues)}
-
-📝 Modernized Code:
-```python
-{updated_code}
-```
-
-🔧 Changes Applied:
-""" + "\n".join(f"- {change}" for change in changes_made) + """
-
-✅ Code is now compatible with both Python 2.7+ and Python 3.x"""
+                        return self._format_pattern_changes(
+                            "🔧 Python 2/3 Compatibility Applied (Pattern-based)",
+                            compatibility_issues, updated_code, changes_made,
+                            "✅ Code is now compatible with both Python 2.7+ and Python 3.x"
+                        )
                     else:
                         return f"""🔍 Python 2/3 Compatibility Analysis Complete
 
@@ -275,22 +344,35 @@ No changes needed - code is already compatible.
                 updated_code, changes_made = self._pattern_based_modernization(code)
                 
                 if changes_made:
-                    return f"""🔧 Python 2/3 Compatibility Applied (Pattern-based Fallback)
-
-Compatibility Issues Detected: {', '.join(compatibility_issues)}
-
-📝 Modernized Code:
-```python
-{updated_code}
-```
+                    return self._format_pattern_changes(
+                        "🔧 Python 2/3 Compatibility Applied (Pattern-based Fallback)",
+                        compatibility_issues, updated_code, changes_made,
+                        "✅ Code should now be more compatible with both Python 2.7+ and Python 3.x\n"
+                        "⚠️  For best results, install python-modernize: pip install modernize"
+                    )
+                else:
+                    return self._format_no_fallback_changes(code)
+                
+        except Exception as e:
+            logger.error(f"Modernize tool error: {e}")
+            return f"❌ Error during modernization: {str(e)}"
 
-🔧 Changes Applied:
-""" + "\n".join(f"- {change}" for change in changes_made) + """
+    def _format_pattern_changes(self, title: str, compatibility_issues: List[str],
+                                updated_code: str, changes_made: List[str], footer: str) -> str:
+        """Format a pattern-based modernization report, joining the parts once"""
+        parts = [
+            title,
+            "\n\nCompatibility Issues Detected: ", ", ".join(compatibility_issues),
+            "\n\n📝 Modernized Code:\n```python\n", updated_code,
+            "\n```\n\n🔧 Changes Applied:\n",
+            "\n".join(f"- {change}" for change in changes_made),
+            "\n\n", footer,
+        ]
+        return "".join(parts)
 
-✅ Code should now be more compatible with both Python 2.7+ and Python 3.x
-⚠️  For best results, install python-modernize: pip install modernize"""
-                else:
-                    return f"""🔍 Python 2/3 Compatibility Analysis Complete
+    def _format_no_fallback_changes(self, code: str) -> str:
+        """Format the result when the pattern-based fallback has nothing to change"""
+        return f"""🔍 Python 2/3 Compatibility Analysis Complete
 
 📝 Original code:
 ```python
@@ -299,10 +381,46 @@ Compatibility Issues Detected: {', '.join(compatibility_issues)}
 
 ℹ️  Code appears to already be compatible or no automatic fixes available.
 💡 For comprehensive modernization, install python-modernize: pip install modernize"""
-                
-        except Exception as e:
-            logger.error(f"Modernize tool error: {e}")
-            return f"❌ Error during modernization: {str(e)}"
+
+    def _run_batch(self, codes: List[str]) -> List[str]:
+        """
+        Run the tool on several snippets, preserving input order.
+        
+        In-process refactoring is CPU bound and runs serially on the shared
+        RefactoringTool; the subprocess fallback waits on child processes, so
+        snippets are fanned out over a thread pool.
+        """
+        if self._rt is not None or len(codes) <= 1:
+            return [self._run(code) for code in codes]
+        
+        with ThreadPoolExecutor(max_workers=min(len(codes), os.cpu_count() or 1)) as executor:
+            return list(executor.map(self._run, codes))
+
+    def _run_file(self, path: str) -> str:
+        """
+        Run the tool on a file on disk.
+        
+        Without python-modernize the file is memory-mapped and only decoded if
+        the byte pre-check finds something the pattern-based fallback can change.
+        """
+        try:
+            if self._rt is not None or self._check_modernize_available():
+                with open(path, 'r', encoding='utf-8') as f:
+                    return self._run(f.read())
+            
+            code = read_source_if_marked(path, _FALLBACK_QUICK_MARKERS_BYTES)
+        except (OSError, ValueError) as e:
+            return f"❌ Error: Could not read {path}: {str(e)}"
+        
+        if code is None:
+            return f"""🔍 Python 2/3 Compatibility Analysis Complete
+
+No print statements or division found in {path}.
+
+ℹ️  Code appears to already be compatible or no automatic fixes available.
+💡 For comprehensive modernization, install python-modernize: pip install modernize"""
+        
+        return self._run(code)
 
     def run(self, code: str, **kwargs) -> str:
         """
@@ -315,4 +433,32 @@ Compatibility Issues Detected: {', '.join(compatibility_issues)}
         Returns:
             Modernization result as formatted string
         """
-        return self._run(code, **kwargs)
\ No newline at end of file
+        return self._run(code, **kwargs)
+
+
+class ModernizeBatchTool(BaseTool):
+    """
+    Batch variant of the Python Modernize Tool.
+    
+    Modernizes several snippets in one call so the refactoring engine
+    (or the CLI fallback) is set up once for the whole batch.
+    """
+    
+    name: str = "modernize_batch"
+    description: str = "Make several Python code snippets compatible with both Python 2 and 3 in one call"
+    args_schema: Type[BaseModel] = ModernizeBatchInput
+    _tool: Optional[ModernizeTool] = PrivateAttr(default=None)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._tool = ModernizeTool()
+    
+    def _run(self, codes: List[str], **kwargs) -> str:
+        """Run the Python modernize tool on each snippet"""
+        if not codes or not isinstance(codes, list):
+            return "❌ Error: Invalid input. Please provide a list of Python code snippets."
+        
+        results = self._tool._run_batch(codes)
+        return "\n\n".join(
+            f"📦 Snippet {i}/{len(results)}\n\n{result}" for i, result in enumerate(results, 1)
+        )
@@ -9,15 +9,90 @@ using the same engine as the 2to3 command-line tool.
 
 import re
 import ast
+import functools
 import tempfile
+import threading
 import os
 from typing import Optional, Any, Type, List, Dict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from langchain.tools import BaseTool
 import logging
 
+from .token_scanner import scan_compat_markers, read_source_if_marked
+
 logger = logging.getLogger(__name__)
 
+# Python 2 markers reported by the tool, in display order
+_PY2_MARKERS = (
+    "print_statement", "unicode_literals", "dict_methods", "imports_urllib2",
+    "imports_configparser", "imports_cpickle", "imports_builtin",
+    "exception_syntax", "raw_input", "xrange",
+)
+
+# Cheap substring pre-check: code containing none of these has no Python 2 markers
+_PY2_QUICK_MARKERS = (
+    'print ', 'print\t', 'print"', "print'", 'unicode', '.iter', 'urllib2',
+    'ConfigParser', 'cPickle', '__builtin__', 'except', 'raw_input', 'xrange',
+)
+_PY2_QUICK_MARKERS_BYTES = tuple(marker.encode() for marker in _PY2_QUICK_MARKERS)
+
+# Precompiled Python 2 detection patterns (used when the code cannot be tokenized)
+_PY2_PATTERNS = {
+    "print_statement": re.compile(r'\bprint\s+[^(]'),
+    "unicode_literals": re.compile(r'\bunicode\s*\('),
+    "dict_methods": re.compile(r'\.iter(keys|values|items)\(\)'),
+    "imports_urllib2": re.compile(r'import\s+urllib2'),
+    "imports_configparser": re.compile(r'import\s+ConfigParser'),
+    "exception_syntax": re.compile(r'except\s+\w+\s*,\s*\w+:'),
+    "raw_input": re.compile(r'\braw_input\s*\('),
+    "xrange": re.compile(r'\bxrange\s*\('),
+}
+
+# Precompiled rewrite patterns for the pattern-based fallback
+_PRINT_STATEMENT_PATTERN = re.compile(r'\bprint\s+([^(].+?)(?=\n|$)', re.MULTILINE)
+_EXCEPT_PATTERN = re.compile(r'except\s+(\w+)\s*,\s*(\w+):')
+
+# Builtin renames and Python 2 module imports, applied in one fused pass:
+# name -> (replacement, change description)
+_BUILTIN_RENAMES = {
+    'xrange': ('range', 'Converted xrange() to range()'),
+    'raw_input': ('input', 'Converted raw_input() to input()'),
+}
+_IMPORT_RENAMES = {
+    'urllib2': ('import urllib.request', 'Updated import: import urllib2 → import urllib.request'),
+    'ConfigParser': ('import configparser', 'Updated import: import ConfigParser → import configparser'),
+    'cPickle': ('import pickle', 'Updated import: import cPickle → import pickle'),
+    '__builtin__': ('import builtins', 'Updated import: import __builtin__ → import builtins'),
+}
+_RENAMES = {**_BUILTIN_RENAMES, **_IMPORT_RENAMES}
+_RENAME_PATTERN = re.compile(
+    r'\b(' + '|'.join(map(re.escape, _BUILTIN_RENAMES)) + r')\b'
+    r'|import\s+(' + '|'.join(map(re.escape, _IMPORT_RENAMES)) + r')\b'
+)
+
+_POST_MIGRATION_CHECKLIST = """⚠️  IMPORTANT: After migration, please:
+1. Test your code thoroughly
+2. Check for any remaining compatibility issues
+3. Update your shebang line to use python3
+4. Update your requirements.txt for Python 3 compatible packages"""
+
+# lib2to3 fixers applied by the tool
+_LIB2TO3_FIXERS = ('print', 'unicode', 'xrange', 'raw_input', 'urllib', 'except')
+
+# RefactoringTool.refactor_string is not thread-safe; shared instances are guarded by this lock
+_REFACTOR_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_refactoring_tool(fixers: tuple):
+    """Get a shared lib2to3 RefactoringTool for the given fixers, or None if lib2to3 is unavailable"""
+    try:
+        from lib2to3.refactor import RefactoringTool
+        return RefactoringTool([f"lib2to3.fixes.fix_{name}" for name in fixers])
+    except Exception as e:
+        logger.debug(f"lib2to3 unavailable: {e}")
+        return None
+
 
 class Python2To3Input(BaseModel):
     """Input schema for Python 2 to 3 migration tool"""
@@ -42,31 +117,20 @@ class Python2To3Tool(BaseTool):
     name: str = "python2to3"
     description: str = "Migrate Python 2 code to Python 3 using lib2to3"
     args_schema: Type[BaseModel] = Python2To3Input
+    _rt: Optional[Any] = PrivateAttr(default=None)
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-    
-    def _get_python2_patterns(self) -> Dict[str, str]:
-        """Get Python 2 pattern dictionary"""
-        return {
-            "print_statement": r'\bprint\s+[^(]',
-            "unicode_literals": r'\bunicode\s*\(',
-            "dict_methods": r'\.iter(keys|values|items)\(\)',
-            "imports_urllib2": r'import\s+urllib2',
-            "imports_configparser": r'import\s+ConfigParser',
-            "exception_syntax": r'except\s+\w+\s*,\s*\w+:',
-            "raw_input": r'\braw_input\s*\(',
-            "xrange": r'\bxrange\s*\(',
-        }
+        # Share one RefactoringTool across instances instead of building one per call
+        self._rt = _get_refactoring_tool(_LIB2TO3_FIXERS)
     
     def _detect_python2_patterns(self, code: str) -> List[str]:
         """Detect Python 2 specific patterns in the code"""
-        detected = []
-        patterns = self._get_python2_patterns()
-        for pattern_name, pattern in patterns.items():
-            if re.search(pattern, code):
-                detected.append(pattern_name)
-        return detected
+        markers = scan_compat_markers(code)
+        if markers is not None:
+            return [name for name in _PY2_MARKERS if name in markers]
+        
+        return [name for name, pattern in _PY2_PATTERNS.items() if pattern.search(code)]
     
     def _use_lib2to3(self, code: str) -> tuple[str, bool, str]:
         """
@@ -75,31 +139,23 @@ class Python2To3Tool(BaseTool):
         Returns:
             tuple: (migrated_code, was_changed, error_message)
         """
+        if self._rt is None:
+            return code, False, "lib2to3 not available"
+        
+        # lib2to3 requires a trailing newline
+        source = code if code.endswith('\n') else code + '\n'
         try:
-            from lib2to3 import pytree, pygram
-            from lib2to3.pgen2 import driver
-            from lib2to3.refactor import RefactoringTool
+            with _REFACTOR_LOCK:
+                new_code = self._rt.refactor_string(source, '<string>')
+            if new_code is None:
+                return code, False, ""
             
-            # Create a RefactoringTool with common fixes
-            rt = RefactoringTool(['print', 'unicode', 'xrange', 'raw_input', 'urllib', 'except'])
+            migrated = str(new_code)
+            was_changed = migrated != source
+            return migrated, was_changed, ""
             
-            # Try to refactor the code
-            try:
-                new_code = rt.refactor_string(code, '<string>')
-                if new_code is None:
-                    return code, False, ""
-                
-                migrated = str(new_code)
-                was_changed = migrated != code
-                return migrated, was_changed, ""
-                
-            except Exception as e:
-                return code, False, f"lib2to3 refactoring failed: {str(e)}"
-                
-        except ImportError:
-            return code, False, "lib2to3 not available"
         except Exception as e:
-            return code, False, f"lib2to3 error: {str(e)}"
+            return code, False, f"lib2to3 refactoring failed: {str(e)}"
     
     def _pattern_based_migration(self, code: str) -> tuple[str, List[str]]:
         """
@@ -112,46 +168,31 @@ class Python2To3Tool(BaseTool):
         changes_made = []
         
         # Convert print statements to print() function
-        print_pattern = r'\bprint\s+([^(].+?)(?=\n|$)'
         def print_replacer(match):
             content = match.group(1).strip()
             changes_made.append("Converted print statement to print() function")
             return f'print({content})'
         
-        migrated_code = re.sub(print_pattern, print_replacer, migrated_code, flags=re.MULTILINE)
+        migrated_code = _PRINT_STATEMENT_PATTERN.sub(print_replacer, migrated_code)
         
-        # Convert xrange to range
-        if re.search(r'\bxrange\b', migrated_code):
-            migrated_code = re.sub(r'\bxrange\b', 'range', migrated_code)
-            changes_made.append("Converted xrange() to range()")
+        # Convert xrange/raw_input and update Python 2 imports in a single pass
+        renamed = set()
+        def rename_replacer(match):
+            name = match.group(1) or match.group(2)
+            renamed.add(name)
+            return _RENAMES[name][0]
         
-        # Convert raw_input to input
-        if re.search(r'\braw_input\b', migrated_code):
-            migrated_code = re.sub(r'\braw_input\b', 'input', migrated_code)
-            changes_made.append("Converted raw_input() to input()")
-        
-        # Update import statements
-        import_replacements = [
-            (r'import\s+urllib2', 'import urllib.request', 'Updated import: import urllib2 → import urllib.request'),
-            (r'import\s+ConfigParser', 'import configparser', 'Updated import: import ConfigParser → import configparser'),
-            (r'import\s+cPickle', 'import pickle', 'Updated import: import cPickle → import pickle'),
-            (r'import\s+__builtin__', 'import builtins', 'Updated import: import __builtin__ → import builtins'),
-        ]
-        
-        for old_pattern, new_import, change_desc in import_replacements:
-            if re.search(old_pattern, migrated_code):
-                migrated_code = re.sub(old_pattern, new_import, migrated_code)
-                changes_made.append(change_desc)
+        migrated_code = _RENAME_PATTERN.sub(rename_replacer, migrated_code)
+        changes_made.extend(change_desc for name, (_, change_desc) in _RENAMES.items() if name in renamed)
         
         # Fix exception handling syntax
-        except_pattern = r'except\s+(\w+)\s*,\s*(\w+):'
         def except_replacer(match):
             exception_type = match.group(1)
             variable = match.group(2)
             changes_made.append("Updated exception handling syntax")
             return f'except {exception_type} as {variable}:'
         
-        migrated_code = re.sub(except_pattern, except_replacer, migrated_code)
+        migrated_code = _EXCEPT_PATTERN.sub(except_replacer, migrated_code)
         
         return migrated_code, changes_made
     
@@ -166,8 +207,10 @@ class Python2To3Tool(BaseTool):
             if not code:
                 return "❌ Error: Empty code provided."
             
-            # Detect Python 2 patterns
-            python2_patterns = self._detect_python2_patterns(code)
+            # Detect Python 2 patterns (substring pre-check skips detection for clean code)
+            python2_patterns = []
+            if any(marker in code for marker in _PY2_QUICK_MARKERS):
+                python2_patterns = self._detect_python2_patterns(code)
             if not python2_patterns:
                 return f"""ℹ️ Python 2 to 3 Migration Analysis
 
@@ -193,25 +236,19 @@ No Python 2 specific patterns detected.
                 was_changed = len(changes_made) > 0
                 
                 if was_changed:
-                    return f"""🚀 Python 2 to 3 Migration Complete
-
-Issues Fixed: {len(changes_made)}
-Python 2 Indicators Found: {', '.join(python2_patterns)}
-
-📝 Migrated Code:
-```python
-{migrated_code}
-```
-
-🔧 Migration Changes Applied:
-
-""" + "\n".join(f"{i+1}. {change}" for i, change in enumerate(changes_made)) + """
-
-⚠️  IMPORTANT: After migration, please:
-1. Test your code thoroughly
-2. Check for any remaining compatibility issues
-3. Update your shebang line to use python3
-4. Update your requirements.txt for Python 3 compatible packages"""
+                    # Build the report from parts and join once
+                    parts = [
+                        "🚀 Python 2 to 3 Migration Complete\n\n",
+                        f"Issues Fixed: {len(changes_made)}\n",
+                        f"Python 2 Indicators Found: {', '.join(python2_patterns)}\n\n",
+                        "📝 Migrated Code:\n```python\n",
+                        migrated_code,
+                        "\n```\n\n🔧 Migration Changes Applied:\n\n",
+                        "\n".join(f"{i}. {change}" for i, change in enumerate(changes_made, 1)),
+                        "\n\n",
+                        _POST_MIGRATION_CHECKLIST,
+                    ]
+                    return "".join(parts)
                 else:
                     return f"""🔍 Python 2 to 3 Migration Analysis Complete
 
@@ -236,16 +273,32 @@ Python 2 Indicators Found: {', '.join(python2_patterns)}
 
 ✅ Code has been successfully migrated using the lib2to3 refactoring tool.
 
-⚠️  IMPORTANT: After migration, please:
-1. Test your code thoroughly
-2. Check for any remaining compatibility issues
-3. Update your shebang line to use python3
-4. Update your requirements.txt for Python 3 compatible packages"""
+{_POST_MIGRATION_CHECKLIST}"""
                 
         except Exception as e:
             logger.error(f"Python 2 to 3 migration error: {e}")
             return f"❌ Error during migration: {str(e)}"
 
+    def _run_batch(self, codes: List[str]) -> List[str]:
+        """Run the migration on several snippets, sharing one RefactoringTool and preserving input order"""
+        return [self._run(code) for code in codes]
+
+    def _run_file(self, path: str) -> str:
+        """Run the migration on a file, decoding it only if the byte pre-check finds Python 2 markers"""
+        try:
+            code = read_source_if_marked(path, _PY2_QUICK_MARKERS_BYTES)
+        except (OSError, ValueError) as e:
+            return f"❌ Error: Could not read {path}: {str(e)}"
+        
+        if code is None:
+            return f"""ℹ️ Python 2 to 3 Migration Analysis
+
+No Python 2 specific patterns detected in {path}.
+
+✅ No migration needed - code is already Python 3 compatible!"""
+        
+        return self._run(code)
+
     def run(self, code: str, **kwargs) -> str:
         """
         Public interface for running the tool.
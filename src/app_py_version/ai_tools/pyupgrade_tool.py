@@ -7,18 +7,216 @@ to modernize Python code syntax. This provides reliable, tested modernization
 without relying on AI analysis.
 """
 
+import functools
+import hashlib
+import importlib.util
+import inspect
 import subprocess
 import tempfile
+import io
 import os
+import re
 import ast
+import keyword
+import tokenize
 import shutil
-from typing import Optional, Any, Type
-from pydantic import BaseModel, Field
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Any, Type, List
+from pydantic import BaseModel, Field, PrivateAttr
 from langchain.tools import BaseTool
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Map Python versions to pyupgrade arguments
+_VERSION_FLAGS = {
+    "3.6": "--py36-plus",
+    "3.7": "--py37-plus",
+    "3.8": "--py38-plus",
+    "3.9": "--py39-plus",
+    "3.10": "--py310-plus",
+    "3.11": "--py311-plus",
+    "3.12": "--py312-plus",
+}
+
+# Result templates, built once; only the version and code are substituted per call
+_CHANGED_TEMPLATE = """� PyUpgrade Modernization Complete
+
+Target Version: Python {version}
+
+📝 Modernized Code:
+```python
+{code}
+```
+
+✅ Code has been successfully modernized using pyupgrade tool."""
+
+_UNCHANGED_TEMPLATE = """� PyUpgrade Analysis Complete - No changes needed
+
+Target Version: Python {version}
+
+The code is already using modern Python {version} syntax patterns.
+
+📝 Original code:
+```python
+{code}
+```"""
+
+_FALLBACK_CHANGED_HEADER = "🔧 Fallback Modernization Applied\n\nChanges made:\n"
+_FALLBACK_UNCHANGED_HEADER = (
+    "🔍 Fallback Analysis Complete - No changes needed\n\n"
+    "The code appears to be using modern Python patterns.\n\n"
+    "📝 Original code:\n```python\n"
+)
+
+# Bounded LRU of pyupgrade results keyed by (code digest, target version), shared by
+# all tool instances so agent retries on identical snippets skip the rewrite
+_RESULT_CACHE_SIZE = 1024
+_RESULT_CACHE: "OrderedDict[tuple[str, str], tuple[str, bool, str]]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+
+# Cleared when the installed pyupgrade turns out to lack stdin ('-') support
+_stdin_supported = True
+
+# Below this many snippets modernizing in-process beats starting worker processes
+_PARALLEL_MIN_SNIPPETS = 32
+
+# Tokens skipped when looking for string formatting sequences
+_SKIPPED_TOKENS = {tokenize.COMMENT, tokenize.NL}
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+def _simple_string_body(tok: tokenize.TokenInfo) -> Optional[tuple[str, str]]:
+    """Get (quote, body) of a plain single-quoted string literal, or None"""
+    literal = tok.string
+    if literal[:1] in ('u', 'U'):
+        literal = literal[1:]
+    quote = literal[:1]
+    if quote not in ('"', "'") or literal[:3] == quote * 3:
+        return None
+    return quote, literal[1:-1]
+
+
+def _convert_string_formatting(code: str) -> tuple[str, int, int]:
+    """
+    Convert "...{x}...".format(x) and "...%s..." % x to f-strings in one token pass.
+    
+    Only literals with exactly one placeholder and no other braces or percent
+    signs are rewritten, so the result is always equivalent code.
+    
+    Returns:
+        tuple: (updated_code, format_conversions, percent_conversions)
+    """
+    try:
+        tokens = [
+            tok for tok in tokenize.generate_tokens(io.StringIO(code).readline)
+            if tok.type not in _SKIPPED_TOKENS
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return code, 0, 0
+    
+    # Absolute offset of each line start, for splicing by token position
+    line_starts = [0, 0]
+    for line in io.StringIO(code):
+        line_starts.append(line_starts[-1] + len(line))
+    
+    def offset(pos: tuple[int, int]) -> int:
+        return line_starts[pos[0]] + pos[1]
+    
+    def text(i: int) -> Optional[str]:
+        return tokens[i].string if i < len(tokens) else None
+    
+    parts = []
+    last = 0
+    format_count = percent_count = 0
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        literal = _simple_string_body(tok) if tok.type == tokenize.STRING else None
+        # Implicitly concatenated literals are left alone
+        concatenated = (i > 0 and tokens[i - 1].type == tokenize.STRING) or (
+            i + 1 < len(tokens) and tokens[i + 1].type == tokenize.STRING)
+        if literal is None or concatenated:
+            i += 1
+            continue
+        
+        quote, body = literal
+        replacement = end = None
+        placeholders = _PLACEHOLDER_RE.findall(body)
+        
+        if (text(i + 1) == '.' and text(i + 2) == 'format' and text(i + 3) == '('
+                and i + 5 < len(tokens) and tokens[i + 4].type == tokenize.NAME and text(i + 5) == ')'
+                and len(placeholders) == 1 and placeholders[0] == tokens[i + 4].string
+                and body.count('{') == 1 and body.count('}') == 1):
+            replacement = f"f{quote}{body}{quote}"
+            end, skip = tokens[i + 5].end, 6
+            format_count += 1
+        elif (text(i + 1) == '%' and i + 2 < len(tokens) and tokens[i + 2].type == tokenize.NAME
+                and not keyword.iskeyword(tokens[i + 2].string)
+                and text(i + 3) not in ('.', '(', '[', '**')
+                and body.count('%') == 1 and '%s' in body and '{' not in body and '}' not in body):
+            name = tokens[i + 2].string
+            replacement = f"f{quote}{body.replace('%s', '{' + name + '}')}{quote}"
+            end, skip = tokens[i + 2].end, 3
+            percent_count += 1
+        
+        if replacement is None:
+            i += 1
+            continue
+        
+        parts.append(code[last:offset(tok.start)])
+        parts.append(replacement)
+        last = offset(end)
+        i += skip
+    
+    if not parts:
+        return code, 0, 0
+    parts.append(code[last:])
+    return "".join(parts), format_count, percent_count
+
+
+@functools.lru_cache(maxsize=1024)
+def _syntax_error(code: str) -> str:
+    """Get the syntax error message for a snippet, or an empty string if it parses"""
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        return f"Invalid Python syntax: {e}"
+    return ""
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pyupgrade_fixers():
+    """
+    Get pyupgrade's in-process fixer entry points, or None if unavailable.
+    
+    Returns:
+        tuple: (fix_plugins, fix_tokens, Settings, fix_tokens_takes_min_version)
+    """
+    try:
+        from pyupgrade._main import _fix_plugins, _fix_tokens
+        from pyupgrade._data import Settings
+        # pyupgrade < 3 also passes the minimum version to _fix_tokens
+        takes_min_version = len(inspect.signature(_fix_tokens).parameters) > 1
+        return _fix_plugins, _fix_tokens, Settings, takes_min_version
+    except Exception as e:
+        logger.debug(f"In-process pyupgrade unavailable: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _worker_tool(target_version: str) -> "PyUpgradeTool":
+    """Get the PyUpgradeTool of a pool worker process, built once per target version"""
+    return PyUpgradeTool(target_version=target_version)
+
+
+def _run_chunk(target_version: str, codes: List[str]) -> List[str]:
+    """Pool worker entry point: modernize one chunk of snippets as a single batch"""
+    return _worker_tool(target_version)._run_batch(codes)
+
 
 class PyUpgradeInput(BaseModel):
     """Input schema for PyUpgrade tool"""
@@ -45,202 +243,338 @@ class PyUpgradeTool(BaseTool):
     description: str = "Modernize Python code to newer syntax patterns using the pyupgrade tool"
     args_schema: Type[BaseModel] = PyUpgradeInput
     target_version: str = Field(default="3.11")
+    _fixers: Optional[tuple] = PrivateAttr(default=None)
+    _pool: Optional[ProcessPoolExecutor] = PrivateAttr(default=None)
+    _pool_workers: int = PrivateAttr(default=0)
     
     def __init__(self, target_version: str = "3.11", **kwargs):
         super().__init__(**kwargs)
         self.target_version = target_version
+        # Run pyupgrade's fixers in-process when importable, avoiding a subprocess per batch
+        self._fixers = _get_pyupgrade_fixers()
     
-    def _check_pyupgrade_available(self) -> bool:
-        """Check if pyupgrade is available in the system"""
-        # Try direct command first
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _check_pyupgrade_available() -> bool:
+        """Check if pyupgrade is available (probed once per process)"""
+        # A PATH scan and an import-spec lookup answer this without spawning a process
+        return (shutil.which("pyupgrade") is not None
+                or importlib.util.find_spec("pyupgrade") is not None)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_pyupgrade_command() -> tuple:
+        """Get the pyupgrade command prefix (resolved once per process)"""
+        # Try direct command first, then fallback to python -m
         if shutil.which("pyupgrade"):
-            return True
-        
-        # Try with python -m pyupgrade
-        try:
-            result = subprocess.run(['python', '-m', 'pyupgrade', '--help'], 
-                                  capture_output=True, timeout=10)
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+            return ("pyupgrade",)
+        return (sys.executable, "-m", "pyupgrade")
     
     def _get_pyupgrade_args(self) -> list:
         """Get pyupgrade command arguments based on target version"""
-        # Try direct command first, then fallback to python -m
-        if shutil.which("pyupgrade"):
-            args = ["pyupgrade"]
-        else:
-            args = ["python", "-m", "pyupgrade"]
+        # Default to py311-plus for unknown versions
+        return [*self._get_pyupgrade_command(), _VERSION_FLAGS.get(self.target_version, "--py311-plus")]
+    
+    def _run_pyupgrade_on_files(self, paths: List[str]) -> subprocess.CompletedProcess:
+        """Run pyupgrade once over all given files, rewriting them in place"""
+        return subprocess.run(
+            self._get_pyupgrade_args() + paths,
+            capture_output=True,
+            text=True,
+            timeout=30 + len(paths)
+        )
+    
+    def _min_version(self) -> tuple:
+        """Get the target version as the tuple pyupgrade's Settings expects"""
+        try:
+            return tuple(int(part) for part in self.target_version.split('.')[:2])
+        except (AttributeError, ValueError):
+            # Mirror the --py311-plus default used for unknown versions
+            return (3, 11)
+    
+    def _fix_in_process(self, code: str, settings: Any) -> tuple[str, bool, str]:
+        """
+        Run pyupgrade's fixers directly on a snippet.
         
-        # Map Python versions to pyupgrade arguments
-        version_mapping = {
-            "3.6": ["--py36-plus"],
-            "3.7": ["--py37-plus"],
-            "3.8": ["--py38-plus"],
-            "3.9": ["--py39-plus"],
-            "3.10": ["--py310-plus"],
-            "3.11": ["--py311-plus"],
-            "3.12": ["--py312-plus"],
-        }
+        Returns:
+            tuple: (updated_code, was_changed, error_message)
+        """
+        fix_plugins, fix_tokens, _, takes_min_version = self._fixers
+        try:
+            updated_code = fix_plugins(code, settings=settings)
+            # _fix_plugins only rewrites code it parsed, and returns unparsable code
+            # untouched; so the syntax check is needed only when nothing changed
+            if updated_code == code:
+                syntax_error = _syntax_error(code)
+                if syntax_error:
+                    return code, False, syntax_error
+            if takes_min_version:
+                updated_code = fix_tokens(updated_code, min_version=settings.min_version)
+            else:
+                updated_code = fix_tokens(updated_code)
+            return updated_code, updated_code != code, ""
+        except Exception as e:
+            return code, False, f"Error running pyupgrade: {str(e)}"
+    
+    def _run_pyupgrade_on_stdin(self, code: str) -> Optional[tuple[str, bool, str]]:
+        """
+        Run pyupgrade on one snippet through stdin/stdout.
         
-        # Use the appropriate flag for the target version
-        if self.target_version in version_mapping:
-            args.extend(version_mapping[self.target_version])
-        else:
-            # Default to py311-plus for unknown versions
-            args.extend(["--py311-plus"])
+        Returns:
+            tuple: (updated_code, was_changed, error_message), or None if stdin mode
+            failed and the file-based path should be used instead
+        """
+        global _stdin_supported
+        result = subprocess.run(
+            self._get_pyupgrade_args() + ["--exit-zero-even-if-changed", "-"],
+            input=code,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            timeout=30
+        )
+        if result.returncode == 0:
+            return result.stdout, result.stdout != code, ""
         
-        return args
+        # Older pyupgrade releases reject '-' or the exit flag; stop trying stdin mode
+        if result.returncode == 2 and "usage:" in result.stderr:
+            logger.debug("pyupgrade has no stdin mode, using temporary files")
+            _stdin_supported = False
+        return None
     
-    def _run_pyupgrade_on_code(self, code: str) -> tuple[str, bool, str]:
+    def _run_pyupgrade_on_codes(self, codes: List[str]) -> List[tuple[str, bool, str]]:
         """
-        Run pyupgrade on the provided code.
+        Run pyupgrade on several snippets, reusing cached results for repeated code.
         
         Returns:
-            tuple: (updated_code, was_changed, error_message)
+            list of tuples: (updated_code, was_changed, error_message), in input order
+        """
+        keys = [(hashlib.blake2b(code.encode('utf-8'), digest_size=16).hexdigest(), self.target_version)
+                for code in codes]
+        results: List[Optional[tuple[str, bool, str]]] = []
+        with _RESULT_CACHE_LOCK:
+            for key in keys:
+                cached = _RESULT_CACHE.get(key)
+                if cached is not None:
+                    _RESULT_CACHE.move_to_end(key)
+                results.append(cached)
+        
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        if not misses:
+            return results
+        
+        outcomes = self._run_pyupgrade_uncached([codes[i] for i in misses])
+        with _RESULT_CACHE_LOCK:
+            for i, outcome in zip(misses, outcomes):
+                results[i] = outcome
+                # Errors (timeouts, crashes) may be transient, so only successes are kept
+                if not outcome[2]:
+                    _RESULT_CACHE[keys[i]] = outcome
+            while len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+                _RESULT_CACHE.popitem(last=False)
+        return results
+    
+    def _run_pyupgrade_uncached(self, codes: List[str]) -> List[tuple[str, bool, str]]:
+        """
+        Run pyupgrade on several snippets with a single invocation.
+        
+        Uses the in-process fixers when available, otherwise one pyupgrade
+        subprocess: fed through stdin for a single snippet, or over a temporary
+        directory holding every snippet.
+        
+        Returns:
+            list of tuples: (updated_code, was_changed, error_message), in input order
         """
+        if self._fixers is not None:
+            settings = self._fixers[2](min_version=self._min_version())
+            return [self._fix_in_process(code, settings) for code in codes]
+        
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-                temp_file.write(code)
-                temp_file_path = temp_file.name
+            # A single snippet is piped through stdin, avoiding the temp file round-trip
+            if len(codes) == 1 and _stdin_supported:
+                outcome = self._run_pyupgrade_on_stdin(codes[0])
+                if outcome is not None:
+                    return [outcome]
             
-            try:
-                # Prepare pyupgrade command
-                cmd = self._get_pyupgrade_args()
-                cmd.append(temp_file_path)
+            # The directory and every snippet in it are removed on exit, even on errors
+            with tempfile.TemporaryDirectory(prefix="pyup_") as temp_dir:
+                paths = []
+                for i, code in enumerate(codes):
+                    path = os.path.join(temp_dir, f"f{i}.py")
+                    # Bytes in and out, so line endings survive untranslated on Windows
+                    with open(path, 'wb') as f:
+                        f.write(code.encode('utf-8'))
+                    paths.append(path)
                 
-                # Run pyupgrade
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+                result = self._run_pyupgrade_on_files(paths)
                 
-                # Read the updated file
-                with open(temp_file_path, 'r', encoding='utf-8') as f:
-                    updated_code = f.read()
+                # pyupgrade returns 1 when it rewrites a file; anything else is a failure
+                if result.returncode not in (0, 1):
+                    error_msg = result.stderr or "Unknown pyupgrade error"
+                    return [(code, False, f"pyupgrade error: {error_msg}") for code in codes]
                 
-                # Check if changes were made
-                was_changed = updated_code != code
+                # Read every snippet back in a single directory pass
+                updated = {}
+                with os.scandir(temp_dir) as entries:
+                    for entry in entries:
+                        with open(entry.path, 'rb') as f:
+                            updated[entry.name] = f.read().decode('utf-8')
                 
-                # Handle pyupgrade's return codes
-                if result.returncode == 0:
-                    return updated_code, was_changed, ""
-                elif result.returncode == 1:
-                    # pyupgrade returns 1 when it makes changes
-                    return updated_code, True, ""
-                else:
-                    error_msg = result.stderr or "Unknown pyupgrade error"
-                    return code, False, f"pyupgrade error: {error_msg}"
+                results = []
+                for i, code in enumerate(codes):
+                    updated_code = updated.get(f"f{i}.py", code)
+                    results.append((updated_code, updated_code != code, ""))
+                return results
                 
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    
         except subprocess.TimeoutExpired:
-            return code, False, "pyupgrade command timed out"
+            return [(code, False, "pyupgrade command timed out") for code in codes]
         except Exception as e:
-            return code, False, f"Error running pyupgrade: {str(e)}"
+            return [(code, False, f"Error running pyupgrade: {str(e)}") for code in codes]
+    
+    def _run_pyupgrade_on_code(self, code: str) -> tuple[str, bool, str]:
+        """
+        Run pyupgrade on the provided code.
+        
+        Returns:
+            tuple: (updated_code, was_changed, error_message)
+        """
+        return self._run_pyupgrade_on_codes([code])[0]
     
     def _pattern_based_fallback(self, code: str) -> str:
         """
         Fallback method when pyupgrade is not available.
         Applies basic modernization patterns.
         """
-        import re
+        # Convert simple .format() and % formatting to f-strings
+        updated_code, format_count, percent_count = _convert_string_formatting(code)
         
-        updated_code = code
-        changes_made = []
+        changes_made = (["Converted .format() to f-string"] * format_count
+                        + ["Converted % formatting to f-string"] * percent_count)
         
-        # Convert simple .format() to f-strings
-        format_pattern = r'(["\'])([^"\']*?)\{(\w+)\}([^"\']*?)\1\.format\(\s*(\w+)\s*\)'
-        def format_replacer(match):
-            quote = match.group(1)
-            before = match.group(2)
-            var_name = match.group(3)
-            after = match.group(4)
-            param = match.group(5)
-            if var_name == param:
-                changes_made.append(f"Converted .format() to f-string")
-                return f'f{quote}{before}{{{var_name}}}{after}{quote}'
-            return match.group(0)
+        if changes_made:
+            return "".join((_FALLBACK_CHANGED_HEADER, "\n".join(f"- {change}" for change in changes_made),
+                            "\n\n📝 Updated Code:\n```python\n", updated_code, "\n```"))
+        else:
+            return "".join((_FALLBACK_UNCHANGED_HEADER, code, "\n```"))
+    
+    def _validate_code(self, code: str, check_syntax: bool = True) -> tuple[str, str]:
+        """
+        Validate and normalize a snippet.
         
-        updated_code = re.sub(format_pattern, format_replacer, updated_code)
+        Args:
+            code: Python code to validate
+            check_syntax: Whether to parse the code; skipped when the caller
+                defers the check to the in-process fixers
         
-        # Convert % formatting to f-strings (simple cases)
-        percent_pattern = r'(["\'])([^"\']*?)%s([^"\']*?)\1\s*%\s*(\w+)'
-        def percent_replacer(match):
-            quote = match.group(1)
-            before = match.group(2)
-            after = match.group(3)
-            var_name = match.group(4)
-            changes_made.append(f"Converted % formatting to f-string")
-            return f'f{quote}{before}{{{var_name}}}{after}{quote}'
+        Returns:
+            tuple: (stripped_code, error_message)
+        """
+        if not code or not isinstance(code, str):
+            return code, "❌ Error: Invalid input. Please provide Python code as a string."
         
-        updated_code = re.sub(percent_pattern, percent_replacer, updated_code)
+        code = code.strip()
+        if not code:
+            return code, "❌ Error: Empty code provided."
         
-        if changes_made:
-            return f"🔧 Fallback Modernization Applied\n\nChanges made:\n" + "\n".join(f"- {change}" for change in changes_made) + f"\n\n📝 Updated Code:\n```python\n{updated_code}\n```"
+        syntax_error = _syntax_error(code) if check_syntax else ""
+        return code, f"❌ Error: {syntax_error}" if syntax_error else ""
+    
+    def _format_result(self, code: str, updated_code: str, was_changed: bool, error_msg: str) -> str:
+        """Format the outcome of a pyupgrade run on one snippet"""
+        if error_msg:
+            return f"❌ Error: {error_msg}"
+        
+        if was_changed:
+            return _CHANGED_TEMPLATE.format_map({"version": self.target_version, "code": updated_code})
         else:
-            return f"🔍 Fallback Analysis Complete - No changes needed\n\nThe code appears to be using modern Python patterns.\n\n📝 Original code:\n```python\n{code}\n```"
+            return _UNCHANGED_TEMPLATE.format_map({"version": self.target_version, "code": code})
     
-    def _run(self, code: str, **kwargs) -> str:
-        """Run the PyUpgrade tool on the provided code"""
+    def _run_batch(self, codes: List[str]) -> List[str]:
+        """
+        Run the tool on several snippets, preserving input order.
+        
+        All valid snippets are modernized by a single pyupgrade invocation, so
+        interpreter startup is paid once per batch instead of once per snippet.
+        """
         try:
-            # Validate input
-            if not code or not isinstance(code, str):
-                return "❌ Error: Invalid input. Please provide Python code as a string."
-            
-            code = code.strip()
-            if not code:
-                return "❌ Error: Empty code provided."
-            
-            # Validate Python syntax
-            try:
-                ast.parse(code)
-            except SyntaxError as e:
-                return f"❌ Error: Invalid Python syntax: {e}"
+            results: List[Optional[str]] = [None] * len(codes)
+            pending = []
+            # The in-process fixers parse the code themselves, so the check is deferred
+            in_process = self._fixers is not None
+            for i, code in enumerate(codes):
+                code, error = self._validate_code(code, check_syntax=not in_process)
+                if error:
+                    results[i] = error
+                else:
+                    pending.append((i, code))
             
-            # Check if pyupgrade is available
-            if not self._check_pyupgrade_available():
+            if pending and not in_process and not self._check_pyupgrade_available():
                 logger.warning("pyupgrade not found, using fallback method")
-                return self._pattern_based_fallback(code)
-            
-            # Run pyupgrade
-            updated_code, was_changed, error_msg = self._run_pyupgrade_on_code(code)
-            
-            if error_msg:
-                return f"❌ Error: {error_msg}"
+                for i, code in pending:
+                    results[i] = self._pattern_based_fallback(code)
+            elif pending:
+                outcomes = self._run_pyupgrade_on_codes([code for _, code in pending])
+                for (i, code), outcome in zip(pending, outcomes):
+                    results[i] = self._format_result(code, *outcome)
             
-            if was_changed:
-                return f"""� PyUpgrade Modernization Complete
-
-Target Version: Python {self.target_version}
-
-📝 Modernized Code:
-```python
-{updated_code}
-```
-
-✅ Code has been successfully modernized using pyupgrade tool."""
-            else:
-                return f"""� PyUpgrade Analysis Complete - No changes needed
-
-Target Version: Python {self.target_version}
-
-The code is already using modern Python {self.target_version} syntax patterns.
-
-📝 Original code:
-```python
-{code}
-```"""
+            return results
                 
         except Exception as e:
             logger.error(f"PyUpgrade tool error: {e}")
-            return f"❌ Error during code modernization: {str(e)}"
+            return [f"❌ Error during code modernization: {str(e)}"] * len(codes)
+    
+    def run_many(self, codes: List[str]) -> List[str]:
+        """
+        Modernize many independent snippets in parallel, preserving input order.
+        
+        The snippets are split into one contiguous chunk per worker, and each
+        worker process modernizes its chunk as a single batch. The process pool
+        is created on first use, sized to the batch, and reused by later calls
+        until close() shuts it down. Small batches run in-process.
+        
+        Args:
+            codes: Python code snippets to modernize
+        
+        Returns:
+            List of modernization results as formatted strings
+        """
+        workers = min(os.cpu_count() or 1, len(codes))
+        if workers <= 1 or len(codes) < _PARALLEL_MIN_SNIPPETS:
+            return self._run_batch(codes)
+        
+        if self._pool_workers < workers:
+            # Grow the pool to this batch; a smaller earlier batch sized it
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            self._pool_workers = workers
+        
+        size = -(-len(codes) // workers)
+        chunks = [codes[start:start + size] for start in range(0, len(codes), size)]
+        try:
+            futures = [self._pool.submit(_run_chunk, self.target_version, chunk) for chunk in chunks]
+            return [result for future in futures for result in future.result()]
+        except Exception as e:
+            # A broken pool (e.g. a killed worker) is dropped and the batch runs here
+            logger.warning(f"PyUpgrade process pool failed ({e}), running in-process")
+            self.close()
+            return self._run_batch(codes)
+    
+    def close(self):
+        """Shut down the run_many worker processes; a later call starts a new pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_workers = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _run(self, code: str, **kwargs) -> str:
+        """Run the PyUpgrade tool on the provided code"""
+        return self._run_batch([code])[0]
 
     def run(self, code: str, target_version: str = None, **kwargs) -> str:
         """
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Token Scanner - Python 2/3 Marker Detection
+
+Detects Python 2 and 2/3 compatibility markers with a single tokenize pass.
+Unlike regex scans, string literals and comments are never matched, so code
+that merely mentions "print x" or contains a path like "a/b" in a string is
+not flagged.
+"""
+
+import io
+import keyword
+import mmap
+import os
+import tokenize
+from typing import Optional, Set, Tuple
+
+# Tokens that carry no information for marker detection
+_SKIPPED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING}
+
+# Builtins whose call marks Python 2 (or 2/3-sensitive) code
+_BUILTIN_CALL_MARKERS = {
+    'xrange': 'xrange',
+    'raw_input': 'raw_input',
+    'unicode': 'unicode_literals',
+    'str': 'string_types',
+}
+
+# Modules that only exist under Python 2
+_MODULE_MARKERS = {
+    'urllib2': 'imports_urllib2',
+    'ConfigParser': 'imports_configparser',
+    'cPickle': 'imports_cpickle',
+    '__builtin__': 'imports_builtin',
+}
+
+_PY2_DICT_METHODS = {'iterkeys', 'itervalues', 'iteritems'}
+_DICT_VIEW_METHODS = {'keys', 'values', 'items'}
+
+# Keywords that may legitimately start the operand of a print statement
+_PRINT_OPERAND_KEYWORDS = {'None', 'True', 'False', 'not', 'lambda'}
+
+
+def _is_print_operand(tok: tokenize.TokenInfo) -> bool:
+    """Check whether a token following 'print' makes it a Python 2 print statement"""
+    if tok.type in (tokenize.STRING, tokenize.NUMBER):
+        return True
+    if tok.type == tokenize.NAME:
+        return not keyword.iskeyword(tok.string) or tok.string in _PRINT_OPERAND_KEYWORDS
+    return tok.type == tokenize.OP and tok.string == '>>'
+
+
+def scan_compat_markers(code: str) -> Optional[Set[str]]:
+    """
+    Detect Python 2/3 compatibility markers in a single tokenize pass.
+
+    Markers: print_statement, exception_syntax, division, xrange, raw_input,
+    unicode_literals, string_types, dict_methods (.iter*()), dict_views
+    (.keys()/.values()/.items()) and imports_* for Python 2 only modules.
+
+    Returns:
+        Set of detected marker names, or None if the code could not be tokenized
+    """
+    try:
+        tokens = [
+            tok for tok in tokenize.generate_tokens(io.StringIO(code).readline)
+            if tok.type not in _SKIPPED_TOKENS
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+    markers = set()
+    statement = None  # First token of the current logical line
+    depth = 0
+    prev = None
+
+    for i, tok in enumerate(tokens):
+        if tok.type == tokenize.NEWLINE:
+            statement, depth, prev = None, 0, None
+            continue
+
+        if statement is None:
+            statement = tok.string
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if tok.type == tokenize.OP:
+            op = tok.string
+            if op in ('(', '[', '{'):
+                depth += 1
+            elif op in (')', ']', '}'):
+                depth -= 1
+            elif op in ('/', '/='):
+                markers.add('division')
+            elif op == ',' and statement == 'except' and depth == 0:
+                markers.add('exception_syntax')
+
+        elif tok.type == tokenize.NAME:
+            name = tok.string
+            is_attribute = prev is not None and prev.string == '.'
+            is_call = nxt is not None and nxt.string == '('
+
+            if is_attribute:
+                if is_call and name in _PY2_DICT_METHODS:
+                    markers.add('dict_methods')
+                elif (is_call and name in _DICT_VIEW_METHODS
+                      and i + 2 < len(tokens) and tokens[i + 2].string == ')'):
+                    markers.add('dict_views')
+            elif name == 'print':
+                if nxt is not None and _is_print_operand(nxt):
+                    markers.add('print_statement')
+            elif name in _BUILTIN_CALL_MARKERS:
+                if is_call:
+                    markers.add(_BUILTIN_CALL_MARKERS[name])
+            elif name in _MODULE_MARKERS and statement in ('import', 'from'):
+                markers.add(_MODULE_MARKERS[name])
+
+        prev = tok
+
+    return markers
+
+
+def read_source_if_marked(path: str, markers: Tuple[bytes, ...]) -> Optional[str]:
+    """
+    Memory-map a source file and decode it only if it contains one of the byte markers.
+
+    Clean files are checked straight from the page cache and never decoded into a str.
+
+    Returns:
+        The decoded source, or None if the file is empty or contains no marker
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not any(mm.find(marker) != -1 for marker in markers):
+                return None
+            return mm[:].decode('utf-8')
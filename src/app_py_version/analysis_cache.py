@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache - Persistent Results for the Version Analyzer
+
+Stores per-file syntax scan results and LLM analysis responses in a single
+SQLite file, keyed by a SHA-256 digest of the inputs that produced them, so
+unchanged files and identical prompts skip all work on later runs. Values are
+JSON text, never pickles, so a shared cache file cannot execute code.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds a writer waits for another process holding the database lock
+_BUSY_TIMEOUT = 10.0
+
+
+def make_key(*parts: Union[str, bytes]) -> bytes:
+    """Build a cache key from the inputs of a cached computation."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.digest()
+
+
+class AnalysisCache:
+    """SQLite-backed key/value store for analyzer results"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        try:
+            row = self._conn.execute("SELECT value FROM analysis WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Analysis cache read failed: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: bytes, value: Any):
+        """Store a JSON-serializable value under key."""
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"Analysis cache write failed: {e}")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
@@ -12,7 +12,8 @@ Usage:
 
 import argparse
 import sys
-import json
+from collections import Counter
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional
 import logging
@@ -32,9 +33,8 @@ except ImportError as e:
     sys.exit(1)
 
 
-def print_banner():
-    """Print welcome banner"""
-    banner = """
+# Welcome banner shown at the start of every command
+_BANNER = """
 ╔═══════════════════════════════════════════════════════════════╗
 ║                🐍 AI-Powered Python Version Analyzer          ║
 ║                                                               ║
@@ -42,74 +42,116 @@ def print_banner():
 ║  migration issues using advanced AI technology               ║
 ╚═══════════════════════════════════════════════════════════════╝
     """
-    print(banner)
+
+# Usage examples appended to the top-level --help output
+_EPILOG = """
+Examples:
+  python cli.py analyze .                          # Analyze current directory
+  python cli.py analyze /path/to/project          # Analyze specific project
+  python cli.py analyze . --target-version 3.11   # Set target version
+  python cli.py analyze . --detailed              # Show detailed issues
+  python cli.py analyze . --output my_report.json # Custom output file
+
+The analyzer will:
+  1. 🔍 Detect your current Python version
+  2. 🤖 Use AI to identify migration issues  
+  3. ⚖️ Assess migration risk and effort
+  4. 💡 Provide actionable recommendations
+        """
+
+# Marker shown next to each issue severity
+_SEVERITY_EMOJI = {
+    'critical': '🔴',
+    'major': '🟡',
+    'minor': '🟢',
+    'info': 'ℹ️'
+}
+
+# Marker shown next to the overall migration risk
+_RISK_EMOJI = {
+    'low': '✅',
+    'medium': '⚠️',
+    'high': '🚨',
+    'very_high': '🔥'
+}
+
+# Issue fields read by the detailed listing, fetched in one C-level call
+_ISSUE_FIELDS = attrgetter(
+    'severity', 'description', 'file_path', 'line_number', 'issue_type',
+    'ai_confidence', 'code_snippet', 'suggested_fix', 'explanation'
+)
+
+
+def print_banner():
+    """Print welcome banner"""
+    print(_BANNER)
 
 
 def print_analysis_summary(result: AnalysisResult):
     """Print a beautiful summary of the analysis results"""
-    print("\n" + "="*70)
-    print("📊 ANALYSIS SUMMARY")
-    print("="*70)
+    # Lines are buffered and written once, instead of one flushed print per line
+    buf = ["\n" + "="*70, "📊 ANALYSIS SUMMARY", "="*70]
     
     # Project Info
-    print(f"📁 Project: {Path(result.project_path).name}")
-    print(f"📄 Files analyzed: {result.total_files_analyzed}")
-    print(f"⏰ Analysis time: {result.analysis_timestamp}")
+    buf.append(f"📁 Project: {Path(result.project_path).name}")
+    buf.append(f"📄 Files analyzed: {result.total_files_analyzed}")
+    buf.append(f"⏰ Analysis time: {result.analysis_timestamp}")
     
     # Version Info
-    print(f"\n🔍 VERSION ANALYSIS:")
     current = result.current_version
-    print(f"   Current version: {current.detected_version or 'Unknown'}")
-    print(f"   Minimum required: {current.minimum_version or 'Unknown'}")
-    print(f"   AI recommended: {current.recommended_version or 'Unknown'}")
-    print(f"   Target version: {result.target_version}")
-    print(f"   Detection confidence: {current.confidence_score:.1%}")
+    buf.extend([
+        f"\n🔍 VERSION ANALYSIS:",
+        f"   Current version: {current.detected_version or 'Unknown'}",
+        f"   Minimum required: {current.minimum_version or 'Unknown'}",
+        f"   AI recommended: {current.recommended_version or 'Unknown'}",
+        f"   Target version: {result.target_version}",
+        f"   Detection confidence: {current.confidence_score:.1%}",
+    ])
     
     # Issues Summary
-    print(f"\n🚨 MIGRATION ISSUES:")
+    # One pass counts every severity and keeps the first critical issues for the top list
     issues = result.migration_issues
-    critical = len([i for i in issues if i.severity == 'critical'])
-    major = len([i for i in issues if i.severity == 'major'])
-    minor = len([i for i in issues if i.severity == 'minor'])
-    info = len([i for i in issues if i.severity == 'info'])
+    counts = Counter()
+    critical_issues = []
+    for issue in issues:
+        counts[issue.severity] += 1
+        if issue.severity == 'critical' and len(critical_issues) < 3:
+            critical_issues.append(issue)
+    critical, major, minor, info = counts['critical'], counts['major'], counts['minor'], counts['info']
     
-    print(f"   🔴 Critical: {critical}")
-    print(f"   🟡 Major: {major}")
-    print(f"   🟢 Minor: {minor}")
-    print(f"   ℹ️  Info: {info}")
-    print(f"   📊 Total: {len(issues)}")
+    buf.extend([
+        f"\n🚨 MIGRATION ISSUES:",
+        f"   🔴 Critical: {critical}",
+        f"   🟡 Major: {major}",
+        f"   🟢 Minor: {minor}",
+        f"   ℹ️  Info: {info}",
+        f"   📊 Total: {len(issues)}",
+    ])
     
     # Risk Assessment
     risk = result.risk_assessment
-    risk_emoji = {
-        'low': '✅',
-        'medium': '⚠️',
-        'high': '🚨',
-        'very_high': '🔥'
-    }
-    
     overall_risk = risk.get('overall_risk', 'unknown')
-    print(f"\n⚖️ RISK ASSESSMENT:")
-    print(f"   Overall risk: {risk_emoji.get(overall_risk, '❓')} {overall_risk.upper()}")
-    print(f"   Estimated effort: {risk.get('estimated_effort', 'unknown').upper()}")
+    buf.extend([
+        f"\n⚖️ RISK ASSESSMENT:",
+        f"   Overall risk: {_RISK_EMOJI.get(overall_risk, '❓')} {overall_risk.upper()}",
+        f"   Estimated effort: {risk.get('estimated_effort', 'unknown').upper()}",
+    ])
     
     # Top Issues
     if critical > 0:
-        print(f"\n🔴 TOP CRITICAL ISSUES:")
-        critical_issues = [i for i in issues if i.severity == 'critical'][:3]
+        buf.append(f"\n🔴 TOP CRITICAL ISSUES:")
         for i, issue in enumerate(critical_issues, 1):
-            print(f"   {i}. {issue.description}")
-            print(f"      📁 {issue.file_path}:{issue.line_number}")
+            buf.extend([f"   {i}. {issue.description}", f"      📁 {issue.file_path}:{issue.line_number}"])
     
     # Recommendations
-    print(f"\n💡 KEY RECOMMENDATIONS:")
-    for i, rec in enumerate(result.recommendations[:5], 1):
-        print(f"   {i}. {rec}")
+    buf.append(f"\n💡 KEY RECOMMENDATIONS:")
+    buf.extend(f"   {i}. {rec}" for i, rec in enumerate(result.recommendations[:5], 1))
     
     if len(result.recommendations) > 5:
-        print(f"   ... and {len(result.recommendations) - 5} more recommendations")
+        buf.append(f"   ... and {len(result.recommendations) - 5} more recommendations")
     
-    print("\n" + "="*70)
+    buf.append("\n" + "="*70)
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
 def print_detailed_issues(result: AnalysisResult, max_issues: int = 10):
@@ -119,40 +161,37 @@ def print_detailed_issues(result: AnalysisResult, max_issues: int = 10):
         print("✅ No migration issues found!")
         return
     
-    print(f"\n🔍 DETAILED ISSUE ANALYSIS (showing top {min(max_issues, len(issues))})")
-    print("="*70)
+    buf = [f"\n🔍 DETAILED ISSUE ANALYSIS (showing top {min(max_issues, len(issues))})", "="*70]
     
-    # Sort by severity
-    severity_order = {'critical': 0, 'major': 1, 'minor': 2, 'info': 3}
-    sorted_issues = sorted(issues, key=lambda x: (severity_order.get(x.severity, 4), -x.ai_confidence))
+    # Sort by severity, then by descending confidence (two stable C-level keyed sorts)
+    sorted_issues = sorted(issues, key=attrgetter('ai_confidence'), reverse=True)
+    sorted_issues.sort(key=attrgetter('_sev_rank'))
     
     for i, issue in enumerate(sorted_issues[:max_issues], 1):
-        severity_emoji = {
-            'critical': '🔴',
-            'major': '🟡', 
-            'minor': '🟢',
-            'info': 'ℹ️'
-        }
+        (severity, description, file_path, line_number, issue_type,
+         confidence, code_snippet, suggested_fix, explanation) = _ISSUE_FIELDS(issue)
+        buf.extend([
+            f"\n{i}. {_SEVERITY_EMOJI.get(severity, '❓')} {severity.upper()}: {description}",
+            f"   📁 File: {file_path}:{line_number}",
+            f"   🔧 Type: {issue_type}",
+            f"   🎯 Confidence: {confidence:.1%}",
+        ])
         
-        print(f"\n{i}. {severity_emoji.get(issue.severity, '❓')} {issue.severity.upper()}: {issue.description}")
-        print(f"   📁 File: {issue.file_path}:{issue.line_number}")
-        print(f"   🔧 Type: {issue.issue_type}")
-        print(f"   🎯 Confidence: {issue.ai_confidence:.1%}")
+        if code_snippet:
+            buf.append(f"   📝 Code:")
+            # Indent code snippet, showing max 3 lines
+            buf.extend(f"      {line}" for line in code_snippet.split('\n')[:3] if line.strip())
         
-        if issue.code_snippet:
-            print(f"   📝 Code:")
-            # Indent code snippet
-            for line in issue.code_snippet.split('\n')[:3]:  # Show max 3 lines
-                if line.strip():
-                    print(f"      {line}")
+        if suggested_fix:
+            buf.append(f"   💡 Suggested fix: {suggested_fix}")
         
-        if issue.suggested_fix:
-            print(f"   💡 Suggested fix: {issue.suggested_fix}")
-        
-        if issue.explanation:
+        if explanation:
             # Truncate long explanations
-            explanation = issue.explanation[:200] + "..." if len(issue.explanation) > 200 else issue.explanation
-            print(f"   📚 Explanation: {explanation}")
+            if len(explanation) > 200:
+                explanation = explanation[:200] + "..."
+            buf.append(f"   📚 Explanation: {explanation}")
+    
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
 def analyze_command(args):
@@ -209,20 +248,7 @@ def main():
     parser = argparse.ArgumentParser(
         description="AI-Powered Python Version Analyzer",
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  python cli.py analyze .                          # Analyze current directory
-  python cli.py analyze /path/to/project          # Analyze specific project
-  python cli.py analyze . --target-version 3.11   # Set target version
-  python cli.py analyze . --detailed              # Show detailed issues
-  python cli.py analyze . --output my_report.json # Custom output file
-
-The analyzer will:
-  1. 🔍 Detect your current Python version
-  2. 🤖 Use AI to identify migration issues  
-  3. ⚖️ Assess migration risk and effort
-  4. 💡 Provide actionable recommendations
-        """
+        epilog=_EPILOG
     )
     
     # Subcommands
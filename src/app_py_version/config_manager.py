@@ -17,15 +17,17 @@ Usage:
     load_app_config()     # Load only application settings
 """
 
+import functools
 import os
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Dict, Optional, Set
 import logging
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
 def get_project_root() -> Path:
-    """Get the project root directory."""
+    """Get the project root directory (searched for once per process)."""
     # Start from current file and go up to find project root
     current_path = Path(__file__).resolve()
     
@@ -37,6 +39,53 @@ def get_project_root() -> Path:
     # Fallback to parent of src directory
     return current_path.parent.parent
 
+# Environment files, lowest priority first: a later file's values win over an
+# earlier one's, and variables already set in the process environment win over all
+# file name -> (results key, description, message when missing, log level when missing)
+_ENV_FILES = {
+    ".env": ("legacy_loaded", "legacy config", "ℹ️ No legacy .env file found (this is normal)", logging.INFO),
+    ".env.config": ("config_loaded", "application config", "⚠️ Application config file not found: {path}", logging.WARNING),
+    ".env.keys": ("keys_loaded", "API keys", "⚠️ API keys file not found: {path}", logging.WARNING),
+}
+
+
+def _read_env_file(project_root: Path, filename: str,
+                   present: Optional[Set[str]] = None) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Parse one of the _ENV_FILES without touching os.environ; None if it does not exist.
+    
+    Args:
+        present: Names of the _ENV_FILES found in project_root, if already listed
+    """
+    _, description, missing_message, missing_level = _ENV_FILES[filename]
+    env_file = project_root / filename
+    if not (filename in present if present is not None else env_file.exists()):
+        logger.log(missing_level, missing_message.format(path=env_file))
+        return None
+    # Imported here so get_config_summary() and friends don't pay for dotenv
+    from dotenv import dotenv_values
+    values = dotenv_values(env_file)
+    logger.info(f"✅ Loaded {description} from {env_file}")
+    return values
+
+
+def _apply_env(values: Dict[str, Optional[str]]):
+    """Set parsed variables that are not already in the environment (as load_dotenv(override=False) does)."""
+    os.environ.update({
+        key: value for key, value in values.items()
+        if value is not None and key not in os.environ
+    })
+
+
+def _load_env_file(project_root: Optional[Path], filename: str) -> bool:
+    """Load one of the _ENV_FILES into the environment; False if it does not exist."""
+    values = _read_env_file(project_root or get_project_root(), filename)
+    if values is None:
+        return False
+    _apply_env(values)
+    return True
+
+
 def load_keys_config(project_root: Path = None) -> bool:
     """
     Load LLM API keys from .env.keys file.
@@ -47,18 +96,7 @@ def load_keys_config(project_root: Path = None) -> bool:
     Returns:
         bool: True if keys file was loaded successfully
     """
-    if project_root is None:
-        project_root = get_project_root()
-    
-    keys_file = project_root / ".env.keys"
-    
-    if keys_file.exists():
-        load_dotenv(keys_file, override=False)
-        logger.info(f"✅ Loaded API keys from {keys_file}")
-        return True
-    else:
-        logger.warning(f"⚠️ API keys file not found: {keys_file}")
-        return False
+    return _load_env_file(project_root, ".env.keys")
 
 def load_app_config(project_root: Path = None) -> bool:
     """
@@ -70,18 +108,7 @@ def load_app_config(project_root: Path = None) -> bool:
     Returns:
         bool: True if config file was loaded successfully
     """
-    if project_root is None:
-        project_root = get_project_root()
-    
-    config_file = project_root / ".env.config"
-    
-    if config_file.exists():
-        load_dotenv(config_file, override=False)
-        logger.info(f"✅ Loaded application config from {config_file}")
-        return True
-    else:
-        logger.warning(f"⚠️ Application config file not found: {config_file}")
-        return False
+    return _load_env_file(project_root, ".env.config")
 
 def load_legacy_config(project_root: Path = None) -> bool:
     """
@@ -93,28 +120,19 @@ def load_legacy_config(project_root: Path = None) -> bool:
     Returns:
         bool: True if legacy config file was loaded successfully
     """
-    if project_root is None:
-        project_root = get_project_root()
-    
-    legacy_file = project_root / ".env"
-    
-    if legacy_file.exists():
-        load_dotenv(legacy_file, override=False)
-        logger.info(f"✅ Loaded legacy config from {legacy_file}")
-        return True
-    else:
-        logger.info(f"ℹ️ No legacy .env file found (this is normal)")
-        return False
+    return _load_env_file(project_root, ".env")
 
 def load_config(project_root: Path = None) -> dict:
     """
     Load all configuration files in the correct order.
     
-    Priority order (later files don't override earlier ones):
+    Priority order (a variable set by a higher-priority file wins):
     1. .env.keys (API keys - highest priority)
     2. .env.config (application settings)
     3. .env (legacy fallback - lowest priority)
     
+    Variables already set in the process environment are never overridden.
+    
     Args:
         project_root: Path to project root. If None, will auto-detect.
         
@@ -133,20 +151,26 @@ def load_config(project_root: Path = None) -> dict:
         "legacy_loaded": False
     }
     
-    # Load in reverse priority order (load_dotenv with override=False 
-    # means first loaded values take precedence)
-    
-    # 3. Legacy .env (lowest priority)
-    results["legacy_loaded"] = load_legacy_config(project_root)
-    
-    # 2. Application config (medium priority)
-    results["config_loaded"] = load_app_config(project_root)
-    
-    # 1. API keys (highest priority)
-    results["keys_loaded"] = load_keys_config(project_root)
+    # The files are parsed into one dict, lowest priority first so higher-priority
+    # values replace them, and the environment is updated once
+    # One directory listing answers which files exist, instead of a stat per file
+    try:
+        with os.scandir(project_root) as entries:
+            present = {entry.name for entry in entries if entry.name in _ENV_FILES and entry.is_file()}
+    except OSError:
+        present = set()
+    
+    merged = {}
+    for filename, (result_key, *_) in _ENV_FILES.items():
+        values = _read_env_file(project_root, filename, present)
+        if values is not None:
+            merged.update(values)
+            results[result_key] = True
+    _apply_env(merged)
     
     # Validate critical configuration
     validate_config()
+    invalidate_config_summary()
     
     logger.info("✅ Configuration loading complete!")
     return results
@@ -170,7 +194,15 @@ def validate_config():
 
 def get_config_summary() -> dict:
     """Get a summary of current configuration values."""
-    
+    return dict(_config_summary_cached())
+
+def invalidate_config_summary():
+    """Drop the cached summary after changing configuration environment variables."""
+    _config_summary_cached.cache_clear()
+
+@functools.lru_cache(maxsize=1)
+def _config_summary_cached() -> dict:
+    """Read and cast the configuration environment variables once."""
     # Safely get config values (don't expose API keys)
     return {
         "target_python_version": os.getenv("TARGET_PYTHON_VERSION", "3.11"),
@@ -6,22 +6,37 @@ This module takes the LLM analysis output and automatically executes migration t
 in an iterative process until the project compiles successfully or max iterations reached.
 """
 
+import ast
+import asyncio
+import functools
+import hashlib
 import json
+import os
 import subprocess
+import sys
 import tempfile
 import shutil
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 import logging
 import re
 
+try:
+    # google-re2: optional linear-time regex engine
+    import re2
+except ImportError:
+    re2 = None
+
 from langchain.agents import initialize_agent, AgentExecutor, create_react_agent
 from langchain.agents import AgentType
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain.memory import ConversationBufferMemory
 from langchain import hub
+from langchain_core.callbacks import AsyncCallbackHandler
 
 from app_py_version.ai_tools import PyUpgradeTool, Python2To3Tool, ModernizeTool
 from app_py_version.version_analyzer import AnalysisResult
@@ -29,6 +44,300 @@ from app_py_version.prompt_library import PromptLibrary
 
 logger = logging.getLogger(__name__)
 
+# Code block in a tool result; matched with re2 when installed, so large tool
+# outputs are scanned in linear time
+_CODE_BLOCK_RE = (re2 or re).compile(r"(?s)```python\n(.*?)\n```")
+# Looser form: any line opening a python fence, up to a line holding only the
+# closing fence or the end of the result (needs a lookahead, which re2 lacks)
+_CODE_BLOCK_RE_LOOSE = re.compile(
+    r"^[^\S\n]*```python[^\n]*\n(.*?)(?=^[^\S\n]*```[^\S\n]*$|\Z)", re.DOTALL | re.MULTILINE
+)
+
+# Emoji ranges stripped by safe_print when the console cannot encode them
+_EMOJI_RE = re.compile("["
+                       u"\U0001F600-\U0001F64F"  # emoticons
+                       u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+                       u"\U0001F680-\U0001F6FF"  # transport & map symbols
+                       u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+                       u"\U00002702-\U000027B0"
+                       u"\U000024C2-\U0001F251"
+                       "]+", flags=re.UNICODE)
+
+# Heuristic line classification for agent output without code fences; each is
+# one alternation scan per line instead of a substring scan per keyword
+_CODE_START_PATTERN = re.compile('|'.join(re.escape(indicator) for indicator in (
+    '#!/usr/bin/env python', 'def ', 'class ', 'import ', 'from '
+)))
+_CODE_KEYWORD_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in (
+    'if ', 'else:', 'elif ', 'for ', 'while ', 'try:', 'except', 'finally:', 'with ',
+    'return', 'yield', 'pass', 'break', 'continue'
+)))
+_PROSE_MARKER_PATTERN = re.compile('|'.join(re.escape(char) for char in ('*', '-', '✅', '🔧', '⚠️', '#')))
+
+# Substrings hinting at Python 2 code, checked in a single scan
+_PY2_HINT_PATTERN = re.compile('|'.join(re.escape(hint) for hint in (
+    'print ', 'raw_input', 'urllib2', 'ConfigParser', 'cPickle', 'except ', ', e:'
+)))
+
+# Compilation error text pointing at Python 2 code
+_PY2_ERROR_PATTERN = re.compile(r'print|raw_input')
+
+# Below this many files compiling in-process beats starting worker processes
+_PARALLEL_COMPILE_MIN_FILES = 32
+
+# Agents shared by every MigrationExecutor in the process, keyed by LLM instance,
+# streaming and the tool types and target versions; agents carry no memory, so
+# nothing from one executor's runs reaches another. Values keep the LLM alive so
+# its id is not reused while the entry exists.
+_AGENT_CACHE: Dict[tuple, Tuple[Any, AgentExecutor]] = {}
+
+# On-disk cache of tool outputs, bounded by dropping the oldest entries; bump the
+# version when tool output formats change so stale entries are not served
+_TOOL_CACHE_MAX_ENTRIES = 10_000
+_TOOL_CACHE_VERSION = 1
+
+# Threads used to overlap file reads and writes
+_IO_WORKERS = 16
+
+# Compilation results kept across iterations, keyed by file and content digest
+_COMPILE_CACHE_SIZE = 10_000
+
+
+def _collect_action_inputs(obj: Any, found: List[str]):
+    """Append every string action_input value in a decoded JSON value, depth first."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "action_input" and isinstance(value, str):
+                found.append(value)
+            else:
+                _collect_action_inputs(value, found)
+    elif isinstance(obj, list):
+        for value in obj:
+            _collect_action_inputs(value, found)
+
+
+def _iter_json_objects(text: str):
+    """
+    Yield the complete JSON objects embedded in text.
+    
+    Objects are decoded with JSONDecoder.raw_decode starting at each '{'; a
+    successfully decoded object is skipped over as a whole, so valid JSON is
+    read in a single linear pass.
+    """
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+    while start != -1:
+        try:
+            obj, end = decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find('{', start + 1)
+            continue
+        yield obj
+        start = text.find('{', end)
+
+
+def _iter_action_inputs(text: str):
+    """Yield the decoded action_input strings of the JSON objects embedded in text."""
+    for obj in _iter_json_objects(text):
+        found = []
+        _collect_action_inputs(obj, found)
+        yield from found
+
+
+def _iter_code_fences(text: str):
+    """
+    Yield (language tag, body) for every closed ``` code fence in text.
+    
+    The text is scanned once from left to right with str.find; the tag is the
+    lower-cased rest of the opening fence line. Inline fences such as
+    ```python x = 1``` have no newline, so a leading "python" is the tag.
+    """
+    start = text.find("```")
+    while start != -1:
+        close = text.find("```", start + 3)
+        if close == -1:
+            return
+        header_end = text.find("\n", start + 3, close)
+        if header_end == -1:
+            body = text[start + 3:close]
+            if body[:6].lower() == "python":
+                yield "python", body[6:]
+            else:
+                yield "", body
+        else:
+            yield text[start + 3:header_end].strip().lower(), text[header_end + 1:close]
+        start = text.find("```", close + 3)
+
+
+def _content_key(code: str) -> bytes:
+    """Digest identifying a file's contents, used to process duplicate files once."""
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=16).digest()
+
+
+def _read_source(path: Path) -> Union[str, Exception]:
+    """Read a source file, returning the error instead of raising it."""
+    try:
+        return path.read_text(encoding='utf-8')
+    except Exception as e:
+        return e
+
+
+def _write_source(item: Tuple[Path, str]) -> Optional[Exception]:
+    """
+    Write a file by atomically replacing it, returning the error instead of raising it.
+    
+    Replacing instead of truncating never changes other hard links to the file
+    (the working copy links to the original sources) and never leaves a
+    partially written file for a concurrent reader.
+    """
+    path, text = item
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        try:
+            shutil.copymode(path, tmp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except Exception as e:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return e
+    return None
+
+
+def _write_report(path: Path, text: str):
+    """Write a report with one binary write, keeping the newlines text mode would produce."""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    path.write_bytes(text.encode('utf-8'))
+
+
+def _scan_python_files(root: Union[str, Path]) -> List[str]:
+    """
+    List the .py files under root as relative paths, walking with os.scandir.
+    
+    Visits directories in the same order as Path.rglob("*.py") and, like it, does
+    not descend into symlinked directories, without building a Path per entry.
+    """
+    found = []
+    stack = [("", os.fspath(root))]
+    while stack:
+        rel_dir, path = stack.pop()
+        subdirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((rel, entry.path))
+                elif os.path.normcase(entry.name).endswith(".py") and not entry.is_dir():
+                    found.append(rel)
+        stack.extend(reversed(subdirs))
+    return found
+
+
+def _link_or_copy(src: str, dst: str):
+    """copytree copy function: hard link the file, copying it when linking is not possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _link_private_or_copy(src: str, dst: str):
+    """copytree copy function for finalization: hard link files the migration rewrote, copy the rest."""
+    # A working file with a single link was replaced by _write_source; any other file may
+    # still share its inode with the original source, which must never be edited through
+    # the final output
+    if os.stat(src).st_nlink == 1:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _compile_one(item: Tuple[str, str, Union[str, Exception]]) -> Optional[Dict[str, Any]]:
+    """
+    Compile one file's source; the process pool entry point for _attempt_compilation.
+    
+    Args:
+        item: (file name, path relative to the working directory, source or read error)
+    
+    Returns:
+        The file's error record, or None if it compiles
+    """
+    filename, rel_path, code = item
+    try:
+        if isinstance(code, Exception):
+            raise code
+        
+        # Use ast.parse to check for syntax errors; parsing alone skips code generation
+        ast.parse(code, filename)
+        
+    except SyntaxError as e:
+        return {
+            "file": rel_path,
+            "line": e.lineno,
+            "error": str(e),
+            "type": "syntax_error"
+        }
+        
+    except Exception as e:
+        return {
+            "file": rel_path,
+            "error": str(e),
+            "type": "compilation_error"
+        }
+    
+    return None
+
+
+def _has_final_answer(text: str) -> bool:
+    """
+    Check whether streamed agent text already holds the complete final answer.
+    
+    The structured chat agent answers with a JSON blob whose action_input holds
+    the code, so a code fence closing inside that string proves nothing; only a
+    JSON object that decodes completely with action "Final Answer" does.
+    """
+    if '"Final Answer"' not in text:
+        return False
+    return any(
+        isinstance(obj, dict) and obj.get("action") == "Final Answer"
+        for obj in _iter_json_objects(text)
+    )
+
+
+class _FinalAnswerCaptureHandler(AsyncCallbackHandler):
+    """
+    Watch the streamed tokens of an agent run and keep the text streamed up to
+    the moment the final-answer JSON blob is complete.
+    
+    Generation is never interrupted: the LLM cache only stores a generation
+    that ran to the end. The kept output stands in for the agent result when
+    the run fails or returns no code after the final answer has streamed.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.output: Optional[str] = None
+    
+    async def on_llm_start(self, *args, **kwargs):
+        self.text = ""
+    
+    async def on_chat_model_start(self, *args, **kwargs):
+        self.text = ""
+    
+    async def on_llm_new_token(self, token: str, **kwargs):
+        self.text += token
+        # A JSON object can only be complete after a closing brace
+        if self.output is None and '}' in token and _has_final_answer(self.text):
+            self.output = self.text
+
 
 class MigrationExecutor:
     """
@@ -36,25 +345,57 @@ class MigrationExecutor:
     The LLM decides which tools to use and how to use them.
     """
     
-    def __init__(self, max_iterations: int = 5, llm_manager=None):
+    def __init__(self, max_iterations: int = 5, llm_manager=None, max_concurrency: int = 10,
+                 use_llm_cache: bool = True, reuse_duplicate_prompts: bool = True,
+                 stream_agent_output: bool = True, triage_files: bool = True,
+                 escalate_to_advanced_model: bool = True, use_tool_cache: bool = True):
         self.max_iterations = max_iterations
         self.llm_manager = llm_manager
+        # Maximum number of files the agent works on at the same time
+        self.max_concurrency = max_concurrency
+        # Reuse responses to identical prompts across iterations and runs
+        self.use_llm_cache = use_llm_cache and os.getenv("ENABLE_LLM_CACHE", "true").lower() == "true"
+        # Reuse one agent run for files whose prompts match once the file name is removed
+        self.reuse_duplicate_prompts = reuse_duplicate_prompts
+        self._prompt_results: Dict[str, Any] = {}
+        # Stream agent tokens and keep the final answer once it is complete, so a run
+        # that fails afterwards still yields its code
+        self.stream_agent_output = stream_agent_output and os.getenv("STREAM_AGENT_OUTPUT", "true").lower() == "true"
+        # Files the migration tools alone leave compiling never reach the LLM
+        self.triage_files = triage_files and os.getenv("TRIAGE_MECHANICAL_FILES", "true").lower() == "true"
+        # Retry prompts the default model could not answer with valid code on the advanced model
+        self.escalate_to_advanced_model = (
+            escalate_to_advanced_model and os.getenv("ESCALATE_TO_ADVANCED_MODEL", "true").lower() == "true"
+        )
+        # Tool outputs cached on disk by content, shared across iterations and runs
+        self.tool_cache_dir: Optional[Path] = None
+        if use_tool_cache and os.getenv("ENABLE_TOOL_CACHE", "true").lower() == "true":
+            self.tool_cache_dir = Path(os.getenv("TOOL_CACHE_DIR", ".migration_tool_cache"))
+        # Fallback tool chain output per file content (None when nothing changed)
+        self._fallback_results: Dict[bytes, Optional[str]] = {}
+        # Error record (or None) per compiled file and content, so unchanged files
+        # are not compiled again in later iterations
+        self._compile_cache: "OrderedDict[Tuple[str, bytes], Optional[Dict[str, Any]]]" = OrderedDict()
+        # File reads and writes are spread over threads to overlap disk latency;
+        # started on first use and shut down at the end of a migration
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        # Compilation worker processes, started on first use and kept for the
+        # remaining iterations of a migration
+        self._compile_pool: Optional[ProcessPoolExecutor] = None
         
-        # Initialize LangChain tools (properly registered)
+        # Initialize LangChain tools (properly registered); the agent works on one
+        # file per prompt, so batches only go through the tools' _run_batch in the
+        # fallback path and no batch tool is offered to it
         self.tools = [
             PyUpgradeTool(),
             Python2To3Tool(), 
             ModernizeTool()
         ]
         
-        # Initialize memory for conversation
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
-        
         # Agent will be initialized when needed
         self.agent_executor = None
+        # Agent on the advanced model, only built when escalation is enabled
+        self.escalation_agent_executor = None
         
         self.migration_issues = []
         self.successful_fixes = []
@@ -68,27 +409,90 @@ class MigrationExecutor:
             logger.error("LLM Manager not available - cannot initialize agent")
             return
             
+        if self.use_llm_cache:
+            self._enable_llm_cache()
+            
         try:
             # Get the LLM instance
-            llm = self.llm_manager.get_llm()
-            
-            # Create agent with tools (use STRUCTURED_CHAT for multi-input tools)
-            self.agent_executor = initialize_agent(
-                tools=self.tools,
-                llm=llm,
-                agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
-                memory=self.memory,
-                verbose=True,
-                max_iterations=3,
-                handle_parsing_errors=True,
-                return_intermediate_steps=True
-            )
-            
+            self.agent_executor = self._create_agent(self.llm_manager.get_llm())
             logger.info(f"✅ LangChain agent initialized with {len(self.tools)} tools")
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize LangChain agent: {e}")
             self.agent_executor = None
+            return
+        
+        if self.escalate_to_advanced_model:
+            try:
+                provider_info = self.llm_manager.get_provider_info()
+                if provider_info["advanced_model"] != provider_info["default_model"]:
+                    self.escalation_agent_executor = self._create_agent(self.llm_manager.get_gpt4_llm())
+                    logger.info(f"✅ Escalation agent initialized ({provider_info['advanced_model']})")
+            except Exception as e:
+                logger.warning(f"⚠️ Escalation agent unavailable, continuing without it: {e}")
+                self.escalation_agent_executor = None
+    
+    def _create_agent(self, llm: Any) -> AgentExecutor:
+        """
+        Create a LangChain agent with the migration tools on the given LLM.
+        
+        Agents are cached per LLM instance and tool configuration across
+        executors, so later MigrationExecutor instances (CLI runs, tests, a
+        server) reuse the parsed prompt templates and the LLM's pooled HTTP client.
+        """
+        key = (
+            id(llm),
+            self.stream_agent_output,
+            tuple((type(tool), getattr(tool, "target_version", None)) for tool in self.tools),
+        )
+        cached = _AGENT_CACHE.get(key)
+        if cached is not None and cached[0] is llm:
+            logger.info("♻️ Reusing LangChain agent for this LLM")
+            return cached[1]
+        
+        agent_llm = llm
+        if self.stream_agent_output and hasattr(llm, "streaming"):
+            # Token callbacks only fire for streaming models; the LLM manager's instance
+            # is shared with the analyzer, so the agent streams on its own copy
+            # (model_copy on pydantic 2 models, copy on the pydantic 1 ones of langchain-core < 0.3)
+            copy = llm.model_copy if hasattr(llm, "model_copy") else llm.copy
+            agent_llm = copy(update={"streaming": True})
+        
+        # Create agent with tools (use STRUCTURED_CHAT for multi-input tools).
+        # No conversation memory: the per-file prompts run concurrently through
+        # abatch, and a shared memory would interleave their turns; each prompt
+        # already carries the file's code and errors
+        agent_executor = initialize_agent(
+            tools=self.tools,
+            llm=agent_llm,
+            agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
+            verbose=True,
+            max_iterations=3,
+            handle_parsing_errors=True,
+            return_intermediate_steps=True
+        )
+        _AGENT_CACHE[key] = (llm, agent_executor)
+        return agent_executor
+    
+    def _enable_llm_cache(self):
+        """Install a process-wide LLM cache: Redis when REDIS_URL is set, else SQLite."""
+        try:
+            from langchain_core.globals import set_llm_cache
+            
+            redis_url = os.getenv("REDIS_URL")
+            if redis_url:
+                import redis
+                from langchain_community.cache import RedisCache
+                set_llm_cache(RedisCache(redis.Redis.from_url(redis_url)))
+                logger.info(f"✅ LLM cache enabled (Redis)")
+            else:
+                from langchain_community.cache import SQLiteCache
+                cache_path = os.getenv("LLM_CACHE_PATH", ".migration_llm_cache.db")
+                set_llm_cache(SQLiteCache(database_path=cache_path))
+                logger.info(f"✅ LLM cache enabled ({cache_path})")
+                
+        except Exception as e:
+            logger.warning(f"⚠️ LLM cache unavailable, continuing without it: {e}")
     
     def execute_migration(self, analysis_result: AnalysisResult, source_dir: Path, 
                          output_dir: Path) -> Dict[str, Any]:
@@ -112,7 +516,9 @@ class MigrationExecutor:
         working_dir = output_dir / "migrated_code"
         if working_dir.exists():
             shutil.rmtree(working_dir)
-        shutil.copytree(source_dir, working_dir)
+        # Files are hard linked rather than copied; every write replaces the file,
+        # so the sources are never modified through a link
+        shutil.copytree(source_dir, working_dir, copy_function=_link_or_copy)
         
         results = {
             "source_dir": str(source_dir),
@@ -129,30 +535,36 @@ class MigrationExecutor:
         # Initial LLM prompt with analysis results
         initial_prompt = self._create_initial_prompt(analysis_result)
         
-        # Execute iterative migration process
-        for iteration in range(1, self.max_iterations + 1):
-            logger.info(f"Starting iteration {iteration}/{self.max_iterations}")
-            
-            iteration_result = self._execute_iteration_with_agent(
-                iteration, working_dir, initial_prompt, analysis_result
-            )
-            
-            results["iterations"].append(iteration_result)
-            results["compilation_attempts"] += iteration_result.get("compilation_attempts", 0)
-            
-            # Check if compilation is successful
-            if iteration_result["compilation_status"] == "success":
-                results["final_status"] = "success"
-                logger.info(f"Migration completed successfully in iteration {iteration}")
-                break
+        # Execute iterative migration process; worker pools are released even
+        # when an iteration raises
+        try:
+            for iteration in range(1, self.max_iterations + 1):
+                logger.info(f"Starting iteration {iteration}/{self.max_iterations}")
                 
-            # Check if no progress was made
-            if iteration_result["fixes_applied"] == 0:
-                logger.warning(f"No fixes applied in iteration {iteration}, stopping")
-                break
+                iteration_result = self._execute_iteration_with_agent(
+                    iteration, working_dir, initial_prompt, analysis_result
+                )
                 
-        else:
-            results["final_status"] = "max_iterations_reached"
+                results["iterations"].append(iteration_result)
+                results["compilation_attempts"] += iteration_result.get("compilation_attempts", 0)
+                
+                # Check if compilation is successful
+                if iteration_result["compilation_status"] == "success":
+                    results["final_status"] = "success"
+                    logger.info(f"Migration completed successfully in iteration {iteration}")
+                    break
+                    
+                # Check if no progress was made
+                if iteration_result["fixes_applied"] == 0:
+                    logger.warning(f"No fixes applied in iteration {iteration}, stopping")
+                    break
+                    
+            else:
+                results["final_status"] = "max_iterations_reached"
+        finally:
+            self._close_compile_pool()
+            self._close_io_pool()
+            self.tools[0].close()  # PyUpgradeTool worker pool
             
         results["end_time"] = datetime.now().isoformat()
         results["successful_fixes"] = self.successful_fixes
@@ -187,8 +599,11 @@ class MigrationExecutor:
         }
         
         try:
+            # Walk and read the project once; every step below shares this snapshot
+            files = self._read_python_files(working_dir)
+            
             # First, try to compile the current state
-            compilation_result = self._attempt_compilation(working_dir)
+            compilation_result = self._attempt_compilation(working_dir, files)
             iteration_result["compilation_attempts"] += 1
             iteration_result["compilation_status"] = compilation_result["status"]
             
@@ -204,23 +619,27 @@ class MigrationExecutor:
                 logger.warning("Compilation failed but no specific errors found")
                 return iteration_result
             
-            # Use LangChain agent to fix the code
+            # Use LangChain agent to fix the code; the first iteration migrates
+            # every file when the analysis found issues, later iterations only
+            # revisit the files that still fail to compile
             if self.agent_executor:
+                full_scan = iteration == 1 and bool(analysis_result.migration_issues)
                 fixes_applied = self._execute_with_langchain_agent(
-                    working_dir, errors, iteration, iteration_result
+                    working_dir, errors, iteration, iteration_result, files, full_scan
                 )
             else:
                 # Fallback to manual orchestration
                 logger.warning("Agent not available, falling back to manual tool execution")
                 fixes_applied = self._execute_manual_fallback(
-                    working_dir, errors, iteration_result
+                    working_dir, errors, iteration_result, files
                 )
             
             iteration_result["fixes_applied"] = fixes_applied
             
             # Try compilation again after fixes
             if fixes_applied > 0:
-                final_compilation = self._attempt_compilation(working_dir)
+                # Modified files were refreshed in the snapshot, so nothing is re-read
+                final_compilation = self._attempt_compilation(working_dir, files)
                 iteration_result["compilation_attempts"] += 1
                 iteration_result["compilation_status"] = final_compilation["status"]
                 
@@ -238,286 +657,501 @@ class MigrationExecutor:
         iteration_result["end_time"] = datetime.now().isoformat()
         return iteration_result
     
+    def _read_python_files(self, working_dir: Path) -> Dict[Path, Union[str, Exception]]:
+        """
+        Read every Python file under the working directory in a single walk.
+        
+        Returns:
+            Mapping of file path to its contents, or to the error raised while reading it
+        """
+        return self._read_files(list(working_dir.rglob("*.py")))
+    
+    def _read_files(self, paths: List[Path]) -> Dict[Path, Union[str, Exception]]:
+        """Read the given files concurrently on the I/O pool."""
+        return dict(zip(paths, self._get_io_pool().map(_read_source, paths)))
+    
+    def _write_files(self, writes: List[Tuple[Path, str]]) -> List[Optional[Exception]]:
+        """Write (path, code) pairs concurrently on the I/O pool, returning each write's error."""
+        return list(self._get_io_pool().map(_write_source, writes))
+    
     def _execute_with_langchain_agent(self, working_dir: Path, errors: List[Dict], 
-                                    iteration: int, iteration_result: Dict) -> int:
+                                    iteration: int, iteration_result: Dict,
+                                    files: Optional[Dict[Path, Union[str, Exception]]] = None,
+                                    full_scan: bool = True) -> int:
         """Execute migration using LangChain agent to decide tool usage."""
         
+        if files is None:
+            files = self._read_python_files(working_dir)
+        try:
+            return asyncio.run(self._execute_with_langchain_agent_async(
+                working_dir, errors, iteration, iteration_result, files, full_scan
+            ))
+        except Exception as e:
+            logger.error(f"❌ Error in overall agent execution: {e}")
+            return 0
+    
+    async def _execute_with_langchain_agent_async(self, working_dir: Path, errors: List[Dict], 
+                                                iteration: int, iteration_result: Dict,
+                                                snapshot: Dict[Path, Union[str, Exception]],
+                                                full_scan: bool = True) -> int:
+        """
+        Run the agent on the Python files as one bounded-concurrency batch.
+        
+        Without full_scan only the files named by a compilation error are sent.
+        Files the agent or the fallback tools rewrite are re-read into the snapshot.
+        """
+        
+        broken = None
+        if not full_scan:
+            # Errors without a file (system errors) keep the full scan
+            broken = {working_dir / error["file"] for error in errors if "file" in error} or None
+        
+        # Group files with identical contents; the agent runs once per unique blob;
+        # unreadable files are skipped
+        groups: Dict[bytes, List[Path]] = defaultdict(list)
+        files = []
+        for py_file, original_code in snapshot.items():
+            if broken is not None and py_file not in broken:
+                continue
+            if isinstance(original_code, Exception):
+                logger.error(f"❌ Error reading/processing {py_file.name}: {original_code}")
+                continue
+            key = _content_key(original_code)
+            if key not in groups:
+                files.append((py_file, original_code))
+            groups[key].append(py_file)
+        
+        if not files:
+            return 0
+        
+        # Only the files that were written need reading again
+        modified: List[Path] = []
         fixes_applied = 0
+        if self.triage_files:
+            mechanical = await asyncio.to_thread(self._triage_mechanical_files, files)
+            # Files the tools changed get the tool output; the rest already compile
+            changed = [
+                (path, original_code)
+                for py_file, original_code in files
+                if mechanical.get(_content_key(original_code)) is not None
+                for path in groups[_content_key(original_code)]
+            ]
+            applied = await asyncio.to_thread(self._apply_fallback_tools_batch, changed)
+            for (path, _), fixed in zip(changed, applied):
+                if fixed:
+                    modified.append(path)
+                    fixes_applied += 1
+                    iteration_result["tools_used"].append({
+                        "tool": "mechanical_triage",
+                        "file": path.name,
+                        "status": "success"
+                    })
+            files = [(py_file, code) for py_file, code in files if _content_key(code) not in mechanical]
+            logger.info(f"🔧 Migration tools handled {len(mechanical)} unique files without the LLM")
+            if not files:
+                snapshot.update(await asyncio.to_thread(self._read_files, modified))
+                return fixes_applied
         
-        try:
-            # Get Python files from working directory
-            python_files = list(working_dir.rglob("*.py"))
+        # Create one agent prompt per file; files whose prompts only differ in the
+        # file name share one agent run
+        errors_by_name: Dict[str, List[Dict]] = defaultdict(list)
+        for error in errors:
+            errors_by_name[os.path.basename(error.get("file", ""))].append(error)
+        prompts = [
+            self._create_agent_prompt_for_file(
+                py_file, original_code, errors_by_name.get(py_file.name, []), iteration
+            )
+            for py_file, original_code in files
+        ]
+        keys = [
+            self._normalize_prompt(prompt, py_file) if self.reuse_duplicate_prompts else prompt
+            for (py_file, _), prompt in zip(files, prompts)
+        ]
+        unique = {}
+        for key, prompt in zip(keys, prompts):
+            if key not in self._prompt_results:
+                unique.setdefault(key, prompt)
+        
+        logger.info(f"🤖 Agent analyzing {len(files)} files ({len(unique)} unique prompts, "
+                    f"max {self.max_concurrency} at a time)...")
+        if unique:
+            pending_prompts = list(unique.values())
+            batch_results = await self._run_agent_batch(self.agent_executor, pending_prompts)
             
-            for py_file in python_files:
-                try:
-                    with open(py_file, 'r', encoding='utf-8') as f:
-                        original_code = f.read()
-                    
-                    # Create agent prompt for this file
-                    agent_prompt = self._create_agent_prompt_for_file(
-                        py_file, original_code, errors, iteration
+            if self.escalation_agent_executor is not None:
+                # Prompts the default model could not answer with valid code go to the advanced model
+                retry = [i for i, result in enumerate(batch_results) if self._agent_result_code(result) is None]
+                if retry:
+                    logger.info(f"🔁 Escalating {len(retry)} prompts to the advanced model")
+                    retried = await self._run_agent_batch(
+                        self.escalation_agent_executor, [pending_prompts[i] for i in retry]
                     )
-                    
-                    # Let the agent decide which tools to use and how
-                    logger.info(f"🤖 Agent analyzing {py_file.name}...")
-                    
-                    try:
-                        result = self.agent_executor.invoke({
-                            "input": agent_prompt
-                        })
-                        
-                        # Extract the modified code from agent result
-                        if "output" in result:
-                            agent_output = result["output"]
-                            logger.debug(f"🔍 Raw agent output for {py_file.name}: {agent_output[:500]}...")
-                            
-                            modified_code = self._extract_code_from_agent_output(agent_output)
-                            
-                            if modified_code and modified_code != original_code:
-                                # Validate the modified code
-                                if self._validate_python_code(modified_code):
-                                    with open(py_file, 'w', encoding='utf-8') as f:
-                                        f.write(modified_code)
-                                    fixes_applied += 1
-                                    logger.info(f"✅ Agent successfully modified {py_file.name}")
-                                    
-                                    # Track tools used (from intermediate steps)
-                                    if "intermediate_steps" in result:
-                                        for step in result["intermediate_steps"]:
-                                            if len(step) >= 2:
-                                                action, observation = step
-                                                tool_name = getattr(action, 'tool', 'unknown')
-                                                iteration_result["agent_steps"].append({
-                                                    "tool": tool_name,
-                                                    "file": py_file.name,
-                                                    "action": str(action),
-                                                    "observation": str(observation)[:200]  # Truncate for readability
-                                                })
-                                else:
-                                    logger.warning(f"⚠️ Agent produced invalid Python code for {py_file.name}")
-                                    logger.debug(f"🔍 Invalid code: {modified_code[:200]}...")
-                            else:
-                                logger.info(f"ℹ️ No changes made to {py_file.name}")
-                                if not modified_code:
-                                    logger.debug(f"🔍 No code extracted from: {agent_output[:300]}...")
-                                    # Try fallback if agent completed but we couldn't extract code
-                                    logger.info(f"🔧 Agent completed but code extraction failed, trying fallback for {py_file.name}")
-                                    if self._apply_fallback_tools(py_file, original_code):
-                                        fixes_applied += 1
-                                        logger.info(f"✅ Fallback tool application succeeded for {py_file.name}")
-                                        iteration_result["tools_used"].append({
-                                            "tool": "fallback_after_agent",
-                                            "file": py_file.name,
-                                            "status": "success"
-                                        })
-                        else:
-                            logger.warning(f"⚠️ No output received from agent for {py_file.name}")
-                            logger.debug(f"🔍 Full result keys: {result.keys()}")
-                            # Try fallback when no output received
-                            logger.info(f"🔧 No agent output received, trying fallback for {py_file.name}")
-                            if self._apply_fallback_tools(py_file, original_code):
-                                fixes_applied += 1
-                                logger.info(f"✅ Fallback tool application succeeded for {py_file.name}")
-                                iteration_result["tools_used"].append({
-                                    "tool": "fallback_no_output",
-                                    "file": py_file.name,
-                                    "status": "success"
-                                })
-                            
-                    except Exception as e:
-                        logger.error(f"❌ Error processing {py_file.name} with agent: {e}")
-                        # If agent fails, try manual tool application as fallback
-                        logger.info(f"🔧 Attempting manual tool application for {py_file.name}")
-                        if self._apply_fallback_tools(py_file, original_code):
-                            fixes_applied += 1
-                            logger.info(f"✅ Manual tool application succeeded for {py_file.name}")
-                            iteration_result["tools_used"].append({
-                                "tool": "fallback_tools",
-                                "file": py_file.name,
-                                "status": "success"
-                            })
-                
-                except Exception as e:
-                    logger.error(f"❌ Error reading/processing {py_file.name}: {e}")
-                    continue
+                    for i, result in zip(retry, retried):
+                        if self._agent_result_code(result) is not None:
+                            batch_results[i] = result
             
-        except Exception as e:
-            logger.error(f"❌ Error in overall agent execution: {e}")
+            for key, result in zip(unique, batch_results):
+                self._prompt_results[key] = result
         
-        return fixes_applied
+        results = [self._prompt_results[key] for key in keys]
+        # Failed runs are retried next time instead of being replayed
+        for key in unique:
+            if isinstance(self._prompt_results[key], Exception):
+                del self._prompt_results[key]
+        
+        targets = [
+            (path, original_code, result)
+            for (py_file, original_code), result in zip(files, results)
+            for path in groups[_content_key(original_code)]
+        ]
+        # Files the agent could not fix are queued and sent through the
+        # fallback tools together once every result has been applied
+        fallbacks: List[Tuple[Path, str, str]] = []
+        fixes = await asyncio.gather(*[
+            self._apply_agent_result(path, original_code, result, iteration_result, fallbacks)
+            for path, original_code, result in targets
+        ])
+        
+        modified.extend(path for (path, _, _), fixed in zip(targets, fixes) if fixed)
+        if fallbacks:
+            applied = await asyncio.to_thread(
+                self._apply_fallback_tools_batch, [(path, code) for path, code, _ in fallbacks]
+            )
+            for (path, _, tool), fixed in zip(fallbacks, applied):
+                if fixed:
+                    modified.append(path)
+                    logger.info(f"✅ Fallback tool application succeeded for {path.name}")
+                    iteration_result["tools_used"].append({
+                        "tool": tool,
+                        "file": path.name,
+                        "status": "success"
+                    })
+            fixes.extend(applied)
+        snapshot.update(await asyncio.to_thread(self._read_files, modified))
+        return fixes_applied + sum(fixes)
     
-    def _apply_fallback_tools(self, py_file: Path, original_code: str) -> bool:
-        """Apply tools manually as fallback when agent fails."""
+    async def _run_agent_batch(self, agent_executor: AgentExecutor, prompts: List[str]) -> List[Any]:
+        """Run an agent over prompts with bounded concurrency; failed runs return their exception."""
+        handlers = [
+            _FinalAnswerCaptureHandler() if self.stream_agent_output else None
+            for _ in prompts
+        ]
+        batch_results = await agent_executor.abatch(
+            [{"input": prompt} for prompt in prompts],
+            config=[
+                {"max_concurrency": self.max_concurrency,
+                 "callbacks": [handler] if handler else []}
+                for handler in handlers
+            ],
+            return_exceptions=True
+        )
+        results = []
+        for result, handler in zip(batch_results, handlers):
+            if (handler is not None and handler.output is not None
+                    and self._agent_result_code(result) is None):
+                # The final answer streamed in, but the run failed or lost it afterwards
+                result = {"output": handler.output}
+            results.append(result)
+        return results
+    
+    def _agent_result_code(self, result: Any) -> Optional[str]:
+        """Return the valid Python code in an agent result, or None if it has none."""
+        if isinstance(result, Exception) or "output" not in result:
+            return None
+        return self._extract_code_from_agent_output(result["output"])
+    
+    def _triage_mechanical_files(self, files: List[Tuple[Path, str]]) -> Dict[bytes, Optional[str]]:
+        """
+        Find the files the fallback tool chain alone leaves compiling.
+        
+        Returns:
+            Mapping of content key to the tool output for those files (None when
+            the tools changed nothing and the code already compiles)
+        """
+        self._run_fallback_chain(files)
+        
+        mechanical = {}
+        for _, original_code in files:
+            key = _content_key(original_code)
+            # Contents missing here failed in the tool chain and go to the LLM
+            if key not in self._fallback_results:
+                continue
+            fixed_code = self._fallback_results[key]
+            if self._validate_python_code(fixed_code if fixed_code is not None else original_code):
+                mechanical[key] = fixed_code
+        return mechanical
+    
+    @staticmethod
+    def _normalize_prompt(prompt: str, py_file: Path) -> str:
+        """Remove the file's path and name from a prompt so identical files share a key."""
+        return prompt.replace(str(py_file), "<file>").replace(py_file.name, "<file>")
+    
+    async def _apply_agent_result(self, py_file: Path, original_code: str,
+                                  result: Any, iteration_result: Dict,
+                                  fallbacks: List[Tuple[Path, str, str]]) -> int:
+        """
+        Write back the agent's fix for a single file, or queue it for the fallback tools.
+        
+        Files needing the fallback are appended to fallbacks as
+        (path, original code, tools_used label).
+        
+        Returns:
+            1 if the file was modified, 0 otherwise
+        """
+        fixes_applied = 0
+        
         try:
-            current_code = original_code
-            code_modified = False
-            
-            # Try Python2To3Tool first for Python 2 code
-            if any(pattern in current_code for pattern in ['print ', 'raw_input', 'urllib2', 'ConfigParser', 'cPickle', 'except ', ', e:']):
-                logger.info(f"🔧 Applying Python2To3Tool to {py_file.name}")
-                python2to3_tool = self.tools[1]  # Python2To3Tool
-                result = python2to3_tool.run(current_code)
-                modified_code = self._extract_code_from_result(result)
+            # Batched calls return the exception in place of the result
+            if isinstance(result, Exception):
+                raise result
+            
+            # Extract the modified code from agent result
+            if "output" in result:
+                agent_output = result["output"]
+                logger.debug(f"🔍 Raw agent output for {py_file.name}: {agent_output[:500]}...")
+                
+                modified_code = self._extract_code_from_agent_output(agent_output)
                 
-                if modified_code and modified_code != current_code:
+                if modified_code and modified_code != original_code:
+                    # Validate the modified code
                     if self._validate_python_code(modified_code):
-                        current_code = modified_code
-                        code_modified = True
-                        logger.info(f"✅ Python2To3Tool applied successfully to {py_file.name}")
-            
-            # Try PyUpgradeTool for general modernization
-            logger.info(f"🔧 Applying PyUpgradeTool to {py_file.name}")
-            pyupgrade_tool = self.tools[0]  # PyUpgradeTool
-            result = pyupgrade_tool.run(current_code)
-            modified_code = self._extract_code_from_result(result)
-            
-            if modified_code and modified_code != current_code:
-                if self._validate_python_code(modified_code):
-                    current_code = modified_code
-                    code_modified = True
-                    logger.info(f"✅ PyUpgradeTool applied successfully to {py_file.name}")
-            
-            # Try ModernizeTool for additional compatibility (always try it)
-            logger.info(f"🔧 Applying ModernizeTool to {py_file.name}")
-            modernize_tool = self.tools[2]  # ModernizeTool
-            result = modernize_tool.run(current_code)
-            modified_code = self._extract_code_from_result(result)
-            
-            if modified_code and modified_code != current_code:
-                if self._validate_python_code(modified_code):
-                    current_code = modified_code
-                    code_modified = True
-                    logger.info(f"✅ ModernizeTool applied successfully to {py_file.name}")
-            
-            # Write the final modified code if any tool made changes
-            if code_modified:
-                with open(py_file, 'w', encoding='utf-8') as f:
-                    f.write(current_code)
-                logger.info(f"✅ Final code written to {py_file.name}")
-                return True
-                    
+                        error = await asyncio.get_running_loop().run_in_executor(
+                            self._get_io_pool(), _write_source, (py_file, modified_code)
+                        )
+                        if error:
+                            raise error
+                        fixes_applied = 1
+                        logger.info(f"✅ Agent successfully modified {py_file.name}")
+                        
+                        # Track tools used (from intermediate steps)
+                        if "intermediate_steps" in result:
+                            for step in result["intermediate_steps"]:
+                                if len(step) >= 2:
+                                    action, observation = step
+                                    tool_name = getattr(action, 'tool', 'unknown')
+                                    iteration_result["agent_steps"].append({
+                                        "tool": tool_name,
+                                        "file": py_file.name,
+                                        "action": str(action),
+                                        "observation": str(observation)[:200]  # Truncate for readability
+                                    })
+                    else:
+                        logger.warning(f"⚠️ Agent produced invalid Python code for {py_file.name}")
+                        logger.debug(f"🔍 Invalid code: {modified_code[:200]}...")
+                else:
+                    logger.info(f"ℹ️ No changes made to {py_file.name}")
+                    if not modified_code:
+                        logger.debug(f"🔍 No code extracted from: {agent_output[:300]}...")
+                        # Try fallback if agent completed but we couldn't extract code
+                        logger.info(f"🔧 Agent completed but code extraction failed, trying fallback for {py_file.name}")
+                        fallbacks.append((py_file, original_code, "fallback_after_agent"))
+            else:
+                logger.warning(f"⚠️ No output received from agent for {py_file.name}")
+                logger.debug(f"🔍 Full result keys: {result.keys()}")
+                # Try fallback when no output received
+                logger.info(f"🔧 No agent output received, trying fallback for {py_file.name}")
+                fallbacks.append((py_file, original_code, "fallback_no_output"))
+        
         except Exception as e:
-            logger.error(f"Error in fallback tool application: {e}")
+            logger.error(f"❌ Error processing {py_file.name} with agent: {e}")
+            # If agent fails, try manual tool application as fallback
+            logger.info(f"🔧 Attempting manual tool application for {py_file.name}")
+            fallbacks.append((py_file, original_code, "fallback_tools"))
         
-        return False
+        return fixes_applied
     
-    def _create_agent_prompt_for_file(self, py_file: Path, code: str, 
-                                    errors: List[Dict], iteration: int) -> str:
-        """Create a specific prompt for the agent to work on a file."""
-        return PromptLibrary.get_migration_executor_agent_prompt_for_file(py_file, code, errors, iteration)
+    def _apply_fallback_tools(self, py_file: Path, original_code: str) -> bool:
+        """Apply tools manually as fallback when agent fails."""
+        return self._apply_fallback_tools_batch([(py_file, original_code)])[0]
     
-    def _extract_code_from_agent_output(self, agent_output: str) -> Optional[str]:
-        """Extract Python code from agent output."""
+    def _apply_fallback_tools_batch(self, targets: List[Tuple[Path, str]]) -> List[bool]:
+        """
+        Apply the fallback tool chain to several files at once.
         
-        # Try to extract from JSON-encoded action_input first (most reliable)
-        # Handle different JSON structures that LangChain agent might produce
-        json_patterns = [
-            # Standard action_input pattern
-            r'"action_input":\s*"((?:[^"\\]|\\.)*)(?<!\\)"',
-            # Alternative patterns for different LangChain formats
-            r'"action_input":\s*"([^"]*(?:\\.[^"]*)*)"',
-            # Pattern for Final Answer in JSON
-            r'"action":\s*"Final Answer"[^}]*"action_input":\s*"((?:[^"\\]|\\.)*)"',
-        ]
+        Each tool runs once over every not yet processed unique content through
+        its _run_batch, instead of once per file.
         
-        for pattern in json_patterns:
-            match = re.search(pattern, agent_output, re.DOTALL)
-            if match:
-                json_content = match.group(1)
-                # Decode JSON escapes more thoroughly
-                try:
-                    import json as json_lib
-                    # Try to decode as proper JSON string
-                    decoded_content = json_lib.loads(f'"{json_content}"')
-                except:
-                    # Fallback to manual decoding
-                    decoded_content = (json_content
-                                     .replace('\\n', '\n')
-                                     .replace('\\"', '"')
-                                     .replace('\\\\', '\\')
-                                     .replace('\\t', '\t')
-                                     .replace('\\r', '\r'))
+        Returns:
+            Whether each file was modified, in input order
+        """
+        self._run_fallback_chain(targets)
+        
+        # Contents missing here failed in the tool chain and are retried next time
+        final_codes = [self._fallback_results.get(_content_key(original_code)) for _, original_code in targets]
+        
+        # Write the final modified code if any tool made changes, all at once
+        writes = [(py_file, code) for (py_file, _), code in zip(targets, final_codes) if code is not None]
+        errors = iter(self._write_files(writes))
+        
+        applied = []
+        for (py_file, _), code in zip(targets, final_codes):
+            if code is None:
+                applied.append(False)
+                continue
+            error = next(errors)
+            if error:
+                logger.error(f"Error in fallback tool application: {error}")
+                applied.append(False)
+            else:
+                logger.info(f"✅ Final code written to {py_file.name}")
+                applied.append(True)
+        
+        return applied
+    
+    def _run_fallback_chain(self, targets: List[Tuple[Path, str]]):
+        """
+        Run the fallback tool chain over every not yet processed unique content.
+        
+        Results are memoized in _fallback_results: the final code, or None when
+        no tool changed anything. Contents whose chain failed are left out.
+        """
+        # Identical contents are only run through the tool chain once
+        pending: Dict[bytes, str] = {}
+        names: Dict[bytes, str] = {}
+        for py_file, original_code in targets:
+            key = _content_key(original_code)
+            if key not in self._fallback_results and key not in pending:
+                pending[key] = original_code
+                names[key] = py_file.name
+        
+        if pending:
+            try:
+                current = dict(pending)
+                modified = set()
                 
-                # Now look for code blocks within the decoded content
-                code_patterns = [
-                    r"```python\n(.*?)\n```",
-                    r"```\n(.*?)\n```",
-                    # Also try without the trailing newline
-                    r"```python\n(.*?)```",
-                    r"```\n(.*?)```",
-                ]
+                # Try Python2To3Tool first for Python 2 code
+                self._apply_fallback_stage(
+                    self.tools[1],  # Python2To3Tool
+                    [key for key, code in current.items() if _PY2_HINT_PATTERN.search(code)],
+                    current, names, modified
+                )
+                # Try PyUpgradeTool for general modernization
+                self._apply_fallback_stage(self.tools[0], list(current), current, names, modified)  # PyUpgradeTool
+                # Try ModernizeTool for additional compatibility (always try it)
+                self._apply_fallback_stage(self.tools[2], list(current), current, names, modified)  # ModernizeTool
                 
-                for code_pattern in code_patterns:
-                    code_match = re.search(code_pattern, decoded_content, re.DOTALL)
-                    if code_match:
-                        code = code_match.group(1).strip()
-                        if code and self._validate_python_code(code):
-                            logger.info(f"✓ Extracted code from JSON action_input using pattern: {pattern[:30]}...")
-                            return code
-        
-        # Look for code blocks in different formats (including Final Answer)
-        patterns = [
-            # Standard code blocks
-            r"```python\n(.*?)\n```",
-            r"```\n(.*?)\n```",
-            
-            # Labeled code blocks
-            r"FIXED CODE:\s*```python\n(.*?)\n```",
-            r"RESULT:\s*```python\n(.*?)\n```",
-            r"CORRECTED VERSION:\s*```python\n(.*?)\n```",
-            r"MIGRATED CODE:\s*```python\n(.*?)\n```",
-            
-            # Final Answer pattern (common in LangChain agent responses)
-            r"Final Answer.*?```python\n(.*?)\n```",
-            
-            # Code within final answer text blocks
-            r"Here's the corrected version.*?```python\n(.*?)\n```",
-            r"Here's the final code.*?```python\n(.*?)\n```",
-            r"Here's the corrected Python 3 code.*?```python\n(.*?)\n```",
-        ]
+                for key in pending:
+                    self._fallback_results[key] = current[key] if key in modified else None
+            except Exception as e:
+                logger.error(f"Error in fallback tool application: {e}")
+    
+    def _apply_fallback_stage(self, tool: Any, keys: List[bytes], current: Dict[bytes, str],
+                              names: Dict[bytes, str], modified: set):
+        """Run one fallback tool over the given contents, keeping only valid changes."""
+        if not keys:
+            return
         
-        for pattern in patterns:
-            match = re.search(pattern, agent_output, re.DOTALL | re.IGNORECASE)
-            if match:
-                code = match.group(1).strip()
-                if code and self._validate_python_code(code):
-                    logger.info(f"✓ Extracted code using pattern: {pattern[:50]}...")
-                    return code
+        tool_name = type(tool).__name__
+        logger.info(f"🔧 Applying {tool_name} to {len(keys)} file(s)")
+        results = self._extract_codes(self._run_tool_cached(tool, [current[key] for key in keys]))
+        for key, modified_code in zip(keys, results):
+            if modified_code and modified_code != current[key]:
+                if self._validate_python_code(modified_code):
+                    current[key] = modified_code
+                    modified.add(key)
+                    logger.info(f"✅ {tool_name} applied successfully to {names[key]}")
+    
+    def _run_tool_cached(self, tool: Any, codes: List[str]) -> List[str]:
+        """
+        Run a tool over codes, serving outputs for previously seen code from the disk cache.
+        
+        Entries are keyed by tool, its target version and the code; error outputs
+        are not cached, since they may be transient.
+        """
+        if self.tool_cache_dir is None or not codes:
+            return self._run_tool_batch(tool, codes)
         
-        # Try extracting from tool output in the agent response
-        tool_output_patterns = [
-            r"Observation:\s*.*?```python\n(.*?)\n```",
+        try:
+            self.tool_cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"⚠️ Tool cache unavailable, continuing without it: {e}")
+            self.tool_cache_dir = None
+            return self._run_tool_batch(tool, codes)
+        
+        salt = f"{_TOOL_CACHE_VERSION}\0{tool.name}\0{getattr(tool, 'target_version', '')}\0"
+        paths = [
+            self.tool_cache_dir / hashlib.blake2b((salt + code).encode('utf-8'), digest_size=16).hexdigest()
+            for code in codes
+        ]
+        outputs = [
+            None if isinstance(cached, Exception) else cached
+            for cached in self._get_io_pool().map(_read_source, paths)
         ]
+        misses = [i for i, output in enumerate(outputs) if output is None]
+        if not misses:
+            return outputs
         
-        for pattern in tool_output_patterns:
-            match = re.search(pattern, agent_output, re.DOTALL | re.IGNORECASE)
-            if match:
-                code = match.group(1).strip()
-                if code and self._validate_python_code(code):
-                    logger.info(f"✓ Extracted code from tool observation")
+        for i, output in zip(misses, self._run_tool_batch(tool, [codes[i] for i in misses])):
+            outputs[i] = output
+        writes = [(paths[i], outputs[i]) for i in misses if not outputs[i].startswith("❌")]
+        if writes:
+            list(self._get_io_pool().map(_write_source, writes))
+            self._evict_tool_cache()
+        return outputs
+    
+    @staticmethod
+    def _run_tool_batch(tool: Any, codes: List[str]) -> List[str]:
+        """Run a tool over codes, across worker processes when the tool supports it (run_many)."""
+        run_many = getattr(tool, "run_many", None)
+        return run_many(codes) if run_many is not None else tool._run_batch(codes)
+    
+    def _evict_tool_cache(self):
+        """Remove the oldest tool cache entries beyond _TOOL_CACHE_MAX_ENTRIES."""
+        try:
+            with os.scandir(self.tool_cache_dir) as it:
+                entries = [entry for entry in it if entry.is_file() and not entry.name.startswith(".tmp_")]
+            if len(entries) <= _TOOL_CACHE_MAX_ENTRIES:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - _TOOL_CACHE_MAX_ENTRIES]:
+                os.unlink(entry.path)
+        except OSError as e:
+            logger.debug(f"Tool cache eviction failed: {e}")
+    
+    def _create_agent_prompt_for_file(self, py_file: Path, code: str, 
+                                    file_errors: List[Dict], iteration: int) -> str:
+        """Create a specific prompt for the agent to work on a file, given the errors reported for it."""
+        return PromptLibrary.get_migration_executor_agent_prompt_for_file(py_file, code, file_errors, iteration)
+    
+    def _extract_code_from_agent_output(self, agent_output: str) -> Optional[str]:
+        """Extract Python code from agent output."""
+        
+        # Try to extract from JSON-encoded action_input first (most reliable);
+        # the JSON decoder handles string escapes, so no manual unescaping is needed
+        if '"action_input"' in agent_output:
+            for decoded_content in _iter_action_inputs(agent_output):
+                code = self._first_valid_code_block(decoded_content)
+                if code:
+                    logger.info("✓ Extracted code from JSON action_input")
                     return code
         
+        # Look for code blocks anywhere in the output (Final Answer, tool observations)
+        if "```" in agent_output:
+            code = self._first_valid_code_block(agent_output)
+            if code:
+                logger.info("✓ Extracted code from fenced code block")
+                return code
+        
         # If no clear code block, try to find Python-like content
         lines = agent_output.split('\n')
         code_lines = []
         in_code = False
-        start_indicators = ['#!/usr/bin/env python', 'def ', 'class ', 'import ', 'from ']
         
         for line in lines:
             stripped_line = line.strip()
             
             # Start collecting code when we see Python indicators
-            if any(indicator in line for indicator in start_indicators):
+            if _CODE_START_PATTERN.search(line):
                 in_code = True
                 code_lines.append(line)
             elif in_code:
                 # Continue collecting if it looks like Python code
                 if (stripped_line == '' or 
-                    line.startswith('    ') or line.startswith('\t') or  # Indented
+                    line.startswith(('    ', '\t')) or  # Indented
                     stripped_line.startswith('#') or  # Comments
-                    any(keyword in stripped_line for keyword in ['if ', 'else:', 'elif ', 'for ', 'while ', 'try:', 'except', 'finally:', 'with ', 'return', 'yield', 'pass', 'break', 'continue'])):
+                    _CODE_KEYWORD_PATTERN.search(stripped_line)):
                     code_lines.append(line)
-                elif stripped_line and not any(char in stripped_line for char in ['*', '-', '✅', '🔧', '⚠️', '#']):
+                elif stripped_line and not _PROSE_MARKER_PATTERN.search(stripped_line):
                     # Looks like more Python code
                     code_lines.append(line)
                 else:
@@ -531,28 +1165,34 @@ class MigrationExecutor:
                 return code
         
         logger.warning("⚠️ Could not extract valid Python code from agent output")
-        
-        # Enhanced debugging - look for any code-like patterns
         if "```python" in agent_output.lower():
             logger.info("🔍 Found ```python marker but extraction failed")
-            # Try a very permissive pattern
-            permissive_match = re.search(r'```python\s*(.*?)\s*```', agent_output, re.DOTALL | re.IGNORECASE)
-            if permissive_match:
-                potential_code = permissive_match.group(1).strip()
-                logger.info(f"🔍 Permissive extraction found: {potential_code[:100]}...")
-                if self._validate_python_code(potential_code):
-                    logger.info("✓ Permissive extraction succeeded!")
-                    return potential_code
-                else:
-                    logger.warning("⚠️ Permissive extraction failed validation")
         
         logger.debug(f"🔍 Agent output sample: {agent_output[:500]}...")
         return None
     
+    def _first_valid_code_block(self, text: str) -> Optional[str]:
+        """Return the first valid python-tagged code block, else the first valid untagged one."""
+        untagged = []
+        for tag, body in _iter_code_fences(text):
+            code = body.strip()
+            if not code:
+                continue
+            if tag == "python":
+                if self._validate_python_code(code):
+                    return code
+            elif not tag:
+                untagged.append(code)
+        
+        for code in untagged:
+            if self._validate_python_code(code):
+                return code
+        return None
+    
     def _validate_python_code(self, code: str) -> bool:
         """Validate that the code is syntactically correct Python."""
         try:
-            compile(code, '<string>', 'exec')
+            ast.parse(code)
             return True
         except SyntaxError:
             return False
@@ -560,51 +1200,69 @@ class MigrationExecutor:
             return False
     
     def _execute_manual_fallback(self, working_dir: Path, errors: List[Dict], 
-                                iteration_result: Dict) -> int:
+                                iteration_result: Dict,
+                                files: Optional[Dict[Path, Union[str, Exception]]] = None) -> int:
         """Fallback manual tool execution when agent is not available."""
         
         fixes_applied = 0
+        if files is None:
+            files = self._read_python_files(working_dir)
         
         # Simple rule-based tool selection
         tool_sequence = []
         
+        # All error records are scanned as one string, once per check
+        error_text = '\n'.join(str(error) for error in errors)
+        
         # Check for Python 2 patterns
-        if any('print' in str(error) or 'raw_input' in str(error) for error in errors):
+        if _PY2_ERROR_PATTERN.search(error_text):
             tool_sequence.append(self.tools[1])  # Python2To3Tool
         
         # Always try pyupgrade for modernization
         tool_sequence.append(self.tools[0])  # PyUpgradeTool
         
         # Try modernize for compatibility
-        if any('import' in str(error) for error in errors):
+        if 'import' in error_text:
             tool_sequence.append(self.tools[2])  # ModernizeTool
         
         # Apply tools in sequence
         for tool in tool_sequence:
             logger.info(f"Applying {tool.name} to project files")
             
-            python_files = list(working_dir.rglob("*.py"))
             files_modified = 0
+            # Tool output per file content, so duplicate files run the tool once;
+            # all unique contents go through the tool in a single batch
+            unique: Dict[bytes, str] = {}
+            for original_code in files.values():
+                if not isinstance(original_code, Exception):
+                    unique.setdefault(_content_key(original_code), original_code)
+            try:
+                tool_results: Dict[bytes, Optional[str]] = dict(zip(
+                    unique, self._extract_codes(self._run_tool_cached(tool, list(unique.values())))
+                ))
+            except Exception as e:
+                logger.error(f"Error applying {tool.name} to project files: {e}")
+                continue
             
-            for py_file in python_files:
-                try:
-                    with open(py_file, 'r', encoding='utf-8') as f:
-                        original_code = f.read()
-                    
-                    # Apply the tool
-                    result = tool.run(original_code)
-                    
-                    # Extract the modified code from the result
-                    modified_code = self._extract_code_from_result(result)
-                    
-                    if modified_code and modified_code != original_code:
-                        with open(py_file, 'w', encoding='utf-8') as f:
-                            f.write(modified_code)
-                        files_modified += 1
-                        logger.info(f"Modified {py_file.name} with {tool.name}")
-                        
-                except Exception as e:
-                    logger.error(f"Error applying {tool.name} to {py_file}: {e}")
+            writes = []
+            for py_file, original_code in files.items():
+                if isinstance(original_code, Exception):
+                    logger.error(f"Error applying {tool.name} to {py_file}: {original_code}")
+                    continue
+                
+                modified_code = tool_results[_content_key(original_code)]
+                if modified_code and modified_code != original_code:
+                    writes.append((py_file, modified_code))
+            
+            # The tool's changes are written together on the I/O pool
+            for (py_file, modified_code), error in zip(writes, self._write_files(writes)):
+                if error:
+                    logger.error(f"Error applying {tool.name} to {py_file}: {error}")
+                    continue
+                # Later tools and the next compilation see the new contents
+                files[py_file] = modified_code
+                files_modified += 1
+                logger.info(f"Modified {py_file.name} with {tool.name}")
             
             if files_modified > 0:
                 fixes_applied += files_modified
@@ -617,8 +1275,9 @@ class MigrationExecutor:
     
 # Legacy method - replaced by _execute_iteration_with_agent
     
-    def _attempt_compilation(self, working_dir: Path) -> Dict[str, Any]:
-        """Attempt to compile the Python project."""
+    def _attempt_compilation(self, working_dir: Path,
+                             files: Optional[Dict[Path, Union[str, Exception]]] = None) -> Dict[str, Any]:
+        """Attempt to compile the Python project, from a file snapshot when one is given."""
         
         compilation_result = {
             "status": "unknown",
@@ -628,38 +1287,53 @@ class MigrationExecutor:
         
         try:
             # Find Python files to compile
-            python_files = list(working_dir.rglob("*.py"))
-            if not python_files:
+            if files is None:
+                files = self._read_python_files(working_dir)
+            if not files:
                 compilation_result["status"] = "no_python_files"
                 return compilation_result
             
-            errors = []
+            items = [
+                (str(py_file), str(py_file.relative_to(working_dir)), code)
+                for py_file, code in files.items()
+            ]
+            # Unreadable files have no digest and are always re-checked
+            keys = [
+                None if isinstance(code, Exception) else (filename, _content_key(code))
+                for filename, _, code in items
+            ]
+            results = [None] * len(items)
+            misses = []
+            for i, key in enumerate(keys):
+                if key in self._compile_cache:
+                    self._compile_cache.move_to_end(key)
+                    results[i] = self._compile_cache[key]
+                else:
+                    misses.append(i)
             
-            # Try to compile each Python file
-            for py_file in python_files:
+            # Try to compile each changed Python file; parsing is CPU bound, so
+            # large projects are spread across processes
+            pending = [items[i] for i in misses]
+            workers = min(os.cpu_count() or 1, len(pending))
+            if workers > 1 and len(pending) >= _PARALLEL_COMPILE_MIN_FILES:
                 try:
-                    with open(py_file, 'r', encoding='utf-8') as f:
-                        code = f.read()
-                    
-                    # Use ast.parse to check for syntax errors
-                    compile(code, str(py_file), 'exec')
-                    
-                except SyntaxError as e:
-                    error_info = {
-                        "file": str(py_file.relative_to(working_dir)),
-                        "line": e.lineno,
-                        "error": str(e),
-                        "type": "syntax_error"
-                    }
-                    errors.append(error_info)
-                    
-                except Exception as e:
-                    error_info = {
-                        "file": str(py_file.relative_to(working_dir)),
-                        "error": str(e),
-                        "type": "compilation_error"
-                    }
-                    errors.append(error_info)
+                    compiled = list(self._get_compile_pool().map(
+                        _compile_one, pending, chunksize=-(-len(pending) // (workers * 4))
+                    ))
+                except BrokenProcessPool as e:
+                    logger.warning(f"⚠️ Compilation workers failed ({e}), compiling in-process")
+                    self._close_compile_pool()
+                    compiled = [_compile_one(item) for item in pending]
+            else:
+                compiled = [_compile_one(item) for item in pending]
+            
+            for i, error_info in zip(misses, compiled):
+                results[i] = error_info
+                if keys[i] is not None:
+                    self._compile_cache[keys[i]] = error_info
+            while len(self._compile_cache) > _COMPILE_CACHE_SIZE:
+                self._compile_cache.popitem(last=False)
+            errors = [error_info for error_info in results if error_info]
             
             if errors:
                 compilation_result["status"] = "failed"
@@ -673,58 +1347,86 @@ class MigrationExecutor:
         
         return compilation_result
     
+    def _get_compile_pool(self) -> ProcessPoolExecutor:
+        """Return the compilation worker pool, starting it on first use."""
+        if self._compile_pool is None:
+            self._compile_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._compile_pool
+    
+    def _close_compile_pool(self):
+        """Stop the compilation workers; the next large compile starts a new pool."""
+        if self._compile_pool is not None:
+            self._compile_pool.shutdown(wait=False, cancel_futures=True)
+            self._compile_pool = None
+    
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        """Return the file I/O thread pool, starting it on first use."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=_IO_WORKERS)
+        return self._io_pool
+    
+    def _close_io_pool(self):
+        """Stop the file I/O threads once queued reads and writes finish; the next file access starts a new pool."""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+    
 # Old methods removed - now using LangChain agent for tool orchestration
     
+    def _extract_codes(self, results: List[str]) -> List[Optional[str]]:
+        """
+        Extract the code from a batch of tool results.
+        
+        Runs in the calling thread: re holds the GIL, so a thread pool would
+        only add overhead, and shipping results to worker processes costs as
+        much as the single regex scan it would save.
+        """
+        return [self._extract_code_from_result(result) for result in results]
+    
     def _extract_code_from_result(self, result: str) -> Optional[str]:
         """Extract the actual code from tool result."""
         
         # Look for code blocks in the result
-        code_pattern = r"```python\n(.*?)\n```"
-        match = re.search(code_pattern, result, re.DOTALL)
+        match = _CODE_BLOCK_RE.search(result)
         
         if match:
             return match.group(1)
         
-        # If no code block found, check if the result looks like code
-        lines = result.split('\n')
-        code_lines = []
-        in_code_section = False
-        
-        for line in lines:
-            if line.strip().startswith('```python'):
-                in_code_section = True
-                continue
-            elif line.strip() == '```' and in_code_section:
-                break
-            elif in_code_section:
-                code_lines.append(line)
-        
-        if code_lines:
-            return '\n'.join(code_lines)
-        
-        return None
+        # Otherwise accept fences with extra text on the opening line or an
+        # unterminated block
+        match = _CODE_BLOCK_RE_LOOSE.search(result)
+        if not match:
+            return None
+        code = match.group(1)
+        if match.end() < len(result):
+            # Drop the newline before the closing fence
+            code = code[:-1]
+        return code or None
     
     def _save_migration_issues(self, output_dir: Path):
         """Save unresolved migration issues to file."""
         
         issues_file = output_dir / "migration_issues.md"
         
-        with open(issues_file, 'w', encoding='utf-8') as f:
-            f.write("# Unresolved Migration Issues\n\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Maximum iterations reached: {self.max_iterations}\n\n")
-            
-            if self.migration_issues:
-                f.write("## Issues that could not be automatically resolved:\n\n")
-                for i, issue in enumerate(self.migration_issues, 1):
-                    f.write(f"### {i}. {issue.get('error', 'Unknown error')}\n")
-                    f.write(f"- **File:** {issue.get('file', 'Unknown')}\n")
-                    f.write(f"- **Type:** {issue.get('type', 'Unknown')}\n")
-                    if 'line' in issue:
-                        f.write(f"- **Line:** {issue['line']}\n")
-                    f.write("\n")
-            else:
-                f.write("No unresolved issues logged.\n")
+        parts = [
+            "# Unresolved Migration Issues\n\n",
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+            f"Maximum iterations reached: {self.max_iterations}\n\n",
+        ]
+        
+        if self.migration_issues:
+            parts.append("## Issues that could not be automatically resolved:\n\n")
+            for i, issue in enumerate(self.migration_issues, 1):
+                parts.append(f"### {i}. {issue.get('error', 'Unknown error')}\n")
+                parts.append(f"- **File:** {issue.get('file', 'Unknown')}\n")
+                parts.append(f"- **Type:** {issue.get('type', 'Unknown')}\n")
+                if 'line' in issue:
+                    parts.append(f"- **Line:** {issue['line']}\n")
+                parts.append("\n")
+        else:
+            parts.append("No unresolved issues logged.\n")
+        
+        _write_report(issues_file, ''.join(parts))
         
         logger.info(f"Migration issues saved to {issues_file}")
     
@@ -737,64 +1439,71 @@ class MigrationExecutor:
             if final_dir.exists():
                 shutil.rmtree(final_dir)
             
-            # Copy all migrated files to final directory
-            shutil.copytree(working_dir, final_dir)
+            # Link migrated files into the final directory, copying any still shared with the source
+            shutil.copytree(working_dir, final_dir, copy_function=_link_private_or_copy)
+            python_files = sorted(_scan_python_files(final_dir), key=lambda rel: rel.split(os.sep))
             
             # Create status file
             status_file = output_dir / "migration_status.txt"
-            with open(status_file, 'w', encoding='utf-8') as f:
-                f.write(f"Migration Status: {status}\n")
-                f.write(f"Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Final migrated code location: {final_dir.absolute()}\n")
-                
-                if status == "success":
-                    f.write("\n✅ Migration completed successfully!\n")
-                    f.write("All Python files should now be compatible with the target version.\n")
-                else:
-                    f.write(f"\n⚠️ Migration completed with status: {status}\n")
-                    f.write("Some issues may remain - check migration_issues.md for details.\n")
+            parts = [
+                f"Migration Status: {status}\n",
+                f"Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+                f"Final migrated code location: {final_dir.absolute()}\n",
+            ]
+            
+            if status == "success":
+                parts.append("\n✅ Migration completed successfully!\n"
+                             "All Python files should now be compatible with the target version.\n")
+            else:
+                parts.append(f"\n⚠️ Migration completed with status: {status}\n"
+                             "Some issues may remain - check migration_issues.md for details.\n")
+            _write_report(status_file, ''.join(parts))
             
             logger.info(f"Final migrated files saved to {final_dir}")
             logger.info(f"Migration status saved to {status_file}")
             
             # Create summary of migrated files
-            self._create_migration_summary(final_dir, output_dir)
+            self._create_migration_summary(final_dir, output_dir, python_files)
             
         except Exception as e:
             logger.error(f"Error finalizing migrated files: {e}")
     
-    def _create_migration_summary(self, final_dir: Path, output_dir: Path):
-        """Create a summary of migrated files."""
+    def _create_migration_summary(self, final_dir: Path, output_dir: Path,
+                                  python_files: Optional[List[str]] = None):
+        """Create a summary of migrated files; python_files are sorted paths relative to final_dir."""
         
         summary_file = output_dir / "migrated_files_summary.md"
         
         try:
-            python_files = list(final_dir.rglob("*.py"))
+            if python_files is None:
+                python_files = sorted(_scan_python_files(final_dir), key=lambda rel: rel.split(os.sep))
             
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                f.write("# Migrated Files Summary\n\n")
-                f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"## Final migrated code location: `{final_dir.absolute()}`\n\n")
-                f.write(f"## Python files migrated: {len(python_files)}\n\n")
-                
-                if python_files:
-                    f.write("### Files processed:\n")
-                    for py_file in sorted(python_files):
-                        rel_path = py_file.relative_to(final_dir)
-                        f.write(f"- `{rel_path}`\n")
-                    f.write("\n")
-                
-                f.write("## Next Steps\n\n")
-                f.write("1. Review the migrated code in the final directory\n")
-                f.write("2. Test your application with the target Python version\n")
-                f.write("3. Check migration_status.txt for overall status\n")
-                f.write("4. If issues remain, review migration_issues.md\n")
-                f.write("5. Run your test suite to ensure functionality is preserved\n\n")
-                
-                f.write("## Backup\n\n")
-                f.write("- Original source code remains unchanged\n")
-                f.write("- Working migration files are in `migrated_code/` directory\n")
-                f.write("- Final clean migrated files are in `final_migrated_code/` directory\n")
+            parts = [
+                "# Migrated Files Summary\n\n",
+                f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+                f"## Final migrated code location: `{final_dir.absolute()}`\n\n",
+                f"## Python files migrated: {len(python_files)}\n\n",
+            ]
+            
+            if python_files:
+                parts.append("### Files processed:\n")
+                parts.extend(f"- `{rel_path}`\n" for rel_path in python_files)
+                parts.append("\n")
+            
+            parts.append(
+                "## Next Steps\n\n"
+                "1. Review the migrated code in the final directory\n"
+                "2. Test your application with the target Python version\n"
+                "3. Check migration_status.txt for overall status\n"
+                "4. If issues remain, review migration_issues.md\n"
+                "5. Run your test suite to ensure functionality is preserved\n\n"
+                "## Backup\n\n"
+                "- Original source code remains unchanged\n"
+                "- Working migration files are in `migrated_code/` directory\n"
+                "- Final clean migrated files are in `final_migrated_code/` directory\n"
+            )
+            
+            _write_report(summary_file, ''.join(parts))
             
             logger.info(f"Migration summary saved to {summary_file}")
             
@@ -802,19 +1511,25 @@ class MigrationExecutor:
             logger.error(f"Error creating migration summary: {e}")
 
 
+@functools.lru_cache(maxsize=8)
+def _console_lacks_emoji(encoding: Optional[str]) -> bool:
+    """Check whether a console encoding cannot encode emoji, e.g. cp1252 on Windows."""
+    try:
+        "🚀".encode(encoding or 'ascii')
+    except (UnicodeEncodeError, LookupError):
+        return True
+    return False
+
+
 def safe_print(message):
     """Safely print messages, handling Unicode issues on Windows"""
+    # Strip emojis up front on consoles known not to encode them, rather than
+    # failing the encode first; stdout is looked up per call since it can be replaced
+    if _console_lacks_emoji(getattr(sys.stdout, 'encoding', None)):
+        message = _EMOJI_RE.sub('', message)
     try:
         print(message)
     except UnicodeEncodeError:
         # Remove emojis for Windows compatibility
-        emoji_pattern = re.compile("["
-                                  u"\U0001F600-\U0001F64F"  # emoticons
-                                  u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                                  u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                                  u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                                  u"\U00002702-\U000027B0"
-                                  u"\U000024C2-\U0001F251"
-                                  "]+", flags=re.UNICODE)
-        clean_message = emoji_pattern.sub('', message)
+        clean_message = _EMOJI_RE.sub('', message)
         print(clean_message)
\ No newline at end of file
@@ -9,16 +9,19 @@ migration execution. Centralizing prompts makes them easier to maintain, test, a
 Author: Your AI Python Upgrade Assistant
 """
 
+import json
+from collections import OrderedDict
 from typing import Dict, Any
 
+try:
+    # langchain: needed only by the create_*_messages helpers; prompt text builds without it
+    from langchain.schema import HumanMessage, SystemMessage
+except ImportError:
+    HumanMessage = SystemMessage = None
 
-class PromptLibrary:
-    """Centralized prompt library for Python version analysis and migration"""
-    
-    @staticmethod
-    def get_version_detection_system_prompt() -> str:
-        """Get the system prompt for Python version detection"""
-        return """You are an expert Python developer and version migration specialist with deep knowledge of both Python 2.x and 3.x ecosystems. 
+
+# Version detection system prompt
+_VERSION_DETECTION_SYS = """You are an expert Python developer and version migration specialist with deep knowledge of both Python 2.x and 3.x ecosystems. 
         Analyze the provided code samples and dependencies to determine:
         1. The most likely current Python version being used (including Python 2.7 if detected)
         2. The minimum Python version required
@@ -42,33 +45,9 @@ class PromptLibrary:
             "analysis": "detailed explanation",
             "is_python2": true/false
         }"""
-    
-    @staticmethod
-    def get_version_detection_user_prompt(dependencies: Dict[str, Any], code_samples: list) -> str:
-        """Get the user prompt for Python version detection"""
-        import json
-        return f"""
-        Please analyze this Python codebase:
-        
-        DEPENDENCIES:
-        {json.dumps(dependencies, indent=2)}
-        
-        CODE SAMPLES:
-        {json.dumps(code_samples, indent=2)}
-        
-        Provide your analysis in the requested JSON format.
-        """
-    
-    @staticmethod
-    def get_migration_analysis_system_prompt(
-        migration_type: str, 
-        current_version: str, 
-        target_version: str,
-        is_python2_migration: bool = False
-    ) -> str:
-        """Get the system prompt for migration issue analysis"""
-        
-        python2_focus_areas = """PYTHON 2.x TO 3.x MIGRATION - Focus on these critical areas:
+
+# Focus areas for Python 2.x to 3.x migrations
+_PY2_FOCUS = """PYTHON 2.x TO 3.x MIGRATION - Focus on these critical areas:
         1. Print statements -> print() function
         2. String/Unicode handling changes
         3. Integer division behavior (/ vs //)
@@ -77,19 +56,18 @@ class PromptLibrary:
         6. Exception handling syntax changes
         7. Input/raw_input changes
         8. xrange() -> range() changes"""
-        
-        python3_focus_areas = """PYTHON 3.x UPGRADE - Focus on these areas:
+
+# Focus areas for Python 3.x upgrades
+_PY3_FOCUS = """PYTHON 3.x UPGRADE - Focus on these areas:
         1. Deprecated features that will be removed
         2. Syntax changes required
         3. Import changes needed
         4. Behavior changes that could break functionality
         5. Performance implications
         6. New language features compatibility"""
-        
-        focus_areas = python2_focus_areas if is_python2_migration else python3_focus_areas
-        issue_type = 'python2_syntax' if is_python2_migration else 'deprecated_feature'
-        
-        return f"""You are an expert Python migration specialist with deep expertise in {migration_type} migrations. 
+
+# Migration analysis system prompt, filled in with str.format
+_MIGRATION_ANALYSIS_TEMPLATE = """You are an expert Python migration specialist with deep expertise in {migration_type} migrations. 
         Analyze the provided code files for potential issues when migrating from Python {current_version} to Python {target_version}.
 
         {focus_areas}
@@ -120,28 +98,9 @@ class PromptLibrary:
         ]
         
         If no issues are found, respond with an empty array: []"""
-    
-    @staticmethod
-    def get_migration_analysis_user_prompt(
-        file_contents: Dict[str, str], 
-        current_version: str, 
-        target_version: str
-    ) -> str:
-        """Get the user prompt for migration issue analysis"""
-        import json
-        return f"""
-        Analyze these Python files for migration issues:
-        
-        {json.dumps(file_contents, indent=2)}
-        
-        Current Version: {current_version}
-        Target Version: {target_version}
-        """
-    
-    @staticmethod
-    def get_code_review_system_prompt(focus_area: str = "general") -> str:
-        """Get system prompt for general code review tasks"""
-        return f"""You are an expert Python code reviewer with extensive experience in code quality, 
+
+# Code review system prompt, filled in with str.format
+_CODE_REVIEW_TEMPLATE = """You are an expert Python code reviewer with extensive experience in code quality, 
         best practices, and {focus_area} analysis. 
         
         Analyze the provided code and provide constructive feedback focusing on:
@@ -153,11 +112,9 @@ class PromptLibrary:
         
         Provide specific, actionable recommendations with code examples where appropriate.
         """
-    
-    @staticmethod
-    def get_dependency_analysis_system_prompt() -> str:
-        """Get system prompt for dependency compatibility analysis"""
-        return """You are an expert Python package and dependency specialist with deep knowledge of:
+
+# Dependency analysis system prompt
+_DEPENDENCY_ANALYSIS_SYS = """You are an expert Python package and dependency specialist with deep knowledge of:
         - Python package ecosystems and compatibility matrices
         - Version conflicts and resolution strategies
         - Migration impact on third-party dependencies
@@ -172,11 +129,9 @@ class PromptLibrary:
         
         Provide detailed analysis with specific version recommendations and migration steps.
         """
-    
-    @staticmethod
-    def get_risk_assessment_system_prompt() -> str:
-        """Get system prompt for migration risk assessment"""
-        return """You are an expert project management and technical risk assessment specialist 
+
+# Risk assessment system prompt
+_RISK_ASSESSMENT_SYS = """You are an expert project management and technical risk assessment specialist 
         with extensive experience in Python migration projects.
         
         Analyze the migration complexity and provide:
@@ -195,10 +150,8 @@ class PromptLibrary:
         - Business criticality
         """
 
-    @staticmethod
-    def get_pyupgrade_system_prompt(target_version: str = "3.11") -> str:
-        """Get system prompt for PyUpgrade tool analysis"""
-        return f"""You are an expert Python modernization specialist with deep knowledge of Python syntax evolution.
+# PyUpgrade system prompt, filled in with str.format
+_PYUPGRADE_SYS_TEMPLATE = """You are an expert Python modernization specialist with deep knowledge of Python syntax evolution.
         Analyze the provided Python code and identify opportunities to modernize it to Python {target_version} standards.
         
         Focus on these modernization areas:
@@ -236,25 +189,8 @@ class PromptLibrary:
             "summary": "overview of modernizations"
         }}"""
 
-    @staticmethod
-    def get_pyupgrade_user_prompt(code: str, target_version: str) -> str:
-        """Get user prompt for PyUpgrade tool analysis"""
-        return f"""
-        Analyze this Python code for modernization opportunities to Python {target_version}:
-        
-        ```python
-        {code}
-        ```
-        
-        Target Version: Python {target_version}
-        
-        Identify all possible modernizations while maintaining functionality.
-        """
-
-    @staticmethod
-    def get_python2to3_system_prompt() -> str:
-        """Get system prompt for Python 2 to 3 migration analysis"""
-        return """You are an expert Python migration specialist with extensive experience in Python 2 to 3 migrations.
+# Python 2 to 3 migration system prompt
+_PYTHON2TO3_SYS = """You are an expert Python migration specialist with extensive experience in Python 2 to 3 migrations.
         Analyze the provided Python 2 code and identify all issues that need to be fixed for Python 3 compatibility.
         
         Focus on these critical migration areas:
@@ -295,24 +231,8 @@ class PromptLibrary:
             "summary": "migration overview"
         }}"""
 
-    @staticmethod
-    def get_python2to3_user_prompt(code: str) -> str:
-        """Get user prompt for Python 2 to 3 migration analysis"""
-        return f"""
-        Analyze this Python 2 code for migration to Python 3:
-        
-        ```python
-        {code}
-        ```
-        
-        Identify all Python 2 to 3 compatibility issues that need to be fixed.
-        Focus on critical issues that would cause runtime errors in Python 3.
-        """
-
-    @staticmethod
-    def get_modernize_system_prompt() -> str:
-        """Get system prompt for Python 2/3 compatibility modernization"""
-        return """You are an expert Python compatibility specialist with deep knowledge of Python 2/3 dual compatibility.
+# Python 2/3 compatibility system prompt
+_MODERNIZE_SYS = """You are an expert Python compatibility specialist with deep knowledge of Python 2/3 dual compatibility.
         Analyze the provided Python code and modernize it to work on both Python 2.7+ and Python 3.x.
         
         Focus on these compatibility strategies:
@@ -355,6 +275,173 @@ class PromptLibrary:
             "summary": "compatibility overview"
         }}"""
 
+
+# Tool list and instructions closing the migration executor initial prompt
+_MIGRATION_EXECUTOR_TOOLS_FOOTER = """
+AVAILABLE TOOLS:
+1. PyUpgradeTool: Modernizes Python code to newer syntax (f-strings, type hints, etc.)
+2. Python2To3Tool: Migrates Python 2 code to Python 3
+3. ModernizeTool: Creates Python 2/3 compatible code with __future__ imports
+
+INSTRUCTIONS:
+1. Analyze the migration issues systematically
+2. Choose the most appropriate tool(s) for each issue
+3. Apply tools in the correct order (typically: Python2To3Tool first, then PyUpgradeTool, then ModernizeTool if needed)
+4. Focus on compilation errors first, then style improvements
+5. Be precise and methodical - every change should have a clear purpose
+6. After each tool application, the code should be closer to successful compilation
+
+Start by identifying which tool would best address the most critical issues first.
+"""
+
+# Maximum number of serialized prompt payloads kept by _dumps_cached
+_DUMPS_CACHE_SIZE = 128
+
+# Serialized prompt payloads keyed by their frozen content
+_DUMPS_CACHE: "OrderedDict[Any, str]" = OrderedDict()
+
+
+def _freeze(obj: Any) -> Any:
+    """Build a hashable key from a JSON-like value, keeping types so 1, 1.0 and True stay distinct"""
+    if isinstance(obj, dict):
+        return (dict, tuple((_freeze(key), _freeze(value)) for key, value in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return (list, tuple(_freeze(item) for item in obj))
+    return (type(obj), obj)
+
+
+def _dumps_cached(obj: Any) -> str:
+    """Serialize a prompt payload with json.dumps(indent=2), reusing the text for equal content"""
+    key = _freeze(obj)
+    text = _DUMPS_CACHE.get(key)
+    if text is None:
+        text = json.dumps(obj, indent=2)
+        _DUMPS_CACHE[key] = text
+        if len(_DUMPS_CACHE) > _DUMPS_CACHE_SIZE:
+            _DUMPS_CACHE.popitem(last=False)
+    else:
+        _DUMPS_CACHE.move_to_end(key)
+    return text
+
+
+class PromptLibrary:
+    """Centralized prompt library for Python version analysis and migration"""
+    
+    @staticmethod
+    def get_version_detection_system_prompt() -> str:
+        """Get the system prompt for Python version detection"""
+        return _VERSION_DETECTION_SYS
+    
+    @staticmethod
+    def get_version_detection_user_prompt(dependencies: Dict[str, Any], code_samples: list) -> str:
+        """Get the user prompt for Python version detection"""
+        return f"""
+        Please analyze this Python codebase:
+        
+        DEPENDENCIES:
+        {_dumps_cached(dependencies)}
+        
+        CODE SAMPLES:
+        {_dumps_cached(code_samples)}
+        
+        Provide your analysis in the requested JSON format.
+        """
+    
+    @staticmethod
+    def get_migration_analysis_system_prompt(
+        migration_type: str, 
+        current_version: str, 
+        target_version: str,
+        is_python2_migration: bool = False
+    ) -> str:
+        """Get the system prompt for migration issue analysis"""
+        
+        focus_areas = _PY2_FOCUS if is_python2_migration else _PY3_FOCUS
+        issue_type = 'python2_syntax' if is_python2_migration else 'deprecated_feature'
+        
+        return _MIGRATION_ANALYSIS_TEMPLATE.format(
+            migration_type=migration_type,
+            current_version=current_version,
+            target_version=target_version,
+            focus_areas=focus_areas,
+            issue_type=issue_type,
+        )
+    
+    @staticmethod
+    def get_migration_analysis_user_prompt(
+        file_contents: Dict[str, str], 
+        current_version: str, 
+        target_version: str
+    ) -> str:
+        """Get the user prompt for migration issue analysis"""
+        return f"""
+        Analyze these Python files for migration issues:
+        
+        {_dumps_cached(file_contents)}
+        
+        Current Version: {current_version}
+        Target Version: {target_version}
+        """
+    
+    @staticmethod
+    def get_code_review_system_prompt(focus_area: str = "general") -> str:
+        """Get system prompt for general code review tasks"""
+        return _CODE_REVIEW_TEMPLATE.format(focus_area=focus_area)
+    
+    @staticmethod
+    def get_dependency_analysis_system_prompt() -> str:
+        """Get system prompt for dependency compatibility analysis"""
+        return _DEPENDENCY_ANALYSIS_SYS
+    
+    @staticmethod
+    def get_risk_assessment_system_prompt() -> str:
+        """Get system prompt for migration risk assessment"""
+        return _RISK_ASSESSMENT_SYS
+
+    @staticmethod
+    def get_pyupgrade_system_prompt(target_version: str = "3.11") -> str:
+        """Get system prompt for PyUpgrade tool analysis"""
+        return _PYUPGRADE_SYS_TEMPLATE.format(target_version=target_version)
+
+    @staticmethod
+    def get_pyupgrade_user_prompt(code: str, target_version: str) -> str:
+        """Get user prompt for PyUpgrade tool analysis"""
+        return f"""
+        Analyze this Python code for modernization opportunities to Python {target_version}:
+        
+        ```python
+        {code}
+        ```
+        
+        Target Version: Python {target_version}
+        
+        Identify all possible modernizations while maintaining functionality.
+        """
+
+    @staticmethod
+    def get_python2to3_system_prompt() -> str:
+        """Get system prompt for Python 2 to 3 migration analysis"""
+        return _PYTHON2TO3_SYS
+
+    @staticmethod
+    def get_python2to3_user_prompt(code: str) -> str:
+        """Get user prompt for Python 2 to 3 migration analysis"""
+        return f"""
+        Analyze this Python 2 code for migration to Python 3:
+        
+        ```python
+        {code}
+        ```
+        
+        Identify all Python 2 to 3 compatibility issues that need to be fixed.
+        Focus on critical issues that would cause runtime errors in Python 3.
+        """
+
+    @staticmethod
+    def get_modernize_system_prompt() -> str:
+        """Get system prompt for Python 2/3 compatibility modernization"""
+        return _MODERNIZE_SYS
+
     @staticmethod
     def get_modernize_user_prompt(code: str) -> str:
         """Get user prompt for Python 2/3 compatibility modernization"""
@@ -373,7 +460,7 @@ class PromptLibrary:
     def get_migration_executor_initial_prompt(analysis_result) -> str:
         """Get the initial LLM prompt for migration executor based on analysis results."""
         
-        prompt = f"""You are an expert Python migration assistant. Based on the following analysis results, you need to systematically apply migration tools to upgrade the Python project.
+        header = f"""You are an expert Python migration assistant. Based on the following analysis results, you need to systematically apply migration tools to upgrade the Python project.
 
 ANALYSIS RESULTS:
 - Current Python Version: {analysis_result.current_version.detected_version}
@@ -384,42 +471,18 @@ ANALYSIS RESULTS:
 MIGRATION ISSUES DETECTED:
 """
         
-        for i, issue in enumerate(analysis_result.migration_issues, 1):
-            severity = getattr(issue, 'severity', 'unknown')
-            description = getattr(issue, 'description', 'No description')
-            file_path = getattr(issue, 'file_path', 'Unknown file')
-            line_number = getattr(issue, 'line_number', 'Unknown line')
-            
-            prompt += f"{i}. {description}\n"
-            prompt += f"   File: {file_path}, Line: {line_number}, Severity: {severity}\n"
-        
-        prompt += """
-AVAILABLE TOOLS:
-1. PyUpgradeTool: Modernizes Python code to newer syntax (f-strings, type hints, etc.)
-2. Python2To3Tool: Migrates Python 2 code to Python 3
-3. ModernizeTool: Creates Python 2/3 compatible code with __future__ imports
-
-INSTRUCTIONS:
-1. Analyze the migration issues systematically
-2. Choose the most appropriate tool(s) for each issue
-3. Apply tools in the correct order (typically: Python2To3Tool first, then PyUpgradeTool, then ModernizeTool if needed)
-4. Focus on compilation errors first, then style improvements
-5. Be precise and methodical - every change should have a clear purpose
-6. After each tool application, the code should be closer to successful compilation
-
-Start by identifying which tool would best address the most critical issues first.
-"""
-        return prompt
+        issues = ''.join(
+            f"{i}. {getattr(issue, 'description', 'No description')}\n"
+            f"   File: {getattr(issue, 'file_path', 'Unknown file')}, "
+            f"Line: {getattr(issue, 'line_number', 'Unknown line')}, "
+            f"Severity: {getattr(issue, 'severity', 'unknown')}\n"
+            for i, issue in enumerate(analysis_result.migration_issues, 1)
+        )
+        return f"{header}{issues}{_MIGRATION_EXECUTOR_TOOLS_FOOTER}"
 
     @staticmethod
-    def get_migration_executor_agent_prompt_for_file(py_file, code: str, errors: list, iteration: int) -> str:
-        """Create a specific prompt for the agent to work on a file."""
-        
-        # Find errors related to this file
-        file_errors = [
-            error for error in errors 
-            if error.get("file", "").endswith(py_file.name)
-        ]
+    def get_migration_executor_agent_prompt_for_file(py_file, code: str, file_errors: list, iteration: int) -> str:
+        """Create a specific prompt for the agent to work on a file, given the errors reported for that file."""
         
         prompt = f"""You are a Python migration expert. Fix the Python code in file '{py_file.name}' to resolve compilation errors.
 
@@ -498,11 +561,16 @@ class PromptTemplates:
     }
 
 
+def _require_langchain():
+    """Raise ImportError if langchain, needed to build message objects, is not installed"""
+    if SystemMessage is None:
+        raise ImportError("langchain is required to create prompt messages: pip install langchain")
+
+
 # Convenience functions for common prompt combinations
 def create_version_detection_messages(dependencies: Dict[str, Any], code_samples: list):
     """Create complete message chain for version detection"""
-    from langchain.schema import SystemMessage, HumanMessage
-    
+    _require_langchain()
     return [
         SystemMessage(content=PromptLibrary.get_version_detection_system_prompt()),
         HumanMessage(content=PromptLibrary.get_version_detection_user_prompt(dependencies, code_samples))
@@ -515,8 +583,7 @@ def create_migration_analysis_messages(
     target_version: str
 ):
     """Create complete message chain for migration analysis"""
-    from langchain.schema import SystemMessage, HumanMessage
-    
+    _require_langchain()
     is_python2_migration = current_version.startswith('2.')
     migration_type = "Python 2.x to 3.x" if is_python2_migration else f"Python {current_version} to {target_version}"
     
@@ -15,14 +15,35 @@ Author: Your AI Python Upgrade Assistant
 import os
 import sys
 import ast
+import asyncio
+import hashlib
 import re
 import json
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from datetime import datetime
 import logging
+import warnings
+from collections import Counter
+from itertools import islice
+
+try:
+    # orjson: optional fast JSON serializer
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # TOML parser: built in from Python 3.11, the tomli backport before that
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
 
 # Load configuration from centralized manager
 from .config_manager import load_config
@@ -31,12 +52,14 @@ from .config_manager import load_config
 try:
     from ..llm_manager import LLMManager
     from .prompt_library import PromptLibrary, create_version_detection_messages, create_migration_analysis_messages
+    from .analysis_cache import AnalysisCache, make_key
 except ImportError:
     # Fallback for direct execution
     sys.path.append(str(Path(__file__).parent.parent))
     from llm_manager import LLMManager
     sys.path.append(str(Path(__file__).parent))
     from prompt_library import PromptLibrary, create_version_detection_messages, create_migration_analysis_messages
+    from analysis_cache import AnalysisCache, make_key
 from langchain.schema import HumanMessage, SystemMessage
 
 # Load configuration from both .env.keys and .env.config
@@ -53,6 +76,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Runs of non-ASCII characters, stripped when the console cannot encode them
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7F]+')
+
 # Helper function to safely log with emojis
 def safe_log(level, message):
     """Safely log messages, falling back to ASCII if Unicode fails"""
@@ -60,11 +86,333 @@ def safe_log(level, message):
         getattr(logger, level)(message)
     except UnicodeEncodeError:
         # Remove emojis and special characters for Windows compatibility
-        import re
-        ascii_message = re.sub(r'[^\x00-\x7F]+', '', message)
+        ascii_message = _NON_ASCII_RE.sub('', message)
         getattr(logger, level)(ascii_message)
 
 
+# Issue severities from most to least severe; unknown severities sort last
+SEVERITY_RANK = {'critical': 0, 'major': 1, 'minor': 2, 'info': 3}
+
+# Bump when the syntax scan or the prompts change, so cached results are not reused
+_ANALYSIS_CACHE_VERSION = "1"
+
+# Syntax scans depend on the grammar of the interpreter that parses the files
+_INTERPRETER_VERSION = f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+# Python 2.x indicators (if found, likely Python 2.x codebase)
+_PYTHON2_INDICATORS = [
+    'print ', 'print\t', 'print\n',  # print statements (not function calls)
+    'raw_input(', 'xrange(', 'unicode(',
+    '.iterkeys()', '.itervalues()', '.iteritems()',
+    'file(', 'execfile(', 'reload(',
+    'import ConfigParser', 'import cPickle', 'import urllib2',
+    '__nonzero__', 'has_key(', '.encode("string-escape")'
+]
+
+# Version-specific features to look for (Python 3.x)
+_FEATURE_VERSIONS = {
+    (3, 0): ['print(', 'input(', 'range('],  # Python 3 basics
+    (3, 6): ['f"', "f'"],  # f-strings
+    (3, 8): [':='],  # Walrus operator
+    (3, 9): ['dict | dict', 'list[', 'dict[', 'tuple['],  # Dict union, generic types
+    (3, 10): ['match ', 'case '],  # Match-case statements
+    (3, 11): ['except*'],  # Exception groups
+    (3, 12): ['type ', '@override']  # Type statement, override decorator
+}
+
+# Version hints in setup.py, runtime.txt and requirement specifiers
+_PYTHON_REQUIRES_RE = re.compile(r"python_requires\s*=\s*['\"]([^'\"]+)['\"]")
+_RUNTIME_VERSION_RE = re.compile(r'python-(\d+\.\d+(?:\.\d+)?)')
+_VERSION_NUMBER_RE = re.compile(r'(\d+\.\d+(?:\.\d+)?)')
+
+# A print statement (not a call), confirming the 'print ' Python 2.x indicator
+_PRINT_STATEMENT_RE = re.compile(r'\bprint\s+[^(]')
+
+# Bytes read from the start of a file to find its shebang line
+_SHEBANG_READ_SIZE = 256
+
+# Interpreter version and bare 'python' in a shebang line
+_SHEBANG_VERSION_RE = re.compile(rb'python(\d+(?:\.\d+)?)')
+_PLAIN_PYTHON_SHEBANG_RE = re.compile(rb'\bpython\b(?!\d)')
+
+# Fixed recommendations: Python 2.x specifics, then general advice for
+# Python 2.x migrations and for Python 3.x upgrades
+_PY2_SPECIFIC_TIPS = (
+    "🛠️ Consider using 2to3 tool for initial automated conversion",
+    "🔧 Plan for extensive manual code review and testing",
+    "📝 Update all print statements to print() function calls",
+    "🔤 Review string/unicode handling throughout codebase",
+    "📊 Test integer division behavior (/ vs //)",
+    "📦 Update all import statements for Python 3 compatibility",
+    "🧪 Set up dual Python 2/3 testing during transition (if needed)"
+)
+_PY2_MIGRATION_TIPS = (
+    "🧪 Set up comprehensive testing - Python 2→3 migrations are complex",
+    "📦 Verify ALL dependencies support Python 3",
+    "💾 Create full backup and consider feature freeze during migration",
+    "📚 Review Python 3 migration guide and breaking changes documentation",
+    "⏰ Plan for extended testing and debugging period"
+)
+_PY3_UPGRADE_TIPS = (
+    "🧪 Set up comprehensive testing before migration",
+    "📦 Check all dependencies for target version compatibility",
+    "🔄 Consider incremental migration if jumping multiple versions",
+    "💾 Create full backup before starting migration",
+    "📚 Review Python version changelog for breaking changes"
+)
+
+# Risk and effort levels by issue counts: (critical, major, minor) thresholds and the
+# level of the first row with any count above its threshold; _NEVER leaves a count out
+_NEVER = float('inf')
+_PY2_RISK_LEVELS = (
+    (3, 15, _NEVER, "very_high"),
+    (0, 5, _NEVER, "high"),
+)
+_PY3_RISK_LEVELS = (
+    (5, _NEVER, _NEVER, "very_high"),
+    (0, 10, _NEVER, "high"),
+    (_NEVER, 0, 20, "medium"),
+)
+_PY2_EFFORT_LEVELS = (
+    (5, 30, _NEVER, "very_high"),
+    (2, 10, _NEVER, "high"),
+)
+_PY3_EFFORT_LEVELS = (
+    (10, 50, _NEVER, "very_high"),
+    (5, 20, _NEVER, "high"),
+    (0, 5, _NEVER, "medium"),
+)
+
+
+def _grade(severity_counts: Dict[str, int], levels: Tuple[Tuple[Any, ...], ...], default: str) -> str:
+    """Return the level of the first row whose thresholds the severity counts exceed, else default"""
+    critical = severity_counts['critical']
+    major = severity_counts['major']
+    minor = severity_counts['minor']
+    for critical_above, major_above, minor_above, level in levels:
+        if critical > critical_above or major > major_above or minor > minor_above:
+            return level
+    return default
+
+
+# Files read by _check_config_files, fingerprinted with the Python sources
+_CONFIG_FILES = ('setup.py', 'pyproject.toml', 'requirements.txt', 'Pipfile', 'runtime.txt')
+
+# Directory names never searched for Python files
+_EXCLUDED_DIRS = frozenset({
+    '.venv', 'venv', '__pycache__', '.git', 'build', 'dist',
+    '.pytest_cache', '.mypy_cache', 'node_modules', '.tox'
+})
+
+# Below this many unscanned files scanning in-process beats starting worker processes
+_PARALLEL_SCAN_MIN_FILES = 32
+
+# Syntax tree node types and the Python version that introduced them
+_NODE_VERSIONS = {
+    'JoinedStr': (3, 6),  # f-strings
+    'NamedExpr': (3, 8),  # Walrus operator
+    'Match': (3, 10),  # Match-case statements
+    'TryStar': (3, 11),  # Exception groups
+    'TypeAlias': (3, 12),  # Type statement
+}
+
+# Python 2.x builtins, methods and modules that still parse as Python 3
+_PYTHON2_CALLS = {'raw_input', 'xrange', 'unicode', 'file', 'execfile', 'reload'}
+_PYTHON2_METHODS = {'iterkeys', 'itervalues', 'iteritems', 'has_key'}
+_PYTHON2_MODULES = {'ConfigParser', 'cPickle', 'urllib2'}
+
+# Calls marking Python 3 code, and builtins subscripted as generic types (3.9+)
+_PYTHON3_CALLS = {'print', 'input', 'range'}
+_GENERIC_BUILTINS = {'list', 'dict', 'tuple'}
+
+
+def _scan_syntax_features(content: str, file_path: Any) -> List[Any]:
+    """
+    Scan one file's source, returning [is_python2, [major, minor] needed].
+    
+    Source that parses with this interpreter is judged by its syntax tree, so
+    strings and comments cannot trigger features; anything else (Python 2.x
+    code, or syntax newer than the interpreter) falls back to substring checks.
+    """
+    try:
+        with warnings.catch_warnings():
+            # Invalid escape sequences and the like are not our concern here
+            warnings.simplefilter('ignore')
+            tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return _scan_syntax_text(content, file_path)
+    return _scan_syntax_tree(tree, file_path)
+
+
+def _scan_syntax_tree(tree: ast.AST, file_path: Any) -> List[Any]:
+    """Find the features used in a parsed file, returning [is_python2, [major, minor] needed]"""
+    max_version_needed = (2, 7)
+    for node in ast.walk(tree):
+        version = _NODE_VERSIONS.get(type(node).__name__)
+        python2 = None
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name):
+                if func.id in _PYTHON2_CALLS:
+                    python2 = f"{func.id}()"
+                elif func.id in _PYTHON3_CALLS:
+                    version = (3, 0)
+            elif isinstance(func, ast.Attribute):
+                if func.attr in _PYTHON2_METHODS:
+                    python2 = f".{func.attr}()"
+                elif func.attr == 'encode' and any(
+                    isinstance(arg, ast.Constant) and arg.value == 'string-escape' for arg in node.args
+                ):
+                    python2 = '.encode("string-escape")'
+        elif isinstance(node, ast.Import):
+            python2 = next((alias.name for alias in node.names if alias.name in _PYTHON2_MODULES), None)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.module.split('.')[0] in _PYTHON2_MODULES:
+                python2 = node.module
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name == '__nonzero__':
+                python2 = node.name
+            elif any(
+                getattr(decorator, 'id', getattr(decorator, 'attr', None)) == 'override'
+                for decorator in node.decorator_list
+            ):
+                version = (3, 12)  # override decorator
+        elif isinstance(node, ast.Subscript):
+            if isinstance(node.value, ast.Name) and node.value.id in _GENERIC_BUILTINS:
+                version = (3, 9)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            if isinstance(node.left, ast.Dict) and isinstance(node.right, ast.Dict):
+                version = (3, 9)  # Dict union
+        
+        if python2:
+            logger.debug(f"Found Python 2.x indicator '{python2}' in {file_path}")
+            return [True, [2, 7]]
+        if version and version > max_version_needed:
+            max_version_needed = version
+            logger.debug(f"Found {type(node).__name__} in {file_path}, needs Python {version[0]}.{version[1]}+")
+    return [False, list(max_version_needed)]
+
+
+def _scan_syntax_text(content: str, file_path: Any) -> List[Any]:
+    """Scan source that does not parse by substrings, returning [is_python2, [major, minor] needed]"""
+    # Check for Python 2.x indicators first
+    for indicator in _PYTHON2_INDICATORS:
+        if indicator in content:
+            # Additional validation for print statements (avoid false positives)
+            if indicator.startswith('print ') and not _PRINT_STATEMENT_RE.search(content):
+                continue
+            logger.debug(f"Found Python 2.x indicator '{indicator}' in {file_path}")
+            return [True, [2, 7]]
+    
+    # Not Python 2.x, so check for Python 3.x features
+    max_version_needed = (2, 7)
+    for version, features in _FEATURE_VERSIONS.items():
+        for feature in features:
+            if feature in content:
+                if version > max_version_needed:
+                    max_version_needed = version
+                    logger.debug(f"Found {feature} in {file_path}, needs Python {version[0]}.{version[1]}+")
+    return [False, list(max_version_needed)]
+
+
+def _decode_source(data: bytes) -> str:
+    """
+    Decode file bytes as UTF-8 text mode would, with universal newlines.
+    
+    Undecodable bytes (Latin-1 sources are common in Python 2.x code) become
+    U+FFFD instead of failing, so the file's code is still scanned and sent.
+    """
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _scan_syntax_source(item: Tuple[str, bytes]) -> List[Any]:
+    """
+    Decode and scan one file; the process pool entry point for _analyze_syntax_features.
+    
+    Args:
+        item: (file path, raw file bytes)
+    
+    Returns:
+        The file's scan result
+    """
+    file_path, data = item
+    return _scan_syntax_features(_decode_source(data), file_path)
+
+
+# Decoder for JSON values embedded in LLM replies
+_JSON_DECODER = json.JSONDecoder()
+
+# Fastest available parser for replies that are pure JSON
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Reply metadata values meaning the model stopped at its output token limit
+# (OpenAI/Groq finish_reason, Anthropic/Bedrock stop_reason, Gemini finish_reason)
+_TRUNCATED_STOP_REASONS = {'length', 'max_tokens', 'MAX_TOKENS'}
+
+
+def _parse_json_reply(text: str, opener: str) -> Any:
+    """
+    Parse an LLM reply as JSON, or else the first JSON value starting with opener inside it.
+    
+    Replies often wrap the JSON in prose or a ```json fence. Candidates are decoded
+    in place with raw_decode, so brackets inside strings and nested values are
+    handled without a backtracking regex over the whole reply.
+    
+    Raises:
+        ValueError: If no JSON value could be parsed
+    """
+    # Deeply nested input fails with RecursionError rather than a decode error
+    try:
+        return _json_loads(text)
+    except (ValueError, RecursionError):
+        pass
+    
+    # A fenced block is the likeliest place for the answer, so it is tried first
+    fence = text.find("```json")
+    for begin in ((fence, 0) if fence != -1 else (0,)):
+        start = text.find(opener, begin)
+        while start != -1:
+            try:
+                return _JSON_DECODER.raw_decode(text, start)[0]
+            except (json.JSONDecodeError, RecursionError):
+                start = text.find(opener, start + 1)
+    raise ValueError(f"no JSON value starting with '{opener}' found in response: {text[:200]}...")
+
+
+def _reply_truncated(response: Any) -> bool:
+    """Check whether the LLM stopped a reply because it hit its output token limit."""
+    metadata = getattr(response, 'response_metadata', None) or {}
+    return any(
+        metadata.get(key) in _TRUNCATED_STOP_REASONS
+        for key in ('finish_reason', 'stop_reason')
+    )
+
+
+def _salvage_json_objects(text: str) -> List[Dict[str, Any]]:
+    """
+    Decode the complete objects at the start of a JSON array cut off mid-reply.
+    
+    Decoding stops at the first item that is not a complete object, so the
+    partial issue the reply ended in is dropped.
+    """
+    fence = text.find("```json")
+    start = text.find('[', fence if fence != -1 else 0)
+    items = []
+    if start == -1:
+        return items
+    pos = start + 1
+    while True:
+        while pos < len(text) and text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(text) or text[pos] != '{':
+            return items
+        try:
+            item, pos = _JSON_DECODER.raw_decode(text, pos)
+        except (json.JSONDecodeError, RecursionError):
+            return items
+        items.append(item)
+
+
 @dataclass
 class PythonVersionInfo:
     """Information about Python version requirements and compatibility"""
@@ -92,6 +440,16 @@ class MigrationIssue:
     suggested_fix: Optional[str] = None
     explanation: Optional[str] = None
     ai_confidence: float = 0.0
+    
+    def __post_init__(self):
+        # Sort key precomputed once; a plain attribute, so to_dict() output is unchanged
+        self._sev_rank = SEVERITY_RANK.get(self.severity, len(SEVERITY_RANK))
+
+
+# Field names serialized by AnalysisResult.to_dict, read once instead of per object;
+# the fields are plain values, so asdict()'s recursive deep copy is not needed
+_VERSION_INFO_FIELDS = tuple(f.name for f in fields(PythonVersionInfo))
+_ISSUE_FIELDS = tuple(f.name for f in fields(MigrationIssue))
 
 
 @dataclass
@@ -109,28 +467,83 @@ class AnalysisResult:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
+        current_version = {name: getattr(self.current_version, name) for name in _VERSION_INFO_FIELDS}
+        current_version['evidence'] = list(current_version['evidence'])
         return {
             'project_path': self.project_path,
-            'current_version': asdict(self.current_version),
+            'current_version': current_version,
             'target_version': self.target_version,
             'total_files_analyzed': self.total_files_analyzed,
-            'migration_issues': [asdict(issue) for issue in self.migration_issues],
+            'migration_issues': [
+                {name: getattr(issue, name) for name in _ISSUE_FIELDS}
+                for issue in self.migration_issues
+            ],
             'dependency_issues': self.dependency_issues,
             'risk_assessment': self.risk_assessment,
             'recommendations': self.recommendations,
             'analysis_timestamp': self.analysis_timestamp
         }
+    
+    def dump_bytes(self) -> bytes:
+        """Serialize to indented UTF-8 JSON, with orjson when it is installed"""
+        data = self.to_dict()
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            except TypeError:
+                # Values orjson rejects, such as integers beyond 64 bits, go through json
+                pass
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisResult':
+        """Rebuild a result from to_dict() output"""
+        return cls(
+            project_path=data['project_path'],
+            current_version=PythonVersionInfo(**data['current_version']),
+            target_version=data['target_version'],
+            total_files_analyzed=data['total_files_analyzed'],
+            migration_issues=[MigrationIssue(**issue) for issue in data['migration_issues']],
+            dependency_issues=data['dependency_issues'],
+            risk_assessment=data['risk_assessment'],
+            recommendations=data['recommendations'],
+            analysis_timestamp=data['analysis_timestamp']
+        )
 
 
 class PythonVersionAnalyzer:
     """AI-powered Python version analyzer using LLM for intelligent assessment"""
     
-    def __init__(self, target_version: Optional[str] = None):
+    def __init__(self, target_version: Optional[str] = None, use_analysis_cache: bool = True):
         """Initialize the analyzer with LLM support"""
-        self.llm_manager = LLMManager()
+        self.llm_manager = LLMManager.instance()
         self.target_version = target_version or self._load_target_version_from_env()
         self.python_files = []
         self.analysis_cache = {}
+        # LLM calls that failed during the current analysis run; a run with failures
+        # is incomplete, so its result is not cached for the whole project
+        self._llm_failures = 0
+        # Python files found under each project path, so the analysis steps share one scan
+        self._discovered_files: Dict[Path, List[Path]] = {}
+        # File bytes read during an analysis run; the syntax scan, shebang check,
+        # code samples and migration batches all sample the first files found
+        self._source_cache: Dict[Path, bytes] = {}
+        # Files sent to the LLM per migration analysis call, and the cap on files analyzed;
+        # the model's output token limit must fit the issues of a whole batch
+        self.analysis_batch_size = max(1, int(os.getenv("BATCH_SIZE_FOR_AI_ANALYSIS", "5")))
+        self.max_files_to_analyze = int(os.getenv("MAX_FILES_TO_ANALYZE", "20"))
+        # Files sampled by the syntax feature scan; large samples are scanned in parallel
+        self.max_files_to_scan = int(os.getenv("MAX_FILES_FOR_SYNTAX_SCAN", "10"))
+        # Migration analysis batches in flight against the LLM at once
+        self.llm_concurrency = max(1, int(os.getenv("ANALYZER_LLM_CONCURRENCY", "8")))
+        # Syntax scans and LLM responses persisted by content, so unchanged files
+        # and identical prompts skip all work on later runs
+        self.result_cache: Optional[AnalysisCache] = None
+        if use_analysis_cache and os.getenv("ENABLE_ANALYSIS_CACHE", "true").lower() == "true":
+            try:
+                self.result_cache = AnalysisCache(os.getenv("ANALYSIS_CACHE_PATH", ".analysis_cache.db"))
+            except Exception as e:
+                logger.warning(f"⚠️ Analysis cache unavailable, continuing without it: {e}")
         
         safe_log("info", f"🚀 Python Version Analyzer initialized")
         safe_log("info", f"🎯 Target version: {self.target_version}")
@@ -143,23 +556,30 @@ class PythonVersionAnalyzer:
         return target_version
     
     def discover_python_files(self, project_path: Path) -> List[Path]:
-        """Discover all Python files in the project"""
+        """Discover all Python files in the project (scanned once per project path)"""
+        cached = self._discovered_files.get(project_path)
+        if cached is not None:
+            return list(cached)
+        
         python_files = []
         
-        # Patterns to exclude
-        exclude_patterns = {
-            '.venv', 'venv', '__pycache__', '.git', 'build', 'dist', 
-            '.pytest_cache', '.mypy_cache', 'node_modules', '.tox'
-        }
-        
-        for file_path in project_path.rglob("*.py"):
-            # Skip excluded directories
-            if any(pattern in file_path.parts for pattern in exclude_patterns):
-                continue
-            python_files.append(file_path)
+        # Walk with os.scandir in Path.rglob order, pruning excluded directories
+        # before descending into them instead of filtering every file found below
+        stack = [os.fspath(project_path)]
+        while stack:
+            subdirs = []
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _EXCLUDED_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(".py") and not entry.is_dir():
+                        python_files.append(Path(entry.path))
+            stack.extend(reversed(subdirs))
         
+        self._discovered_files[project_path] = python_files
         safe_log("info", f"🔍 Discovered {len(python_files)} Python files")
-        return python_files
+        return list(python_files)
     
     def detect_current_python_version(self, project_path: Path) -> PythonVersionInfo:
         """Detect the current Python version requirements using multiple methods"""
@@ -240,7 +660,7 @@ class PythonVersionAnalyzer:
             content = f.read()
         
         # Look for python_requires
-        match = re.search(r"python_requires\s*=\s*['\"]([^'\"]+)['\"]", content)
+        match = _PYTHON_REQUIRES_RE.search(content)
         if match:
             return self._extract_version_from_specifier(match.group(1))
         
@@ -248,17 +668,12 @@ class PythonVersionAnalyzer:
     
     def _parse_pyproject_toml(self, file_path: Path) -> Optional[str]:
         """Parse pyproject.toml for Python version"""
-        try:
-            import tomli
-        except ImportError:
-            try:
-                import tomllib as tomli  # Python 3.11+ built-in
-            except ImportError:
-                logger.warning("📦 tomli/tomllib not available, cannot parse pyproject.toml")
-                return None
+        if tomllib is None:
+            logger.warning("📦 tomli/tomllib not available, cannot parse pyproject.toml")
+            return None
         
         with open(file_path, 'rb') as f:
-            data = tomli.load(f)
+            data = tomllib.load(f)
         
         # Check different locations
         if 'project' in data and 'requires-python' in data['project']:
@@ -278,17 +693,12 @@ class PythonVersionAnalyzer:
     
     def _parse_pipfile(self, file_path: Path) -> Optional[str]:
         """Parse Pipfile for Python version"""
-        try:
-            import tomli
-        except ImportError:
-            try:
-                import tomllib as tomli  # Python 3.11+ built-in
-            except ImportError:
-                logger.warning("📦 tomli/tomllib not available, cannot parse Pipfile")
-                return None
+        if tomllib is None:
+            logger.warning("📦 tomli/tomllib not available, cannot parse Pipfile")
+            return None
         
         with open(file_path, 'rb') as f:
-            data = tomli.load(f)
+            data = tomllib.load(f)
         
         if 'requires' in data and 'python_version' in data['requires']:
             return data['requires']['python_version']
@@ -300,7 +710,7 @@ class PythonVersionAnalyzer:
         with open(file_path, 'r') as f:
             content = f.read().strip()
         
-        match = re.search(r'python-(\d+\.\d+(?:\.\d+)?)', content)
+        match = _RUNTIME_VERSION_RE.search(content)
         if match:
             return match.group(1)
         
@@ -309,7 +719,7 @@ class PythonVersionAnalyzer:
     def _extract_version_from_specifier(self, specifier: str) -> Optional[str]:
         """Extract version number from requirement specifier like '>=3.8' """
         # Remove common operators and extract version
-        version_match = re.search(r'(\d+\.\d+(?:\.\d+)?)', specifier)
+        version_match = _VERSION_NUMBER_RE.search(specifier)
         if version_match:
             return version_match.group(1)
         return None
@@ -318,62 +728,37 @@ class PythonVersionAnalyzer:
         """Analyze code syntax to determine minimum Python version"""
         python_files = self.discover_python_files(project_path)
         max_version_needed = (2, 7)  # Start with Python 2.7 as minimum
-        detected_python2 = False
-        
-        # Python 2.x indicators (if found, likely Python 2.x codebase)
-        python2_indicators = [
-            'print ', 'print\t', 'print\n',  # print statements (not function calls)
-            'raw_input(', 'xrange(', 'unicode(',
-            '.iterkeys()', '.itervalues()', '.iteritems()',
-            'file(', 'execfile(', 'reload(',
-            'import ConfigParser', 'import cPickle', 'import urllib2',
-            '__nonzero__', 'has_key(', '.encode("string-escape")'
-        ]
-        
-        # Version-specific features to look for (Python 3.x)
-        feature_versions = {
-            (3, 0): ['print(', 'input(', 'range('],  # Python 3 basics
-            (3, 6): ['f"', "f'"],  # f-strings
-            (3, 8): [':='],  # Walrus operator
-            (3, 9): ['dict | dict', 'list[', 'dict[', 'tuple['],  # Dict union, generic types
-            (3, 10): ['match ', 'case '],  # Match-case statements
-            (3, 11): ['except*'],  # Exception groups
-            (3, 12): ['type ', '@override']  # Type statement, override decorator
-        }
         
-        for file_path in python_files[:10]:  # Sample first 10 files for performance
+        # Read the sampled files and look up their cached scans
+        scans = []
+        for file_path in python_files[:self.max_files_to_scan]:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Check for Python 2.x indicators first
-                for indicator in python2_indicators:
-                    if indicator in content:
-                        # Additional validation for print statements (avoid false positives)
-                        if indicator.startswith('print '):
-                            # Check if it's really a print statement, not a function call
-                            if re.search(r'\bprint\s+[^(]', content):
-                                detected_python2 = True
-                                max_version_needed = (2, 7)
-                                logger.debug(f"Found Python 2.x indicator '{indicator}' in {file_path}")
-                                break
-                        else:
-                            detected_python2 = True
-                            max_version_needed = (2, 7)
-                            logger.debug(f"Found Python 2.x indicator '{indicator}' in {file_path}")
-                            break
-                
-                # If not Python 2.x, check for Python 3.x features
-                if not detected_python2:
-                    for version, features in feature_versions.items():
-                        for feature in features:
-                            if feature in content:
-                                if version > max_version_needed:
-                                    max_version_needed = version
-                                    logger.debug(f"Found {feature} in {file_path}, needs Python {version[0]}.{version[1]}+")
-                
+                data = self._read_source(file_path)
             except Exception as e:
                 logger.debug(f"Could not analyze {file_path}: {e}")
+                continue
+            key = make_key("syntax", _ANALYSIS_CACHE_VERSION, _INTERPRETER_VERSION, hashlib.sha256(data).digest())
+            cached = self._cache_get(key)
+            scans.append([key, cached, (str(file_path), data)])
+            # A cached Python 2.x file settles the answer; later files cannot change it
+            if cached is not None and cached[0]:
+                break
+        
+        # Scan the rest; the indicator checks are CPU bound, so large samples
+        # are spread across processes
+        misses = [scan for scan in scans if scan[1] is None]
+        for scan, result in zip(misses, self._scan_syntax_sources([scan[2] for scan in misses])):
+            scan[1] = result
+            self._cache_put(scan[0], result)
+        
+        for _, result, _ in scans:
+            is_python2, version = result
+            
+            # A Python 2.x file settles the answer; later files cannot change it
+            if is_python2:
+                max_version_needed = (2, 7)
+                break
+            max_version_needed = max(max_version_needed, tuple(version))
         
         # Return the detected version
         if max_version_needed >= (2, 7):
@@ -381,20 +766,37 @@ class PythonVersionAnalyzer:
         
         return None
     
+    def _scan_syntax_sources(self, items: List[Tuple[str, bytes]]) -> List[List[Any]]:
+        """Scan (file path, bytes) items, in worker processes when there are enough of them"""
+        workers = min(os.cpu_count() or 1, len(items))
+        if workers > 1 and len(items) >= _PARALLEL_SCAN_MIN_FILES:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(
+                        _scan_syntax_source, items, chunksize=-(-len(items) // (workers * 4))
+                    ))
+            except BrokenProcessPool as e:
+                logger.warning(f"⚠️ Syntax scan workers failed ({e}), scanning in-process")
+        return [_scan_syntax_source(item) for item in items]
+    
     def _check_shebang_lines(self, project_path: Path) -> Optional[str]:
         """Check shebang lines for Python version hints"""
         python_files = self.discover_python_files(project_path)
         
         for file_path in python_files[:5]:  # Check first few files
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    first_line = f.readline().strip()
+                # Only the first line matters; read a short binary head instead of decoding the file
+                head = self._source_cache.get(file_path)
+                if head is None:
+                    with open(file_path, 'rb') as f:
+                        head = f.read(_SHEBANG_READ_SIZE)
+                first_line = (head[:_SHEBANG_READ_SIZE].splitlines() or [b''])[0].strip()
                 
-                if first_line.startswith('#!') and 'python' in first_line:
+                if first_line.startswith(b'#!') and b'python' in first_line:
                     # Extract version from shebang like #!/usr/bin/python2.7 or #!/usr/bin/python3.9
-                    version_match = re.search(r'python(\d+(?:\.\d+)?)', first_line)
+                    version_match = _SHEBANG_VERSION_RE.search(first_line)
                     if version_match:
-                        version = version_match.group(1)
+                        version = version_match.group(1).decode('ascii')
                         # Handle cases like 'python2' -> '2.7', 'python3' -> '3.0'
                         if version == '2':
                             return '2.7'
@@ -404,7 +806,7 @@ class PythonVersionAnalyzer:
                             return version
                     
                     # Check for plain 'python' which might indicate Python 2.x in older systems
-                    if re.search(r'\bpython\b(?!\d)', first_line):
+                    if _PLAIN_PYTHON_SHEBANG_RE.search(first_line):
                         logger.debug(f"Found plain 'python' shebang in {file_path}, might be Python 2.x")
                         
             except Exception as e:
@@ -412,6 +814,56 @@ class PythonVersionAnalyzer:
         
         return None
     
+    def _read_source(self, file_path: Path) -> bytes:
+        """Read a file's bytes, once per analysis run"""
+        data = self._source_cache.get(file_path)
+        if data is None:
+            data = self._source_cache[file_path] = file_path.read_bytes()
+        return data
+    
+    def _read_text(self, file_path: Path) -> str:
+        """Read a file as UTF-8 text, as text mode would, with universal newlines"""
+        return _decode_source(self._read_source(file_path))
+    
+    def _cache_get(self, key: bytes) -> Optional[Any]:
+        """Look up a persisted analysis result; None on a miss or when caching is off"""
+        return self.result_cache.get(key) if self.result_cache is not None else None
+    
+    def _cache_put(self, key: bytes, value: Any):
+        """Persist an analysis result when caching is on"""
+        if self.result_cache is not None:
+            self.result_cache.put(key, value)
+    
+    def _llm_cache_key(self, kind: str, *parts: str) -> bytes:
+        """Key an LLM response on the prompt inputs and the provider/models that answer it"""
+        provider = json.dumps(self.llm_manager.get_provider_info(), sort_keys=True, default=str)
+        return make_key(kind, _ANALYSIS_CACHE_VERSION, provider, *parts)
+    
+    def _project_cache_key(self, project_path: Path, python_files: List[Path]) -> Optional[bytes]:
+        """
+        Key a whole project's analysis on the path, size and mtime of every file it reads.
+        
+        Stats are cheap next to reading and hashing file contents, so an unchanged
+        project is recognized without opening a single file. Returns None if a
+        file vanished while being fingerprinted.
+        """
+        config_files = [project_path / name for name in _CONFIG_FILES]
+        fingerprint = hashlib.blake2b()
+        try:
+            for file_path in sorted(python_files + [path for path in config_files if path.exists()]):
+                stat = file_path.stat()
+                fingerprint.update(
+                    f"{file_path.relative_to(project_path)}\0{stat.st_mtime_ns}\0{stat.st_size}\0".encode('utf-8', 'surrogateescape')
+                )
+        except OSError as e:
+            logger.debug(f"Could not fingerprint {project_path}: {e}")
+            return None
+        settings = f"{self.max_files_to_scan}:{self.max_files_to_analyze}:{self.analysis_batch_size}"
+        return self._llm_cache_key(
+            "project", _INTERPRETER_VERSION, str(project_path), self.target_version, settings,
+            fingerprint.hexdigest()
+        )
+    
     def _ai_version_detection(self, project_path: Path) -> Optional[Dict[str, Any]]:
         """Use AI to analyze the codebase and recommend Python version"""
         try:
@@ -419,6 +871,14 @@ class PythonVersionAnalyzer:
             code_samples = self._get_code_samples(project_path)
             dependencies = self._get_dependencies(project_path)
             
+            cache_key = self._llm_cache_key(
+                "version_detection", json.dumps([dependencies, code_samples], sort_keys=True)
+            )
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"🤖 AI Analysis (cached): {cached.get('analysis', 'No detailed analysis')}")
+                return cached
+            
             # Create AI prompt for version analysis using prompt library
             llm = self.llm_manager.get_llm()
             messages = create_version_detection_messages(dependencies, code_samples)
@@ -427,46 +887,42 @@ class PythonVersionAnalyzer:
             
             # Parse AI response
             try:
-                # First try direct JSON parsing
-                ai_result = json.loads(response.content)
-                logger.info(f"🤖 AI Analysis: {ai_result.get('analysis', 'No detailed analysis')}")
-                return ai_result
-            except json.JSONDecodeError:
-                # Try to extract JSON from text response
-                try:
-                    import re
-                    # Look for JSON block in the response
-                    json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-                    if json_match:
-                        ai_result = json.loads(json_match.group())
-                        logger.info(f"🤖 AI Analysis (extracted): {ai_result.get('analysis', 'No detailed analysis')}")
-                        return ai_result
-                    else:
-                        logger.warning(f"⚠️ Could not find JSON in AI response: {response.content[:200]}...")
-                        return None
-                except json.JSONDecodeError as e:
-                    logger.warning(f"⚠️ Could not parse AI response as JSON: {e}")
-                    logger.debug(f"Response content: {response.content[:500]}...")
-                    return None
+                ai_result = _parse_json_reply(response.content, '{')
+            except ValueError as e:
+                logger.warning(f"⚠️ Could not parse AI response as JSON: {e}")
+                logger.debug(f"Response content: {response.content[:500]}...")
+                self._llm_failures += 1
+                return None
+            logger.info(f"🤖 AI Analysis: {ai_result.get('analysis', 'No detailed analysis')}")
+            self._cache_put(cache_key, ai_result)
+            return ai_result
                 
         except Exception as e:
             logger.error(f"❌ AI analysis failed: {e}")
+            self._llm_failures += 1
             return None
     
     def _get_code_samples(self, project_path: Path, max_samples: int = 5) -> List[Dict[str, str]]:
         """Get representative code samples from the project"""
         python_files = self.discover_python_files(project_path)
         samples = []
+        seen = set()
         
-        for file_path in python_files[:max_samples]:
+        for file_path in python_files:
+            if len(samples) >= max_samples:
+                break
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = self._read_text(file_path)
                 
                 # Get first 50 lines or 2000 characters, whichever is smaller
                 lines = content.splitlines()[:50]
                 sample_content = '\n'.join(lines)[:2000]
                 
+                # Empty package markers and copies of files already sampled tell the LLM nothing
+                if not sample_content.strip() or sample_content in seen:
+                    continue
+                seen.add(sample_content)
+                
                 samples.append({
                     'file': str(file_path.relative_to(project_path)),
                     'content': sample_content
@@ -509,99 +965,162 @@ class PythonVersionAnalyzer:
         logger.info(f"🔍 Analyzing migration issues from Python {current_version} to {self.target_version}")
         
         # Analyze files in batches for better performance
-        batch_size = 5
-        for i in range(0, min(len(python_files), 20), batch_size):  # Limit to first 20 files
-            batch_files = python_files[i:i+batch_size]
-            batch_issues = self._analyze_file_batch(batch_files, current_version, project_path)
-            issues.extend(batch_issues)
+        batch_size = self.analysis_batch_size
+        files_to_analyze = python_files[:self.max_files_to_analyze]
+        batches = [
+            self._prepare_file_batch(files_to_analyze[i:i+batch_size], current_version, project_path)
+            for i in range(0, len(files_to_analyze), batch_size)
+        ]
+        
+        # Batches without a cached answer are sent to the LLM concurrently
+        pending = [batch for batch in batches if batch is not None and batch[2] is None]
+        if pending:
+            logger.info(f"🤖 Sending {len(pending)} migration analysis batches "
+                        f"(max {self.llm_concurrency} at a time)...")
+        try:
+            responses = asyncio.run(self._invoke_llm_batch([messages for _, messages, _ in pending]))
+        except Exception as e:
+            responses = [e] * len(pending)
+        responses = iter(responses)
+        
+        for batch in batches:
+            if batch is None:
+                continue
+            cache_key, _, cached = batch
+            if cached is not None:
+                issues.extend(self._issues_from_data(cached))
+                continue
+            response = next(responses)
+            if isinstance(response, Exception):
+                logger.error(f"❌ Migration analysis failed: {response}")
+                self._llm_failures += 1
+                continue
+            issues.extend(self._parse_migration_response(
+                response.content, cache_key, _reply_truncated(response)
+            ))
         
         logger.info(f"🚨 Found {len(issues)} potential migration issues")
         return issues
     
+    async def _invoke_llm_batch(self, messages_list: List[List[Any]]) -> List[Any]:
+        """Invoke the LLM on several prompts with bounded concurrency; failed calls return their exception."""
+        if not messages_list:
+            return []
+        llm = self.llm_manager.get_llm()
+        return await llm.abatch(
+            messages_list,
+            config={"max_concurrency": self.llm_concurrency},
+            return_exceptions=True
+        )
+    
     def _analyze_file_batch(self, files: List[Path], current_version: str, project_path: Path) -> List[MigrationIssue]:
         """Analyze a batch of files for migration issues"""
         try:
-            # Prepare code content for analysis
-            file_contents = {}
-            for file_path in files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    file_contents[str(file_path.relative_to(project_path))] = content[:5000]  # Limit content size
-                except Exception as e:
-                    logger.debug(f"Could not read {file_path}: {e}")
-            
-            if not file_contents:
+            batch = self._prepare_file_batch(files, current_version, project_path)
+            if batch is None:
                 return []
+            cache_key, messages, cached = batch
+            if cached is not None:
+                return self._issues_from_data(cached)
             
-            # AI prompt for migration analysis using prompt library
-            llm = self.llm_manager.get_llm()
-            messages = create_migration_analysis_messages(file_contents, current_version, self.target_version)
-            
-            response = llm.invoke(messages)
-            
-            # Parse AI response
-            try:
-                # First try direct JSON parsing
-                issues_data = json.loads(response.content)
-                issues = []
-                
-                for issue_data in issues_data:
-                    issue = MigrationIssue(
-                        file_path=issue_data.get('file_path', ''),
-                        line_number=issue_data.get('line_number', 0),
-                        issue_type=issue_data.get('issue_type', 'unknown'),
-                        severity=issue_data.get('severity', 'info'),
-                        description=issue_data.get('description', ''),
-                        code_snippet=issue_data.get('code_snippet', ''),
-                        suggested_fix=issue_data.get('suggested_fix'),
-                        explanation=issue_data.get('explanation'),
-                        ai_confidence=issue_data.get('ai_confidence', 0.0)
-                    )
-                    issues.append(issue)
-                
-                return issues
-                
-            except json.JSONDecodeError as e:
-                # Try to extract JSON array from text response
-                try:
-                    import re
-                    # Look for JSON array in the response (improved regex)
-                    # First try to find complete JSON array
-                    json_match = re.search(r'```json\s*(\[.*?\])\s*```', response.content, re.DOTALL)
-                    if not json_match:
-                        # Fallback to simple array pattern
-                        json_match = re.search(r'(\[.*?\])', response.content, re.DOTALL)
-                    
-                    if json_match:
-                        json_text = json_match.group(1) if json_match.groups() else json_match.group()
-                        issues_data = json.loads(json_text)
-                        issues = []
-                        for issue_data in issues_data:
-                            issue = MigrationIssue(
-                                file_path=issue_data.get('file_path', ''),
-                                line_number=issue_data.get('line_number', 0),
-                                issue_type=issue_data.get('issue_type', 'unknown'),
-                                severity=issue_data.get('severity', 'info'),
-                                description=issue_data.get('description', ''),
-                                code_snippet=issue_data.get('code_snippet', ''),
-                                suggested_fix=issue_data.get('suggested_fix'),
-                                explanation=issue_data.get('explanation'),
-                                ai_confidence=issue_data.get('ai_confidence', 0.0)
-                            )
-                            issues.append(issue)
-                        return issues
-                    else:
-                        logger.warning(f"⚠️ Could not find JSON array in migration analysis: {response.content[:200]}...")
-                        return []
-                except json.JSONDecodeError as nested_e:
-                    logger.warning(f"⚠️ Could not parse AI migration analysis: {e}")
-                    logger.debug(f"Response content: {response.content[:500]}...")
-                    return []
+            response = self.llm_manager.get_llm().invoke(messages)
+            return self._parse_migration_response(response.content, cache_key, _reply_truncated(response))
                 
         except Exception as e:
             logger.error(f"❌ Migration analysis failed: {e}")
+            self._llm_failures += 1
+            return []
+    
+    def _prepare_file_batch(self, files: List[Path], current_version: str,
+                            project_path: Path) -> Optional[Tuple[bytes, Optional[List[Any]], Optional[List[Dict[str, Any]]]]]:
+        """Read a batch of files and return (cache key, prompt messages, cached issues), or None if nothing was readable"""
+        # Prepare code content for analysis
+        file_contents = {}
+        for file_path in files:
+            try:
+                content = self._read_text(file_path)
+                file_contents[str(file_path.relative_to(project_path))] = content[:5000]  # Limit content size
+            except Exception as e:
+                logger.debug(f"Could not read {file_path}: {e}")
+        
+        if not file_contents:
+            return None
+        
+        cache_key = self._llm_cache_key(
+            "migration_analysis", current_version, self.target_version,
+            json.dumps(file_contents, sort_keys=True)
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cache_key, None, cached
+        
+        # AI prompt for migration analysis using prompt library
+        messages = create_migration_analysis_messages(file_contents, current_version, self.target_version)
+        return cache_key, messages, None
+    
+    def _parse_migration_response(self, content: str, cache_key: bytes,
+                                  truncated: bool = False) -> List[MigrationIssue]:
+        """
+        Parse the LLM's migration analysis response into issues and cache the raw issue data.
+        
+        A reply cut off at the token limit (reported by the model, or an issue array
+        that never closes) keeps the issues it completed, but is counted as a
+        failure and not cached, since the rest of the batch is missing.
+        """
+        issues_data = None
+        complete = not truncated
+        if complete:
+            try:
+                issues_data = _parse_json_reply(content, '[')
+            except ValueError as e:
+                parse_error = e
+            else:
+                # An issue array cut off mid-reply can leave a bracket inside one
+                # of its strings as the first decodable value
+                if not (isinstance(issues_data, list) and all(isinstance(item, dict) for item in issues_data)):
+                    parse_error = ValueError(f"reply is not a list of issues: {content[:200]}...")
+                    issues_data = None
+        
+        if issues_data is None:
+            complete = False
+            self._llm_failures += 1
+            issues_data = _salvage_json_objects(content)
+            if not truncated and not issues_data:
+                logger.warning(f"⚠️ Could not parse AI migration analysis: {parse_error}")
+                logger.debug(f"Response content: {content[:500]}...")
+                return []
+            logger.warning(f"⚠️ AI migration analysis reply was cut off, keeping its "
+                           f"{len(issues_data)} complete issues; lower BATCH_SIZE_FOR_AI_ANALYSIS "
+                           f"(now {self.analysis_batch_size}) or raise the model's output token limit")
+            logger.debug(f"Response content: ...{content[-500:]}")
+        
+        try:
+            issues = self._issues_from_data(issues_data)
+        except Exception as e:
+            logger.error(f"❌ Migration analysis failed: {e}")
+            if complete:
+                self._llm_failures += 1
             return []
+        if complete:
+            self._cache_put(cache_key, issues_data)
+        return issues
+    
+    def _issues_from_data(self, issues_data: List[Dict[str, Any]]) -> List[MigrationIssue]:
+        """Build MigrationIssue objects from the issue dicts returned by the LLM"""
+        return [
+            MigrationIssue(
+                file_path=issue_data.get('file_path', ''),
+                line_number=issue_data.get('line_number', 0),
+                issue_type=issue_data.get('issue_type', 'unknown'),
+                severity=issue_data.get('severity', 'info'),
+                description=issue_data.get('description', ''),
+                code_snippet=issue_data.get('code_snippet', ''),
+                suggested_fix=issue_data.get('suggested_fix'),
+                explanation=issue_data.get('explanation'),
+                ai_confidence=issue_data.get('ai_confidence', 0.0)
+            )
+            for issue_data in issues_data
+        ]
     
     def analyze_project(self, project_path: str) -> AnalysisResult:
         """Main method to analyze the entire project"""
@@ -613,6 +1132,15 @@ class PythonVersionAnalyzer:
         # Step 1: Discover Python files
         self.python_files = self.discover_python_files(project_path)
         
+        # An unchanged project gets the result of its last complete analysis
+        project_key = self._project_cache_key(project_path, self.python_files) if self.result_cache is not None else None
+        if project_key is not None:
+            cached = self._cache_get(project_key)
+            if cached is not None:
+                safe_log("info", f"🗄️ Project unchanged since {cached['analysis_timestamp']}, reusing that analysis")
+                return AnalysisResult.from_dict(cached)
+        self._llm_failures = 0
+        
         # Step 2: Detect current Python version
         current_version_info = self.detect_current_python_version(project_path)
         
@@ -628,8 +1156,9 @@ class PythonVersionAnalyzer:
         dependency_issues = []
         
         # Step 5: Generate risk assessment and recommendations
-        risk_assessment = self._generate_risk_assessment(current_version_info, migration_issues)
-        recommendations = self._generate_recommendations(current_version_info, migration_issues)
+        severity_counts = self._tally_severities(migration_issues)
+        risk_assessment = self._generate_risk_assessment(current_version_info, migration_issues, severity_counts)
+        recommendations = self._generate_recommendations(current_version_info, migration_issues, severity_counts)
         
         # Create analysis result
         result = AnalysisResult(
@@ -648,87 +1177,73 @@ class PythonVersionAnalyzer:
         logger.info(f"   📁 Files analyzed: {result.total_files_analyzed}")
         logger.info(f"   🚨 Issues found: {len(result.migration_issues)}")
         logger.info(f"   ⚠️ Risk level: {result.risk_assessment.get('overall_risk', 'unknown')}")
+        if self.result_cache is not None:
+            safe_log("info", f"🗄️ Analysis cache: {self.result_cache.hits} hits, {self.result_cache.misses} misses")
+        if project_key is not None and not self._llm_failures:
+            self._cache_put(project_key, result.to_dict())
         
+        # Files may change before the next run
+        self._source_cache.clear()
         return result
     
-    def _generate_risk_assessment(self, version_info: PythonVersionInfo, issues: List[MigrationIssue]) -> Dict[str, Any]:
+    def _is_python2_migration(self, version_info: PythonVersionInfo) -> bool:
+        """Whether this is a Python 2.x to 3.x migration"""
+        return bool(version_info.detected_version and
+                    version_info.detected_version.startswith('2.') and
+                    self.target_version.startswith('3.'))
+    
+    @staticmethod
+    def _tally_severities(issues: List[MigrationIssue]) -> Counter:
+        """Count issues per severity in one pass"""
+        return Counter(issue.severity for issue in issues)
+    
+    def _generate_risk_assessment(self, version_info: PythonVersionInfo, issues: List[MigrationIssue],
+                                  severity_counts: Optional[Counter] = None) -> Dict[str, Any]:
         """Generate risk assessment for the migration"""
-        critical_issues = [i for i in issues if i.severity == 'critical']
-        major_issues = [i for i in issues if i.severity == 'major']
-        minor_issues = [i for i in issues if i.severity == 'minor']
+        if severity_counts is None:
+            severity_counts = self._tally_severities(issues)
+        critical_count = severity_counts['critical']
+        major_count = severity_counts['major']
+        minor_count = severity_counts['minor']
         
         # Check if this is a Python 2.x to 3.x migration
-        is_python2_migration = (version_info.detected_version and 
-                               version_info.detected_version.startswith('2.') and 
-                               self.target_version.startswith('3.'))
+        is_python2_migration = self._is_python2_migration(version_info)
         
         # Calculate overall risk - Python 2.x migrations are inherently riskier
         if is_python2_migration:
-            # Python 2 to 3 migrations are always at least medium risk
-            if len(critical_issues) > 3 or len(major_issues) > 15:
-                overall_risk = "very_high"
-            elif len(critical_issues) > 0 or len(major_issues) > 5:
-                overall_risk = "high"
-            else:
-                overall_risk = "medium"  # Minimum for Python 2 -> 3
+            overall_risk = _grade(severity_counts, _PY2_RISK_LEVELS, "medium")  # Minimum for Python 2 -> 3
         else:
-            # Standard risk calculation for Python 3.x upgrades
-            if len(critical_issues) > 5:
-                overall_risk = "very_high"
-            elif len(critical_issues) > 0 or len(major_issues) > 10:
-                overall_risk = "high"
-            elif len(major_issues) > 0 or len(minor_issues) > 20:
-                overall_risk = "medium"
-            else:
-                overall_risk = "low"
+            overall_risk = _grade(severity_counts, _PY3_RISK_LEVELS, "low")
         
         return {
             "overall_risk": overall_risk,
-            "critical_issues": len(critical_issues),
-            "major_issues": len(major_issues),
-            "minor_issues": len(minor_issues),
+            "critical_issues": critical_count,
+            "major_issues": major_count,
+            "minor_issues": minor_count,
             "total_issues": len(issues),
             "confidence_score": version_info.confidence_score,
-            "estimated_effort": self._estimate_effort(issues, is_python2_migration),
-            "blocking_issues": [i.description for i in critical_issues[:5]],
+            "estimated_effort": self._estimate_effort(severity_counts, is_python2_migration),
+            "blocking_issues": list(islice((i.description for i in issues if i.severity == 'critical'), 5)),
             "is_python2_migration": is_python2_migration,
             "migration_type": "Python 2.x → 3.x" if is_python2_migration else f"Python 3.x upgrade"
         }
     
-    def _estimate_effort(self, issues: List[MigrationIssue], is_python2_migration: bool = False) -> str:
-        """Estimate effort required for migration"""
-        critical = len([i for i in issues if i.severity == 'critical'])
-        major = len([i for i in issues if i.severity == 'major'])
-        
+    def _estimate_effort(self, severity_counts: Counter, is_python2_migration: bool = False) -> str:
+        """Estimate effort required for migration from the per-severity issue counts"""
         if is_python2_migration:
             # Python 2 to 3 migrations require more effort
-            if critical > 5 or major > 30:
-                return "very_high"
-            elif critical > 2 or major > 10:
-                return "high"
-            elif critical > 0 or major > 0:
-                return "medium"
-            else:
-                return "medium"  # Minimum for Python 2 -> 3
-        else:
-            # Standard effort calculation for Python 3.x upgrades
-            if critical > 10 or major > 50:
-                return "very_high"
-            elif critical > 5 or major > 20:
-                return "high"
-            elif critical > 0 or major > 5:
-                return "medium"
-            else:
-                return "low"
+            return _grade(severity_counts, _PY2_EFFORT_LEVELS, "medium")  # Minimum for Python 2 -> 3
+        return _grade(severity_counts, _PY3_EFFORT_LEVELS, "low")
     
-    def _generate_recommendations(self, version_info: PythonVersionInfo, issues: List[MigrationIssue]) -> List[str]:
+    def _generate_recommendations(self, version_info: PythonVersionInfo, issues: List[MigrationIssue],
+                                  severity_counts: Optional[Counter] = None) -> List[str]:
         """Generate actionable recommendations"""
+        if severity_counts is None:
+            severity_counts = self._tally_severities(issues)
         recommendations = []
         
         # Check if this is a Python 2.x migration
-        is_python2_migration = (version_info.detected_version and 
-                               version_info.detected_version.startswith('2.') and 
-                               self.target_version.startswith('3.'))
+        is_python2_migration = self._is_python2_migration(version_info)
         
         # Version-related recommendations
         if version_info.detected_version:
@@ -743,44 +1258,24 @@ class PythonVersionAnalyzer:
             recommendations.append("🔍 First determine the exact current Python version being used")
         
         # Issue-based recommendations
-        critical_issues = [i for i in issues if i.severity == 'critical']
-        if critical_issues:
-            recommendations.append(f"🚨 Address {len(critical_issues)} critical issues before migration")
+        critical_count = severity_counts['critical']
+        if critical_count:
+            recommendations.append(f"🚨 Address {critical_count} critical issues before migration")
             recommendations.append("⚠️ Critical issues must be fixed to ensure compatibility")
         
-        major_issues = [i for i in issues if i.severity == 'major']
-        if major_issues:
-            recommendations.append(f"⚡ Plan to fix {len(major_issues)} major issues")
+        major_count = severity_counts['major']
+        if major_count:
+            recommendations.append(f"⚡ Plan to fix {major_count} major issues")
         
         # Python 2.x specific recommendations
         if is_python2_migration:
-            recommendations.extend([
-                "🛠️ Consider using 2to3 tool for initial automated conversion",
-                "🔧 Plan for extensive manual code review and testing",
-                "📝 Update all print statements to print() function calls",
-                "🔤 Review string/unicode handling throughout codebase",
-                "📊 Test integer division behavior (/ vs //)",
-                "📦 Update all import statements for Python 3 compatibility",
-                "🧪 Set up dual Python 2/3 testing during transition (if needed)"
-            ])
+            recommendations.extend(_PY2_SPECIFIC_TIPS)
         
         # General recommendations
         if is_python2_migration:
-            recommendations.extend([
-                "🧪 Set up comprehensive testing - Python 2→3 migrations are complex",
-                "📦 Verify ALL dependencies support Python 3",
-                "💾 Create full backup and consider feature freeze during migration",
-                "📚 Review Python 3 migration guide and breaking changes documentation",
-                "⏰ Plan for extended testing and debugging period"
-            ])
+            recommendations.extend(_PY2_MIGRATION_TIPS)
         else:
-            recommendations.extend([
-                "🧪 Set up comprehensive testing before migration",
-                "📦 Check all dependencies for target version compatibility",
-                "🔄 Consider incremental migration if jumping multiple versions",
-                "💾 Create full backup before starting migration",
-                "📚 Review Python version changelog for breaking changes"
-            ])
+            recommendations.extend(_PY3_UPGRADE_TIPS)
         
         return recommendations
     
@@ -792,8 +1287,11 @@ class PythonVersionAnalyzer:
         
         output_path = Path(output_file)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+        data = result.dump_bytes()
+        if os.linesep != "\n":
+            # Match the platform newlines text mode would have written
+            data = data.replace(b"\n", os.linesep.encode('ascii'))
+        output_path.write_bytes(data)
         
         logger.info(f"💾 Analysis saved to: {output_path.absolute()}")
         return str(output_path.absolute())
@@ -810,9 +1308,11 @@ if __name__ == "__main__":
     # Save results
     output_file = analyzer.save_analysis(result)
     
-    print(f"\n🎉 Analysis Complete!")
-    print(f"📊 Results saved to: {output_file}")
-    print(f"🔍 Current version: {result.current_version.detected_version}")
-    print(f"🎯 Target version: {result.target_version}")
-    print(f"🚨 Issues found: {len(result.migration_issues)}")
-    print(f"⚠️ Risk level: {result.risk_assessment['overall_risk']}")
\ No newline at end of file
+    print("\n".join([
+        "\n🎉 Analysis Complete!",
+        f"📊 Results saved to: {output_file}",
+        f"🔍 Current version: {result.current_version.detected_version}",
+        f"🎯 Target version: {result.target_version}",
+        f"🚨 Issues found: {len(result.migration_issues)}",
+        f"⚠️ Risk level: {result.risk_assessment['overall_risk']}",
+    ]))
\ No newline at end of file
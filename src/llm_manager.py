@@ -1,8 +1,10 @@
 """LLM manager for handling multiple AI providers (OpenAI, Anthropic, AWS Bedrock) with LangChain"""
+import functools
 import os
+import sys
 from pathlib import Path
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from config import DEFAULT_MODEL, GPT4_MODEL, DEFAULT_TEMPERATURE, GPT4_TEMPERATURE, PROVIDER
 
 # Load configuration from centralized manager
@@ -14,8 +16,43 @@ try:
 except ImportError:
     BEDROCK_REGION = 'us-east-1'  # Default region
 
-# Load configuration from both .env.keys and .env.config
-load_config()
+# Optional OS keyring, consulted for credentials missing from the environment
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+# Keyring service name credentials are stored under
+KEYRING_SERVICE = 'pyupgrader'
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_config() -> dict:
+    """Load configuration from both .env.keys and .env.config, once, when an LLM is first needed"""
+    return load_config()
+
+
+def _env_or_keyring(name: str) -> str:
+    """Get a credential from the environment, else the OS keyring; empty if neither has it"""
+    value = os.environ.get(name, '').strip()
+    if not value and keyring is not None:
+        try:
+            value = (keyring.get_password(KEYRING_SERVICE, name) or '').strip()
+        except Exception:
+            # No usable keyring backend (common on headless servers)
+            value = ''
+        if value:
+            os.environ[name] = value
+    return value
+
+
+def _prompt(message: str, name: str) -> str:
+    """Ask for a missing setting on an interactive terminal; fail fast instead of hanging otherwise"""
+    if sys.stdin is None or not sys.stdin.isatty():
+        raise ValueError(f"{name} is not set. Set it in the environment or .env.keys, "
+                         f"or store it with: keyring set {KEYRING_SERVICE} {name}")
+    return input(message).strip()
+
 
 class ModelProvider(ABC):
     """Abstract base class for AI model providers"""
@@ -41,9 +78,9 @@ class OpenAIProvider(ModelProvider):
     
     def setup_api_key(self) -> None:
         """Setup OpenAI API key"""
-        if "OPENAI_API_KEY" not in os.environ or os.environ["OPENAI_API_KEY"].strip() == "":
-            print("🔑 OpenAI API key not found in environment variables.")
-            api_key = input("Please enter your OpenAI API key: ").strip()
+        if not _env_or_keyring("OPENAI_API_KEY"):
+            print("🔑 OpenAI API key not found in environment variables or keyring.")
+            api_key = _prompt("Please enter your OpenAI API key: ", "OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OpenAI API key cannot be empty!")
             os.environ['OPENAI_API_KEY'] = api_key
@@ -65,10 +102,10 @@ class AnthropicProvider(ModelProvider):
     
     def setup_api_key(self) -> None:
         """Setup Anthropic API key"""
-        if "ANTHROPIC_API_KEY" not in os.environ or os.environ["ANTHROPIC_API_KEY"].strip() == "":
-            print("🔑 Anthropic API key not found in environment variables.")
+        if not _env_or_keyring("ANTHROPIC_API_KEY"):
+            print("🔑 Anthropic API key not found in environment variables or keyring.")
             print("💡 You can get your API key from: https://console.anthropic.com/")
-            api_key = input("Please enter your Anthropic API key: ").strip()
+            api_key = _prompt("Please enter your Anthropic API key: ", "ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("Anthropic API key cannot be empty!")
             os.environ['ANTHROPIC_API_KEY'] = api_key
@@ -91,29 +128,32 @@ class BedrockProvider(ModelProvider):
     def setup_api_key(self) -> None:
         """Setup AWS credentials for Bedrock"""
         # Check for AWS credentials
-        aws_access_key = os.environ.get('AWS_ACCESS_KEY_ID', '').strip()
-        aws_secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY', '').strip()
+        aws_access_key = _env_or_keyring('AWS_ACCESS_KEY_ID')
+        aws_secret_key = _env_or_keyring('AWS_SECRET_ACCESS_KEY')
         aws_region = os.environ.get('AWS_DEFAULT_REGION', BEDROCK_REGION).strip()
         
         if not aws_access_key or not aws_secret_key:
-            print("🔑 AWS credentials not found in environment variables.")
+            print("🔑 AWS credentials not found in environment variables or keyring.")
             print("💡 You need AWS Access Key ID and Secret Access Key to use Bedrock.")
             print("💡 You can get these from: https://console.aws.amazon.com/iam/")
             
             if not aws_access_key:
-                aws_access_key = input("Please enter your AWS Access Key ID: ").strip()
+                aws_access_key = _prompt("Please enter your AWS Access Key ID: ", "AWS_ACCESS_KEY_ID")
                 if not aws_access_key:
                     raise ValueError("AWS Access Key ID cannot be empty!")
                 os.environ['AWS_ACCESS_KEY_ID'] = aws_access_key
             
             if not aws_secret_key:
-                aws_secret_key = input("Please enter your AWS Secret Access Key: ").strip()
+                aws_secret_key = _prompt("Please enter your AWS Secret Access Key: ", "AWS_SECRET_ACCESS_KEY")
                 if not aws_secret_key:
                     raise ValueError("AWS Secret Access Key cannot be empty!")
                 os.environ['AWS_SECRET_ACCESS_KEY'] = aws_secret_key
             
             if not aws_region:
-                region_input = input(f"Please enter your AWS region (default: {BEDROCK_REGION}): ").strip()
+                # The region has a default, so a non-interactive run just uses it
+                region_input = ''
+                if sys.stdin is not None and sys.stdin.isatty():
+                    region_input = input(f"Please enter your AWS region (default: {BEDROCK_REGION}): ").strip()
                 aws_region = region_input if region_input else BEDROCK_REGION
                 os.environ['AWS_DEFAULT_REGION'] = aws_region
             
@@ -169,16 +209,29 @@ class ModelProviderFactory:
 class LLMManager:
     """Unified LLM manager that works with multiple AI providers"""
     
+    # Manager shared by every caller in the process, created on first use
+    _instance = None
+    
+    @classmethod
+    def instance(cls) -> 'LLMManager':
+        """Get the process-wide manager, so callers share one provider and LLM cache"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
     def __init__(self):
         self.provider = ModelProviderFactory.create_provider(PROVIDER)
-        self.provider.setup_api_key()
-        self._llm_cache: Dict[str, Any] = {}
+        # Credentials are checked (and prompted for) when the first LLM is created,
+        # so runs answered entirely from the analysis cache never ask for a key
+        self._api_key_ready = False
+        self._llm_cache: Dict[Tuple[str, float], Any] = {}
         print(f"✅ LLM Manager initialized with {self.provider.get_provider_name()} provider!")
     
     def get_llm(self, model_name: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE) -> Any:
         """Get LLM instance (cached for performance)"""
-        cache_key = f"{model_name}_{temperature}"
+        cache_key = (model_name, temperature)
         if cache_key not in self._llm_cache:
+            self._ensure_api_key()
             try:
                 self._llm_cache[cache_key] = self.provider.create_llm(model_name, temperature)
                 print(f"✅ Created {self.provider.get_provider_name()} LLM instance: {model_name}")
@@ -186,6 +239,13 @@ class LLMManager:
                 raise RuntimeError(f"Failed to create LLM instance: {e}")
         return self._llm_cache[cache_key]
     
+    def _ensure_api_key(self) -> None:
+        """Set up the provider's credentials before the first LLM instance is created"""
+        if not self._api_key_ready:
+            _ensure_config()
+            self.provider.setup_api_key()
+            self._api_key_ready = True
+    
     def get_gpt35_llm(self) -> Any:
         """Get default model LLM instance (maintains backward compatibility)"""
         return self.get_llm(DEFAULT_MODEL, DEFAULT_TEMPERATURE)
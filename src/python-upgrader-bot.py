@@ -11,13 +11,20 @@ Usage:
 This will analyze the test project and generate reports in the upgraded directory.
 """
 
+import io
 import sys
 import os
 from pathlib import Path
 import json
 from datetime import datetime
+from typing import Optional
 import logging
-import re
+
+try:
+    # orjson: optional fast JSON serializer
+    import orjson
+except ImportError:
+    orjson = None
 
 # Load configuration from centralized manager
 from app_py_version.config_manager import load_config
@@ -25,23 +32,16 @@ from app_py_version.config_manager import load_config
 # Load environment variables from both .env.keys and .env.config
 load_config()
 
-# Windows Unicode handling
+# Windows Unicode handling: consoles on legacy code pages cannot encode emoji,
+# so stdout is switched to UTF-8 once, replacing anything it still cannot write
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+elif hasattr(sys.stdout, 'buffer'):
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace', line_buffering=True)
+
 def safe_print(message):
-    """Safely print messages, handling Unicode issues on Windows"""
-    try:
-        print(message)
-    except UnicodeEncodeError:
-        # Remove emojis for Windows compatibility
-        emoji_pattern = re.compile("["
-                                  u"\U0001F600-\U0001F64F"  # emoticons
-                                  u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                                  u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                                  u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                                  u"\U00002702-\U000027B0"
-                                  u"\U000024C2-\U0001F251"
-                                  "]+", flags=re.UNICODE)
-        clean_message = emoji_pattern.sub('', message)
-        print(clean_message)
+    """Print a message; stdout is configured at import to never fail on Unicode"""
+    print(message)
 
 # Add current directory to Python path to import our modules
 sys.path.insert(0, str(Path(__file__).parent))
@@ -59,24 +59,27 @@ except ImportError as e:
 def main():
     """Main function to run the Python upgrade analysis and automated migration"""
     
-    # Configuration (paths relative to project root)
-    project_root = Path(__file__).parent.parent
+    # Configuration (paths relative to project root); the root is made absolute
+    # once, so every path below is already absolute when printed or passed on
+    project_root = Path(__file__).parent.parent.absolute()
     SOURCE_PROJECT = project_root / "test-project/source/simple_python2_test"
     OUTPUT_DIR = project_root / "test-project/upgraded"
     TARGET_VERSION = "3.11"  # Target Python version from .env
     MAX_MIGRATION_ITERATIONS = int(os.getenv("MAX_MIGRATION_ITERATIONS", "5"))  # Configurable iterations
     
-    safe_print("🚀 Python Upgrader Bot Starting...")
-    safe_print("=" * 70)
-    safe_print(f"📁 Source Project: {SOURCE_PROJECT.absolute()}")
-    safe_print(f"📁 Output Directory: {OUTPUT_DIR.absolute()}")
-    safe_print(f"🎯 Target Python Version: {TARGET_VERSION}")
-    safe_print(f"🔄 Max Migration Iterations: {MAX_MIGRATION_ITERATIONS}")
-    safe_print("=" * 70)
+    safe_print("\n".join([
+        "🚀 Python Upgrader Bot Starting...",
+        "=" * 70,
+        f"📁 Source Project: {SOURCE_PROJECT}",
+        f"📁 Output Directory: {OUTPUT_DIR}",
+        f"🎯 Target Python Version: {TARGET_VERSION}",
+        f"🔄 Max Migration Iterations: {MAX_MIGRATION_ITERATIONS}",
+        "=" * 70,
+    ]))
     
     # Validate source project exists
     if not SOURCE_PROJECT.exists():
-        safe_print(f"❌ Source project not found: {SOURCE_PROJECT.absolute()}")
+        safe_print(f"❌ Source project not found: {SOURCE_PROJECT}")
         safe_print("💡 Please ensure the test project exists in the specified location")
         sys.exit(1)
     
@@ -92,10 +95,11 @@ def main():
         safe_print(f"🔍 Analyzing project: {SOURCE_PROJECT.name}")
         safe_print("⏳ This may take a moment...")
         
-        result = analyzer.analyze_project(str(SOURCE_PROJECT.absolute()))
+        result = analyzer.analyze_project(str(SOURCE_PROJECT))
         
         # Generate output filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         output_filename = f"python_upgrade_analysis_{timestamp}.json"
         output_path = OUTPUT_DIR / output_filename
         
@@ -106,31 +110,32 @@ def main():
         # Create human-readable summary report
         summary_filename = f"upgrade_summary_{timestamp}.md"
         summary_path = OUTPUT_DIR / summary_filename
-        create_summary_report(result, summary_path, SOURCE_PROJECT, TARGET_VERSION)
+        create_summary_report(result, summary_path, SOURCE_PROJECT, TARGET_VERSION, now)
         
         # Display summary
-        safe_print("\n" + "=" * 60)
-        safe_print("📊 ANALYSIS COMPLETE!")
-        safe_print("=" * 60)
         project_name = Path(result.project_path).name
-        safe_print(f"✅ Project analyzed: {project_name}")
-        safe_print(f"📁 Files analyzed: {result.total_files_analyzed}")
-        safe_print(f"🔍 Current Python version detected: {result.current_version.detected_version}")
-        safe_print(f"🎯 Target Python version: {result.target_version}")
-        safe_print(f"🚨 Migration issues found: {len(result.migration_issues)}")
-        safe_print(f"⚠️  Risk level: {result.risk_assessment.get('overall_risk', 'unknown')}")
-        safe_print(f"💡 Recommendations: {len(result.recommendations)}")
+        safe_print("\n".join([
+            "\n" + "=" * 60,
+            "📊 ANALYSIS COMPLETE!",
+            "=" * 60,
+            f"✅ Project analyzed: {project_name}",
+            f"📁 Files analyzed: {result.total_files_analyzed}",
+            f"🔍 Current Python version detected: {result.current_version.detected_version}",
+            f"🎯 Target Python version: {result.target_version}",
+            f"🚨 Migration issues found: {len(result.migration_issues)}",
+            f"⚠️  Risk level: {result.risk_assessment.get('overall_risk', 'unknown')}",
+            f"💡 Recommendations: {len(result.recommendations)}",
+        ]))
         
         # File outputs
-        safe_print(f"\n📄 Detailed analysis saved to: {output_path.absolute()}")
-        safe_print(f"📄 Summary report saved to: {summary_path.absolute()}")
+        safe_print(f"\n📄 Detailed analysis saved to: {output_path}")
+        safe_print(f"📄 Summary report saved to: {summary_path}")
         
         # Show top issues if any
         if result.migration_issues:
             safe_print(f"\n🔍 Top Migration Issues:")
             for i, issue in enumerate(result.migration_issues[:3], 1):
-                safe_print(f"  {i}. {getattr(issue, 'description', 'Unknown issue')} "
-                      f"(Severity: {getattr(issue, 'severity', 'unknown')})")
+                safe_print(f"  {i}. {issue.description} (Severity: {issue.severity})")
             if len(result.migration_issues) > 3:
                 safe_print(f"  ... and {len(result.migration_issues) - 3} more issues")
         
@@ -173,15 +178,16 @@ def main():
                 
                 # Save migration execution results
                 migration_log_path = OUTPUT_DIR / f"migration_execution_{timestamp}.json"
-                with open(migration_log_path, 'w', encoding='utf-8') as f:
-                    json.dump(migration_result, f, indent=2, ensure_ascii=False)
+                save_json(migration_result, migration_log_path)
                 
                 # Report migration results
-                safe_print(f"\n📊 MIGRATION EXECUTION COMPLETE!")
-                safe_print("=" * 70)
-                safe_print(f"🔄 Iterations completed: {len(migration_result['iterations'])}")
-                safe_print(f"🏗️  Compilation attempts: {migration_result['compilation_attempts']}")
-                safe_print(f"✅ Final status: {migration_result['final_status']}")
+                safe_print("\n".join([
+                    "\n📊 MIGRATION EXECUTION COMPLETE!",
+                    "=" * 70,
+                    f"🔄 Iterations completed: {len(migration_result['iterations'])}",
+                    f"🏗️  Compilation attempts: {migration_result['compilation_attempts']}",
+                    f"✅ Final status: {migration_result['final_status']}",
+                ]))
                 
                 if migration_result['successful_fixes']:
                     safe_print(f"🔧 Successful fixes applied: {len(migration_result['successful_fixes'])}")
@@ -192,13 +198,13 @@ def main():
                     safe_print(f"⚠️  Unresolved issues: {len(migration_result['unresolved_issues'])}")
                     safe_print("   See migration_issues.md for details")
                 
-                safe_print(f"📄 Migration log saved to: {migration_log_path.absolute()}")
+                safe_print(f"📄 Migration log saved to: {migration_log_path}")
                 safe_print(f"📁 Working migration files: {migration_result['working_dir']}")
                 
                 # Show final migrated files location
                 final_migrated_dir = OUTPUT_DIR / "final_migrated_code"
                 if final_migrated_dir.exists():
-                    safe_print(f"📁 Final migrated code: {final_migrated_dir.absolute()}")
+                    safe_print(f"📁 Final migrated code: {final_migrated_dir}")
                     safe_print(f"📄 Migration status: {OUTPUT_DIR / 'migration_status.txt'}")
                     safe_print(f"📄 Files summary: {OUTPUT_DIR / 'migrated_files_summary.md'}")
                 
@@ -224,82 +230,108 @@ def main():
         return 1
 
 
-def create_summary_report(result, output_path: Path, source_project: Path, target_version: str):
-    """Create a human-readable markdown summary report"""
+def save_json(data, output_path: Path):
+    """Write data as indented UTF-8 JSON, serialized with orjson when it is installed"""
+    payload = None
+    if orjson is not None:
+        try:
+            # Non-string keys are written as strings, as json does
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Values orjson rejects, such as integers beyond 64 bits, go through json
+            pass
+    if payload is None:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    if os.linesep != "\n":
+        # Match the platform newlines text mode would have written
+        payload = payload.replace(b"\n", os.linesep.encode('ascii'))
+    output_path.write_bytes(payload)
+
+
+def _render_issue(number: int, issue) -> str:
+    """Render one migration issue as a markdown section of the summary report"""
+    # MigrationIssue is a dataclass, access attributes directly
+    text = (
+        f"### {number}. {issue.description}\n"
+        f"- **Severity:** {issue.severity}\n"
+        f"- **File:** {issue.file_path}\n"
+        f"- **Line:** {issue.line_number}\n"
+    )
+    if issue.suggested_fix:
+        text += f"- **Suggested Fix:** {issue.suggested_fix}\n"
+    if issue.explanation:
+        text += f"- **Explanation:** {issue.explanation}\n"
+    return text + "\n"
+
+
+def create_summary_report(result, output_path: Path, source_project: Path, target_version: str,
+                          generated_at: Optional[datetime] = None):
+    """Create a human-readable markdown summary report, stamped with generated_at (default: now)"""
+    if generated_at is None:
+        generated_at = datetime.now()
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"# Python Upgrade Analysis Report\n\n")
-        f.write(f"**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        # Project Overview
-        f.write("## Project Overview\n\n")
-        f.write(f"- **Project Name:** {Path(result.project_path).name}\n")
-        f.write(f"- **Source Location:** {source_project.absolute()}\n")
-        f.write(f"- **Files Analyzed:** {result.total_files_analyzed}\n")
-        f.write(f"- **Current Python Version:** {result.current_version.detected_version}\n")
-        f.write(f"- **Target Python Version:** {target_version}\n")
-        f.write(f"- **Analysis Date:** {result.analysis_timestamp.strftime('%Y-%m-%d %H:%M:%S') if hasattr(result.analysis_timestamp, 'strftime') else str(result.analysis_timestamp)}\n\n")
-        
-        # Risk Assessment
-        f.write("## Risk Assessment\n\n")
-        risk_level = result.risk_assessment.get('overall_risk', 'unknown')
-        f.write(f"**Overall Risk Level:** {risk_level.upper()}\n\n")
-        
-        if 'risk_factors' in result.risk_assessment:
-            f.write("### Risk Factors:\n")
-            for factor in result.risk_assessment['risk_factors']:
-                f.write(f"- {factor}\n")
-            f.write("\n")
-        
-        # Migration Issues
-        f.write("## Migration Issues\n\n")
-        if result.migration_issues:
-            f.write(f"Found {len(result.migration_issues)} potential migration issues:\n\n")
-            for i, issue in enumerate(result.migration_issues, 1):
-                # MigrationIssue is a dataclass, access attributes directly
-                severity = getattr(issue, 'severity', 'unknown')
-                description = getattr(issue, 'description', 'No description available')
-                file_path = getattr(issue, 'file_path', 'Unknown file')
-                line_number = getattr(issue, 'line_number', 'Unknown line')
-                
-                f.write(f"### {i}. {description}\n")
-                f.write(f"- **Severity:** {severity}\n")
-                f.write(f"- **File:** {file_path}\n")
-                f.write(f"- **Line:** {line_number}\n")
-                
-                if hasattr(issue, 'suggested_fix') and issue.suggested_fix:
-                    f.write(f"- **Suggested Fix:** {issue.suggested_fix}\n")
-                if hasattr(issue, 'explanation') and issue.explanation:
-                    f.write(f"- **Explanation:** {issue.explanation}\n")
-                f.write("\n")
-        else:
-            f.write("✅ No migration issues detected!\n\n")
-        
-        # Recommendations
-        f.write("## Recommendations\n\n")
-        if result.recommendations:
-            for i, recommendation in enumerate(result.recommendations, 1):
-                f.write(f"{i}. {recommendation}\n")
-        else:
-            f.write("No specific recommendations available.\n")
-        f.write("\n")
-        
-        # Version Detection Details
-        f.write("## Version Detection Details\n\n")
-        f.write(f"- **Detected Version:** {result.current_version.detected_version}\n")
-        f.write(f"- **Minimum Required:** {result.current_version.minimum_version}\n")
-        f.write(f"- **Confidence Level:** {result.current_version.confidence_score:.2f}\n")
-        
-        if result.current_version.detection_method:
-            f.write(f"- **Detection Method:** {result.current_version.detection_method}\n")
-        if result.current_version.evidence:
-            f.write(f"- **Evidence:** {', '.join(result.current_version.evidence)}\n")
-        f.write("\n")
-        
-        # Footer
-        f.write("---\n")
-        f.write("*Report generated by Python Upgrader Bot*\n")
+    analysis_date = result.analysis_timestamp
+    if hasattr(analysis_date, 'strftime'):
+        analysis_date = analysis_date.strftime('%Y-%m-%d %H:%M:%S')
+    
+    # Collected and written in one call rather than one write per line;
+    # the header and project overview are a single block
+    parts = [
+        f"# Python Upgrade Analysis Report\n\n"
+        f"**Generated on:** {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        f"## Project Overview\n\n"
+        f"- **Project Name:** {Path(result.project_path).name}\n"
+        f"- **Source Location:** {source_project.absolute()}\n"
+        f"- **Files Analyzed:** {result.total_files_analyzed}\n"
+        f"- **Current Python Version:** {result.current_version.detected_version}\n"
+        f"- **Target Python Version:** {target_version}\n"
+        f"- **Analysis Date:** {analysis_date}\n\n"
+    ]
+    
+    # Risk Assessment
+    parts.append("## Risk Assessment\n\n")
+    risk_level = result.risk_assessment.get('overall_risk', 'unknown')
+    parts.append(f"**Overall Risk Level:** {risk_level.upper()}\n\n")
+    
+    if 'risk_factors' in result.risk_assessment:
+        parts.append("### Risk Factors:\n")
+        for factor in result.risk_assessment['risk_factors']:
+            parts.append(f"- {factor}\n")
+        parts.append("\n")
+    
+    # Migration Issues
+    if result.migration_issues:
+        parts.append(f"## Migration Issues\n\nFound {len(result.migration_issues)} potential migration issues:\n\n")
+        parts.extend(_render_issue(i, issue) for i, issue in enumerate(result.migration_issues, 1))
+    else:
+        parts.append("## Migration Issues\n\n✅ No migration issues detected!\n\n")
+    
+    # Recommendations
+    parts.append("## Recommendations\n\n")
+    if result.recommendations:
+        for i, recommendation in enumerate(result.recommendations, 1):
+            parts.append(f"{i}. {recommendation}\n")
+    else:
+        parts.append("No specific recommendations available.\n")
+    parts.append("\n")
+    
+    # Version Detection Details
+    parts.append("## Version Detection Details\n\n")
+    parts.append(f"- **Detected Version:** {result.current_version.detected_version}\n")
+    parts.append(f"- **Minimum Required:** {result.current_version.minimum_version}\n")
+    parts.append(f"- **Confidence Level:** {result.current_version.confidence_score:.2f}\n")
+    
+    if result.current_version.detection_method:
+        parts.append(f"- **Detection Method:** {result.current_version.detection_method}\n")
+    if result.current_version.evidence:
+        parts.append(f"- **Evidence:** {', '.join(result.current_version.evidence)}\n")
+    parts.append("\n")
+    
+    # Footer
+    parts.append("---\n")
+    parts.append("*Report generated by Python Upgrader Bot*\n")
 
+    output_path.write_text(''.join(parts), encoding='utf-8')
 
 if __name__ == "__main__":
     exit_code = main()
@@ -125,6 +125,13 @@ print result'''
     result3 = tool._run(test_code3)
     print(f"   ✅ Result length: {len(result3)} characters")
     
+    # Test case 4: Print statement converted with its __future__ import
+    print("   📝 Test Case 4: Print statement conversion")
+    result4 = tool._run('print "x"')
+    assert 'print("x")' in result4, result4
+    assert 'from __future__ import print_function' in result4, result4
+    print("   ✅ print \"x\" became print(\"x\")")
+    
     print("   ✅ Modernize tool tests completed\n")
 
 
@@ -9,32 +9,41 @@ import sys
 import os
 from pathlib import Path
 
+# Repository root, analyzed by the tests below
+project_root = Path(__file__).parent.parent
+
 # Add src directory to Python path
-src_path = Path(__file__).parent.parent / "src"
+src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
-# Also add the root directory for imports
-root_path = Path(__file__).parent.parent
-sys.path.insert(0, str(root_path))
-
 try:
-    from src.app_py_version.version_analyzer import PythonVersionAnalyzer
+    from app_py_version.version_analyzer import PythonVersionAnalyzer
     print("✅ Successfully imported PythonVersionAnalyzer")
 except ImportError as e:
     print(f"❌ Failed to import PythonVersionAnalyzer: {e}")
     sys.exit(1)
 
+# Analyzer shared by the tests, so the project is discovered and scanned once
+_analyzer = None
+
+def _get_analyzer():
+    """Get the shared analyzer, creating it on first use"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = PythonVersionAnalyzer(target_version="3.11")
+    return _analyzer
+
 def test_basic_functionality():
     """Test basic analyzer functionality"""
     print("\n🧪 Testing basic functionality...")
     
     try:
         # Initialize analyzer
-        analyzer = PythonVersionAnalyzer(target_version="3.11")
+        analyzer = _get_analyzer()
         print("✅ Analyzer initialized successfully")
         
         # Test version detection on parent project
-        parent_dir = Path(__file__).parent.parent
+        parent_dir = project_root
         print(f"🔍 Testing version detection on: {parent_dir}")
         
         version_info = analyzer.detect_current_python_version(parent_dir)
@@ -61,8 +70,8 @@ def test_ai_functionality():
     print("\n🤖 Testing AI functionality...")
     
     try:
-        analyzer = PythonVersionAnalyzer(target_version="3.11")
-        parent_dir = Path(__file__).parent.parent
+        analyzer = _get_analyzer()
+        parent_dir = project_root
         
         # Test AI version detection
         ai_result = analyzer._ai_version_detection(parent_dir)
@@ -92,10 +101,10 @@ def test_full_analysis():
     print("\n📊 Testing full analysis...")
     
     try:
-        analyzer = PythonVersionAnalyzer(target_version="3.11")
+        analyzer = _get_analyzer()
         
         # Analyze current project (parent directory)
-        parent_dir = Path(__file__).parent.parent
+        parent_dir = project_root
         
         print("⏳ Running full analysis (this may take a moment)...")
         result = analyzer.analyze_project(str(parent_dir))
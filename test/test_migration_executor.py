@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the Migration Executor
+
+This script streams structured chat agent replies through the final answer
+capture handler and checks the code extracted from what it keeps.
+"""
+
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from app_py_version.migration_executor import MigrationExecutor, _FinalAnswerCaptureHandler
+
+# A structured chat agent's final answer: the code sits inside the JSON
+# action_input string, and the JSON blob is wrapped in its own fence
+FINAL_ANSWER_REPLY = '''Thought: The print statement needs parentheses and nothing else changes.
+Action:
+```
+{
+  "action": "Final Answer",
+  "action_input": "```python\\nprint(1)\\nx = 2\\n```"
+}
+```'''
+
+# A tool call that precedes the final answer in the same agent run
+TOOL_CALL_REPLY = '''Thought: Let pyupgrade modernize the file first.
+Action:
+```
+{
+  "action": "pyupgrade_modernizer",
+  "action_input": {"code": "```python\\nprint 1\\n```"}
+}
+```'''
+
+
+def _tokens(text):
+    """Split text into small chunks, the way an LLM streams its reply"""
+    return re.findall(r"\w+|\s+|[^\w\s]", text)
+
+
+async def _stream(handler, text):
+    """Feed text to the handler token by token, as a streaming model run does"""
+    await handler.on_chat_model_start()
+    for token in _tokens(text):
+        await handler.on_llm_new_token(token)
+
+
+def test_final_answer_capture():
+    """Test capturing a streamed structured chat final answer"""
+    print("🧪 Testing final answer capture...")
+
+    executor = MigrationExecutor(use_tool_cache=False)
+    expected = executor._extract_code_from_agent_output(FINAL_ANSWER_REPLY)
+    print(f"   📝 Code from the complete reply: {expected!r}")
+    assert expected == "print(1)\nx = 2"
+
+    print("   📝 Test Case 1: Streamed final answer")
+    handler = _FinalAnswerCaptureHandler()
+    asyncio.run(_stream(handler, FINAL_ANSWER_REPLY))
+    assert handler.output is not None, "the final answer was not captured"
+    assert handler.output.rstrip().endswith("}"), "captured before the JSON blob was complete"
+    print(f"   ✅ Captured at {len(handler.output)} of {len(FINAL_ANSWER_REPLY)} characters")
+    assert executor._extract_code_from_agent_output(handler.output) == expected
+    print("   ✅ Kept output extracts the same code")
+
+    print("   📝 Test Case 2: Streamed tool call")
+    handler = _FinalAnswerCaptureHandler()
+    asyncio.run(_stream(handler, TOOL_CALL_REPLY))
+    assert handler.output is None, "a tool call was captured as the final answer"
+    print("   ✅ Tool call not captured")
+
+    print("   ✅ Final answer capture tests completed\n")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("🚀 Starting Migration Executor Test Suite...")
+    print("=" * 60)
+
+    try:
+        test_final_answer_capture()
+
+        print("🎉 All Migration Executor tests completed successfully!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"❌ Test suite failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -18,6 +18,11 @@ from app_py_version.prompt_library import (
     create_migration_analysis_messages
 )
 
+# Prompt inputs shared by the checks below; the builders only read them
+DEPENDENCIES = {'requirements': ['requests==2.28.0']}
+CODE_SAMPLES = [{'file': 'test.py', 'content': 'print("hello")'}]
+FILE_CONTENTS = {'test.py': 'print "hello world"'}
+
 def test_prompt_library():
     """Test all prompt generation functions"""
     print("🧪 Testing Prompt Library...")
@@ -27,9 +32,7 @@ def test_prompt_library():
     system_prompt = PromptLibrary.get_version_detection_system_prompt()
     print(f"   ✅ System prompt length: {len(system_prompt)} characters")
     
-    dependencies = {'requirements': ['requests==2.28.0']}
-    code_samples = [{'file': 'test.py', 'content': 'print("hello")'}]
-    user_prompt = PromptLibrary.get_version_detection_user_prompt(dependencies, code_samples)
+    user_prompt = PromptLibrary.get_version_detection_user_prompt(DEPENDENCIES, CODE_SAMPLES)
     print(f"   ✅ User prompt length: {len(user_prompt)} characters")
     
     # Test migration analysis prompts
@@ -39,19 +42,18 @@ def test_prompt_library():
     )
     print(f"   ✅ Migration system prompt length: {len(system_prompt_migration)} characters")
     
-    file_contents = {'test.py': 'print "hello world"'}
     user_prompt_migration = PromptLibrary.get_migration_analysis_user_prompt(
-        file_contents, "2.7", "3.11"
+        FILE_CONTENTS, "2.7", "3.11"
     )
     print(f"   ✅ Migration user prompt length: {len(user_prompt_migration)} characters")
     
     # Test message creation functions
     print("\n3. Testing Message Creation Functions")
     try:
-        messages = create_version_detection_messages(dependencies, code_samples)
+        messages = create_version_detection_messages(DEPENDENCIES, CODE_SAMPLES)
         print(f"   ✅ Version detection messages created: {len(messages)} messages")
         
-        messages_migration = create_migration_analysis_messages(file_contents, "2.7", "3.11")
+        messages_migration = create_migration_analysis_messages(FILE_CONTENTS, "2.7", "3.11")
         print(f"   ✅ Migration analysis messages created: {len(messages_migration)} messages")
     except ImportError as e:
         print(f"   ⚠️ Message creation requires langchain: {e}")